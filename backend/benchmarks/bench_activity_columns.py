@@ -0,0 +1,124 @@
+"""
+Benchmark: columnar (NumPy) activity fields vs walking activity dicts
+
+For synthetic trips of 10k-100k activities and a random schedule, times
+what one optimization derives from the activities outside the search:
+  - legacy: the scheduler's per-activity field lists and the insights'
+    dict walk (both copied below from before the columns)
+  - columnar: building ActivityColumns, deriving the scheduler's fields
+    from it, and the insights' totals and bincounts
+The columnar total includes the build, so the speedup is end to end.
+
+Usage (from backend/):
+    python -m benchmarks.bench_activity_columns [--repeat 5]
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from src.services.activity_columns import ActivityColumns, parse_duration
+from src.services.itinerary_scheduler import MAX_PER_DAY, TRAVEL_BUFFER
+
+TYPES = ['Sightseeing', 'Adventure', 'Food', 'Culture', 'Nightlife', 'Nature', 'Shopping', 'Other']
+DURATIONS = ['1 hour', '2 hours', '2-3 hours', '45 mins', 'Half day', None]
+SIZES = [10000, 50000, 100000]
+
+
+def make_trip(count, rng):
+    activities = [{
+        'id': i,
+        'activity_type': rng.choice(TYPES),
+        'cost': rng.choice([0, rng.randint(5, 400)]),
+        'duration': rng.choice(DURATIONS),
+        'rating': round(rng.uniform(2.5, 5.0), 1),
+        'city_id': rng.randint(1, 20),
+        'day_number': rng.randint(1, 30)
+    } for i in range(count)]
+    days = max(1, count // MAX_PER_DAY)
+    # Roughly half the activities scheduled, at most MAX_PER_DAY per day
+    slots = [day for day in range(days) for _ in range(MAX_PER_DAY)]
+    rng.shuffle(slots)
+    assignment = [slots[i] if i < len(slots) and rng.random() < 0.5 else -1 for i in range(count)]
+    return activities, days, assignment
+
+
+def legacy_fields(activities):
+    """The per-activity lists the scheduler built before the columns"""
+    durations = [parse_duration(a.get('duration')) for a in activities]
+    needs = [duration + TRAVEL_BUFFER for duration in durations]
+    costs = [max(0.0, float(a.get('cost') or 0)) for a in activities]
+    types = [a.get('activity_type') or 'Other' for a in activities]
+    cities = [a.get('city_id') for a in activities]
+    values = [1.0 + min(max(float(a.get('rating') or 0), 0.0), 5.0) / 5 for a in activities]
+    return needs, costs, types, cities, values
+
+
+def legacy_insights(original, optimized):
+    """The dict walk the columnar insights replaced"""
+    original_cost = sum(a.get('cost', 0) or 0 for a in original)
+    optimized_cost = sum(a.get('cost', 0) or 0 for a in optimized)
+    activity_distribution = {}
+    for activity in optimized:
+        activity_type = activity.get('activity_type', 'Other')
+        activity_distribution[activity_type] = activity_distribution.get(activity_type, 0) + 1
+    return original_cost - optimized_cost, activity_distribution
+
+
+def legacy(activities, assignment):
+    legacy_fields(activities)
+    optimized = [activities[i] for i, day in enumerate(assignment) if day >= 0]
+    return legacy_insights(activities, optimized)
+
+
+def columnar_fields(columns):
+    """The scheduler's derivation of its fields from the columns"""
+    needs = columns.duration + TRAVEL_BUFFER
+    costs = np.maximum(columns.cost, 0.0)
+    values = 1.0 + np.clip(columns.rating, 0.0, 5.0) / 5
+    return needs.tolist(), costs.tolist(), columns.type_code.tolist(), columns.city.tolist(), values.tolist()
+
+
+def columnar_insights(columns, assignment):
+    scheduled = np.asarray(assignment, dtype=np.int64) >= 0
+    return columns.total_cost() - columns.total_cost(scheduled), columns.type_counts(scheduled)
+
+
+def columnar(columns, assignment):
+    columnar_fields(columns)
+    return columnar_insights(columns, assignment)
+
+
+def best_of(repeat, fn, *args):
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(*args)
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run(repeat, seed):
+    rng = random.Random(seed)
+    print(f'{"activities":>10} | {"legacy ms":>9} | {"build ms":>8} {"compute ms":>10} {"total ms":>8} | {"speedup":>7}')
+    for count in SIZES:
+        activities, _, assignment = make_trip(count, rng)
+
+        legacy_ms, expected = best_of(repeat, legacy, activities, assignment)
+        build_ms, columns = best_of(repeat, ActivityColumns, activities)
+        compute_ms, result = best_of(repeat, columnar, columns, assignment)
+        assert abs(expected[0] - result[0]) < 1e-6 and expected[1] == result[1]
+
+        total_ms = build_ms + compute_ms
+        print(f'{count:>10} | {legacy_ms:>9.2f} | {build_ms:>8.2f} {compute_ms:>10.2f} {total_ms:>8.2f} '
+              f'| {legacy_ms / total_ms:>6.2f}x')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    run(args.repeat, args.seed)
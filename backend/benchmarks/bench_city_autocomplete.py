@@ -0,0 +1,93 @@
+"""
+Benchmark: fuzzy city autocomplete latency at several catalog sizes
+
+Builds synthetic catalogs (syllable-based names, so trigram overlap looks
+like real place names), then times typo'd prefix queries and reports
+p50/p99 latency per size.
+
+Usage (from backend/):
+    python -m benchmarks.bench_city_autocomplete [--sizes 1000,10000,100000] [--queries 2000]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from src.services.city_index import FuzzyCityIndex
+
+# Onset + vowel (+ coda) syllables give a few thousand distinct trigrams,
+# roughly what a real gazetteer of this size has
+ONSETS = ['', 'b', 'bh', 'ch', 'd', 'g', 'h', 'j', 'k', 'kh', 'l', 'm', 'n', 'p', 'r', 's',
+          'sh', 't', 'th', 'v', 'w', 'y', 'z', 'br', 'st', 'tr', 'gr', 'fl']
+VOWELS = ['a', 'e', 'i', 'o', 'u', 'ai', 'ou', 'ia']
+CODAS = ['', '', '', 'n', 'r', 'l', 's', 'm', 'd', 'rg', 'nt']
+SYLLABLES = [o + v + c for o in ONSETS for v in VOWELS for c in set(CODAS)]
+RECALL_QUERIES = 500
+COUNTRIES = ['India', 'France', 'Brazil', 'Japan', 'Kenya', 'Peru', 'Italy', 'Chile']
+
+
+def make_catalog(size, rng):
+    names = set()
+    while len(names) < size:
+        names.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).title())
+    return [
+        {'name': name, 'country': rng.choice(COUNTRIES), 'popularity': rng.randint(0, 100),
+         'trip_count': rng.randint(0, 50)}
+        for name in names
+    ]
+
+
+def make_typo(text, rng):
+    """Drop, swap or replace one character (never the first)"""
+    i = rng.randrange(1, len(text))
+    edit = rng.choice(['drop', 'swap', 'replace'])
+    if edit == 'drop':
+        return text[:i] + text[i + 1:]
+    if edit == 'swap' and i < len(text) - 1:
+        return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+    return text[:i] + rng.choice('aeiouknrst') + text[i + 1:]
+
+
+def make_query(name, rng):
+    """A prefix of a real name, as typed so far, with up to one typo"""
+    q = name.lower()[:rng.randint(3, len(name))]
+    if len(q) > 4 and rng.random() < 0.6:
+        q = make_typo(q, rng)
+    return q
+
+
+def run(sizes, queries, seed):
+    rng = random.Random(seed)
+    print(f"{'cities':>8} {'build_s':>8} {'p50_ms':>8} {'p99_ms':>8} {'max_ms':>8} {'recall@10':>10}")
+    for size in sizes:
+        catalog = make_catalog(size, rng)
+        started = time.perf_counter()
+        index = FuzzyCityIndex(catalog)
+        build = time.perf_counter() - started
+
+        latencies = []
+        for _ in range(queries):
+            q = make_query(rng.choice(catalog)['name'], rng)
+            started = time.perf_counter()
+            index.search(q, limit=10)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        # Recall: a whole name with one typo should come back in the top 10
+        hits = 0
+        for _ in range(RECALL_QUERIES):
+            name = rng.choice(catalog)['name']
+            hits += any(r['name'] == name for r in index.search(make_typo(name, rng), limit=10))
+
+        latencies.sort()
+        p50 = statistics.median(latencies)
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f'{size:>8} {build:>8.2f} {p50:>8.3f} {p99:>8.3f} {latencies[-1]:>8.3f} {hits / RECALL_QUERIES:>10.1%}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,10000,100000')
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    run([int(s) for s in args.sizes.split(',')], args.queries, args.seed)
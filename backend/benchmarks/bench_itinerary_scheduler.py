@@ -0,0 +1,136 @@
+"""
+Benchmark: itinerary scheduler vs the legacy greedy schedule
+
+Generates synthetic trips, schedules them with the legacy greedy loop
+(copied below from the old AIService._optimize_activity_schedule) and
+with the constraint-based scheduler, and reports solve time, activities
+scheduled and the scheduler's objective for both.
+
+The legacy schedule ignores durations, so it is also checked against
+the day-hour limits.
+
+Usage (from backend/):
+    python -m benchmarks.bench_itinerary_scheduler [--time-budget-ms 200]
+"""
+import argparse
+import copy
+import random
+import time
+
+from src.services.itinerary_scheduler import TYPE_REPEAT_PENALTY, ItineraryScheduler
+
+TYPES = ['Sightseeing', 'Adventure', 'Food', 'Culture', 'Nightlife', 'Nature', 'Shopping', 'Other']
+DURATIONS = ['1 hour', '2 hours', '2-3 hours', '3-4 hours', '45 mins', '30 minutes', 'Half day', None]
+SIZES = [(20, 5), (200, 14), (2000, 30), (10000, 60)]
+
+
+def legacy_schedule(activities, days, budget):
+    """The greedy loop this scheduler replaced (logic unchanged, comments trimmed)"""
+    if not activities:
+        return []
+
+    activity_types = {}
+    for activity in activities:
+        activity_type = activity.get('activity_type', 'Other')
+        if activity_type not in activity_types:
+            activity_types[activity_type] = []
+        activity_types[activity_type].append(activity)
+
+    optimized = []
+    activities_per_day = max(2, min(4, len(activities) // days))
+
+    for day in range(1, days + 1):
+        day_activities = []
+        day_cost = 0
+        day_start_time = 9
+
+        type_rotation = ['Sightseeing', 'Food', 'Activity', 'Culture', 'Nature']
+        for activity_type in type_rotation:
+            if activity_type in activity_types and activity_types[activity_type]:
+                activity = activity_types[activity_type].pop(0)
+                activity_cost = activity.get('cost', 0) or 0
+
+                if day_cost + activity_cost <= (budget / days) * 1.2:
+                    activity['optimized_day'] = day
+                    activity['optimized_time'] = f"{day_start_time}:00 AM"
+                    day_start_time += 3
+                    day_cost += activity_cost
+                    day_activities.append(activity)
+
+                    if len(day_activities) >= activities_per_day:
+                        break
+
+        optimized.extend(day_activities)
+
+        if day % 2 == 0:
+            optimized.append({
+                'name': 'Rest Period',
+                'activity_type': 'Rest',
+                'optimized_day': day,
+                'optimized_time': '2:00 PM - 4:00 PM',
+                'cost': 0,
+                'description': 'Relaxation time to avoid travel fatigue'
+            })
+
+    return optimized
+
+
+def make_trip(count, days, rng):
+    activities = [{
+        'id': i,
+        'name': f'Activity {i}',
+        'activity_type': rng.choice(TYPES),
+        'cost': round(rng.uniform(0, 120), 2),
+        'duration': rng.choice(DURATIONS),
+        'rating': round(rng.uniform(3, 5), 1)
+    } for i in range(count)]
+    budget = days * 150
+    return activities, budget
+
+
+def score(scheduler, assignment):
+    """Objective ignoring feasibility: value of scheduled activities minus type repeats"""
+    total = 0.0
+    counts = {}
+    for i, day in enumerate(assignment):
+        if day >= 0:
+            key = (day, scheduler.types[i])
+            total += scheduler.values[i] - TYPE_REPEAT_PENALTY * counts.get(key, 0)
+            counts[key] = counts.get(key, 0) + 1
+    return total
+
+
+def run(time_budget, seed):
+    rng = random.Random(seed)
+    print(f"{'acts':>6} {'days':>5} | {'legacy_ms':>9} {'sched':>5} {'objective':>9} {'feasible':>8} "
+          f"| {'new_ms':>7} {'sched':>5} {'objective':>9} {'greedy_obj':>10} {'iters':>7}")
+    for count, days in SIZES:
+        activities, budget = make_trip(count, days, rng)
+
+        started = time.perf_counter()
+        legacy = legacy_schedule(copy.deepcopy(activities), days, budget)
+        legacy_ms = (time.perf_counter() - started) * 1000
+
+        scheduler = ItineraryScheduler(activities, days, budget, seed=seed)
+        legacy_assignment = [-1] * count
+        for entry in legacy:
+            if entry.get('activity_type') != 'Rest':
+                legacy_assignment[entry['id']] = entry['optimized_day'] - 1
+        feasible = scheduler.evaluate(legacy_assignment) is not None
+
+        started = time.perf_counter()
+        assignment, stats = scheduler.solve(time_budget)
+        new_ms = (time.perf_counter() - started) * 1000
+
+        print(f'{count:>6} {days:>5} | {legacy_ms:>9.2f} {sum(d >= 0 for d in legacy_assignment):>5} '
+              f'{score(scheduler, legacy_assignment):>9.2f} {str(feasible):>8} '
+              f'| {new_ms:>7.1f} {stats["scheduled"]:>5} {stats["objective"]:>9.2f} '
+              f'{stats["greedy_objective"]:>10.2f} {stats["iterations"]:>7}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--time-budget-ms', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    run(args.time_budget_ms / 1000, args.seed)
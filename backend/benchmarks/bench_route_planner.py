@@ -0,0 +1,62 @@
+"""
+Benchmark: route planner on large multi-city trips
+
+Generates random stops (clustered, like cities in a few regions), plans
+each route with nearest-neighbour + 2-opt and reports the planning time
+(cold and warm; the distance matrix is only cached for routes of up to
+ROUTE_MATRIX_CACHE_MAX_STOPS stops) and the distance saved against
+the random visit order it started from.
+
+Usage (from backend/):
+    python -m benchmarks.bench_route_planner [--time-limit-ms 100]
+"""
+import argparse
+import random
+import time
+
+from src.services.route_planner import RoutePlanner, cached_distance_matrix
+
+SIZES = [10, 50, 100, 300, 500]
+
+
+def make_stops(count, rng):
+    regions = [(rng.uniform(-50, 60), rng.uniform(-120, 140)) for _ in range(max(1, count // 40))]
+    stops = []
+    for i in range(count):
+        lat, lon = rng.choice(regions)
+        stops.append({
+            'id': i,
+            'name': f'City {i}',
+            'latitude': max(-89.0, min(89.0, lat + rng.gauss(0, 4))),
+            'longitude': lon + rng.gauss(0, 6)
+        })
+    return stops
+
+
+def run(time_limit, seed):
+    rng = random.Random(seed)
+    print(f'{"stops":>6} | {"cold ms":>8} {"warm ms":>8} | {"original km":>12} {"planned km":>11} {"saved":>6}')
+    for count in SIZES:
+        stops = make_stops(count, rng)
+        cached_distance_matrix.cache_clear()
+
+        started = time.perf_counter()
+        route = RoutePlanner.plan(stops, time_limit)
+        cold_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        RoutePlanner.plan(stops, time_limit)
+        warm_ms = (time.perf_counter() - started) * 1000
+
+        original = route['original_distance_km']
+        saved = route['distance_saved_km'] / original * 100 if original else 0.0
+        print(f'{count:>6} | {cold_ms:>8.1f} {warm_ms:>8.1f} | {original:>12.0f} '
+              f'{route["optimized_distance_km"]:>11.0f} {saved:>5.1f}%')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--time-limit-ms', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    run(args.time_limit_ms / 1000, args.seed)
@@ -25,6 +25,7 @@ def create_app():
         response.headers.add('Access-Control-Allow-Origin', '*')
         response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
         response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
+        response.headers.add('Access-Control-Expose-Headers', 'X-Next-Cursor,Link,ETag')
         return response
     
     # Configuration
@@ -33,13 +34,22 @@ def create_app():
     app.config['JSON_SORT_KEYS'] = False
     
     # Initialize database
-    from src.config.database import init_database, seed_database
+    from src.config.database import init_database, seed_database, init_app
     init_database()
+    init_app(app)
+    
+    # Register maintenance CLI commands
+    from src.config.commands import register_commands
+    register_commands(app)
     
     # Seed database if enabled in environment
     if os.environ.get('SEED_DATABASE', 'false').lower() == 'true':
         seed_database()
     
+    # Build the unified city catalog up front instead of on the first request
+    from src.services.city_catalog import city_catalog
+    city_catalog.snapshot()
+    
     # Register blueprints
     from src.routes import trips, users, cities, activities, expenses, community, analytics, ai
     app.register_blueprint(users.bp, url_prefix='/api')
@@ -54,7 +64,18 @@ def create_app():
     # Health check endpoint
     @app.route('/api/health', methods=['GET'])
     def health():
-        return {'status': 'ok', 'database': 'connected'}
+        from src.config.database import get_pool_stats
+        from src.services.geocode_cache import geocode_cache
+        from src.services.geoapify_client import geoapify
+        from src.services.optimization_jobs import optimization_jobs
+        return {
+            'status': 'ok',
+            'database': 'connected',
+            'pool': get_pool_stats(),
+            'geocode_cache': geocode_cache.stats(),
+            'geoapify': geoapify.stats(),
+            'optimizer': optimization_jobs.stats()
+        }
     
     # Root endpoint
     @app.route('/', methods=['GET'])
@@ -71,7 +92,7 @@ def create_app():
                 'expenses': '/api/expenses',
                 'community': '/api/community',
                 'analytics': '/api/analytics',
-                'ai': '/api/trips/<id>/ai/optimize, /api/trips/<id>/ai/budget-analysis'
+                'ai': '/api/trips/<id>/ai/optimize, /api/trips/<id>/ai/optimize/jobs, /api/ai/jobs/<job_id>, /api/trips/<id>/ai/budget-analysis'
             },
             'frontend': 'Access the frontend at http://localhost:5173'
         }
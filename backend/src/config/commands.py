@@ -0,0 +1,43 @@
+"""
+Flask CLI maintenance commands
+"""
+import click
+
+
+def register_commands(app):
+    """Register maintenance commands on the Flask CLI"""
+
+    @app.cli.command('repair-trip-counters')
+    @click.option('--trip-id', type=int, default=None, help='Only repair this trip')
+    def repair_trip_counters(trip_id):
+        """Recompute trip section/activity counters and planned cost"""
+        from src.models.trip import Trip
+        updated = Trip.repair_counters(trip_id)
+        click.echo(f'Repaired counters for {updated} trip(s)')
+
+    @app.cli.command('build-city-data')
+    def build_city_data():
+        """Compile data/city_details.json into the memory-mapped data file and index"""
+        from src.services import city_details_store
+        count = city_details_store.build()
+        click.echo(f'Built {city_details_store.DATA_PATH} ({count} cities)')
+
+    @app.cli.command('optimize-trips')
+    @click.option('--trip-id', 'trip_ids', type=int, multiple=True, help='Trip to optimize (repeatable; default: all upcoming trips)')
+    @click.option('--workers', type=int, default=None, help='Worker processes (default: BATCH_OPTIMIZER_WORKERS or one per core)')
+    @click.option('--output', type=click.File('w'), default='-', help='NDJSON output file (default: stdout)')
+    def optimize_trips(trip_ids, workers, output):
+        """Optimize many trips on a process pool, streaming NDJSON results and a throughput summary"""
+        from src.services.batch_optimizer import BatchOptimizer, WORKERS, to_ndjson
+        batch = BatchOptimizer.prepare(list(trip_ids) or None)
+        for record in BatchOptimizer.run(**batch, workers=workers or WORKERS):
+            output.write(to_ndjson(record))
+            output.flush()
+            if 'summary' in record:
+                summary = record['summary']
+                click.echo(
+                    f"Optimized {summary['done']}/{summary['trips']} trip(s) with {summary['workers']} worker(s) "
+                    f"in {summary['elapsed_s']}s ({summary['trips_per_sec']} trips/sec, "
+                    f"p50 solve {summary.get('solve_ms', {}).get('p50')} ms)",
+                    err=True
+                )
@@ -4,37 +4,516 @@ Using SQLite for the hackathon project
 """
 import sqlite3
 import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, has_request_context, request
 
 # Get the backend directory (two levels up from src/config)
 BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-DATABASE_PATH = os.path.join(BACKEND_DIR, 'globetrotter.db')
+DATABASE_PATH = os.path.join(BACKEND_DIR, os.environ.get('DATABASE_PATH', 'globetrotter.db'))
+
+# Connection pool configuration
+POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 8))
+POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))
+
+# 'production' enables WAL and tuned pragmas for concurrent load
+DATABASE_MODE = os.environ.get('DATABASE_MODE', 'development')
+BUSY_TIMEOUT_MS = int(os.environ.get('DB_BUSY_TIMEOUT_MS', 5000))
+PRODUCTION_PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('cache_size', -int(os.environ.get('DB_CACHE_SIZE_KB', 20000))),
+    ('mmap_size', int(os.environ.get('DB_MMAP_SIZE', 256 * 1024 * 1024))),
+    ('temp_store', 'MEMORY'),
+    ('busy_timeout', BUSY_TIMEOUT_MS),
+)
+
+# Writer retry configuration (SQLITE_BUSY after busy_timeout expires)
+WRITE_RETRIES = int(os.environ.get('DB_WRITE_RETRIES', 5))
+WRITE_BACKOFF = float(os.environ.get('DB_WRITE_BACKOFF', 0.02))
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection becomes available in time"""
+
+
+class ConnectionPool:
+    """Thread-safe pool of reusable SQLite connections"""
+
+    def __init__(self, database, size=POOL_SIZE, timeout=POOL_TIMEOUT, pragmas=()):
+        self.database = database
+        self.size = size
+        self.timeout = timeout
+        self.pragmas = pragmas
+        self._lock = threading.Condition()
+        self._idle = []
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self._pid = os.getpid()
+        self._idle = []
+        self._created = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._timeouts = 0
+
+    def _connect(self):
+        """Open a new connection and run the per-connection setup once"""
+        conn = sqlite3.connect(self.database, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        # Enable foreign keys
+        conn.execute('PRAGMA foreign_keys = ON')
+        for name, value in self.pragmas:
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def acquire(self, timeout=None):
+        """Check out a connection, waiting up to `timeout` seconds for one to free up"""
+        timeout = self.timeout if timeout is None else timeout
+        with self._lock:
+            # Connections must not be shared across a fork
+            if self._pid != os.getpid():
+                self._reset_stats()
+
+            self._checkouts += 1
+            if not self._idle and self._created >= self.size:
+                self._waits += 1
+                started = time.monotonic()
+                deadline = started + timeout
+                while not self._idle and self._created >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        self._wait_time += time.monotonic() - started
+                        raise PoolTimeout(f'No database connection available after {timeout}s')
+                    self._lock.wait(remaining)
+                self._wait_time += time.monotonic() - started
+
+            if self._idle:
+                conn = self._idle.pop()
+            else:
+                self._created += 1
+                conn = None
+            self._in_use += 1
+
+        if conn is None:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                    self._in_use -= 1
+                    self._lock.notify()
+                raise
+        return PooledConnection(self, conn)
+
+    def release(self, conn):
+        """Return a connection to the pool, discarding any open transaction"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            conn = None
+
+        with self._lock:
+            self._in_use -= 1
+            if conn is None or self._pid != os.getpid():
+                self._created = max(0, self._created - 1)
+            else:
+                self._idle.append(conn)
+            self._lock.notify()
+
+    def stats(self):
+        """Snapshot of pool usage for sizing the pool"""
+        with self._lock:
+            return {
+                'size': self.size,
+                'open': self._created,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'wait_time_ms': round(self._wait_time * 1000, 3),
+                'timeouts': self._timeouts
+            }
+
+
+class PooledConnection:
+    """Connection handle whose close() hands the connection back to its pool"""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise sqlite3.ProgrammingError('Cannot operate on a closed database.')
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn)
+
+    def __del__(self):
+        # Return connections that were never closed (e.g. on an exception path)
+        self.close()
+
+
+def _is_busy(error):
+    """Whether an error is SQLITE_BUSY/SQLITE_LOCKED and worth retrying"""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    code = getattr(error, 'sqlite_errorcode', None)
+    if code is not None:
+        return code & 0xff in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    return 'locked' in str(error) or 'busy' in str(error)
+
+
+class WriteGate:
+    """Single writer per process with bounded retry on SQLITE_BUSY
+
+    Writers queue on a process-wide lock, so only one write transaction is
+    open at a time; busy_timeout plus retries cover writers in other
+    processes. Readers never take the gate.
+    """
+
+    def __init__(self, retries=WRITE_RETRIES, backoff=WRITE_BACKOFF, timeout=POOL_TIMEOUT):
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._writes = 0
+        self._busy_retries = 0
+        self._wait_time = 0.0
+
+    def _retry(self, operation):
+        for attempt in range(self.retries + 1):
+            try:
+                return operation()
+            except sqlite3.OperationalError as e:
+                if not _is_busy(e) or attempt == self.retries:
+                    raise
+                with self._stats_lock:
+                    self._busy_retries += 1
+                delay = min(self.backoff * (2 ** attempt), 1.0)
+                time.sleep(delay * (0.5 + random.random() / 2))
+
+    def begin(self, conn):
+        """Wait for the writer slot and open a write transaction"""
+        started = time.monotonic()
+        if not self._lock.acquire(timeout=self.timeout):
+            raise sqlite3.OperationalError('database is locked (writer queue timeout)')
+        with self._stats_lock:
+            self._wait_time += time.monotonic() - started
+        try:
+            self._retry(lambda: conn.execute('BEGIN IMMEDIATE'))
+        except Exception:
+            self._lock.release()
+            raise
+
+    def commit(self, conn):
+        """Commit the write transaction and hand the slot to the next writer"""
+        try:
+            self._retry(conn.commit)
+            with self._stats_lock:
+                self._writes += 1
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._lock.release()
+
+    def rollback(self, conn):
+        try:
+            conn.rollback()
+        finally:
+            self._lock.release()
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'writes': self._writes,
+                'busy_retries': self._busy_retries,
+                'wait_time_ms': round(self._wait_time * 1000, 3)
+            }
+
+
+# Statements that need the writer gate; a WITH prefix counts when its CTEs feed a write
+_WRITE_STATEMENT = re.compile(
+    r'^\s*(?:(?:--[^\n]*\n|/\*.*?\*/)\s*)*'
+    r'(?:INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER|WITH\b.*\)\s*(?:INSERT|UPDATE|DELETE|REPLACE))\b',
+    re.IGNORECASE | re.DOTALL
+)
+
+
+def is_write_statement(sql):
+    return _WRITE_STATEMENT.match(sql) is not None
+
+
+class DatabaseSession:
+    """One connection and one transaction shared by everything in a request"""
+
+    READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, pool, gate, readonly):
+        self.readonly = readonly
+        self.rollback_only = False
+        self._write_gate = gate
+        self._gate = None
+        self._conn = pool.acquire()
+        # Reads get a single snapshot. Write requests read in autocommit
+        # until their first write, which takes the writer gate and opens the
+        # transaction with BEGIN IMMEDIATE, so it never upgrades from a read
+        if readonly:
+            self._conn.execute('BEGIN')
+
+    def connection(self):
+        return SessionConnection(self)
+
+    def before_statement(self, sql):
+        """Take the writer gate before the first write of a write request"""
+        if not self.readonly and self._gate is None and is_write_statement(sql):
+            self._begin_write()
+
+    def _begin_write(self):
+        if self._conn.in_transaction:
+            # Only reads ran so far; end their implicit transaction
+            self._conn.commit()
+        self._write_gate.begin(self._conn)
+        self._gate = self._write_gate
+
+    @contextmanager
+    def write_transaction(self):
+        """
+        write_transaction() for code running inside this request
+
+        When the session already holds the writer gate the block runs in a
+        savepoint of the request transaction (committed with the request).
+        Otherwise it commits on its own before the block returns, after
+        ending a read snapshot whose lock would stall the commit.
+        """
+        conn = self._conn
+        if self._gate is not None:
+            conn.execute('SAVEPOINT write_transaction')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('ROLLBACK TO write_transaction')
+                conn.execute('RELEASE write_transaction')
+                raise
+            conn.execute('RELEASE write_transaction')
+            return
+
+        if conn.in_transaction:
+            conn.commit()
+        gate = self._write_gate
+        gate.begin(conn)
+        try:
+            yield conn
+        except BaseException:
+            gate.rollback(conn)
+            raise
+        else:
+            gate.commit(conn)
+        finally:
+            if self.readonly:
+                # Back to a snapshot for the rest of the request
+                conn.execute('BEGIN')
+
+    def commit(self):
+        """Commit the request transaction and release the connection"""
+        if self._conn is None:
+            return
+        try:
+            if self._gate is not None:
+                gate, self._gate = self._gate, None
+                if self.rollback_only:
+                    gate.rollback(self._conn)
+                else:
+                    gate.commit(self._conn)
+            elif self.rollback_only:
+                self._conn.rollback()
+            else:
+                self._conn.commit()
+        finally:
+            self.close()
+
+    def close(self):
+        """Release the connection, rolling back anything not committed"""
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            if self._gate is not None:
+                gate, self._gate = self._gate, None
+                gate.rollback(conn)
+            conn.close()
+
+
+class SessionConnection:
+    """Connection handle bound to a request session
+
+    commit() and close() are deferred to the end of the request so nested
+    model and service calls share the session's transaction. Statements
+    pass through the session first, so the first write takes the gate.
+    """
+
+    def __init__(self, session):
+        self._session = session
+
+    def __getattr__(self, name):
+        return getattr(self._session._conn, name)
+
+    def cursor(self):
+        return SessionCursor(self._session, self._session._conn.cursor())
+
+    def execute(self, sql, parameters=()):
+        self._session.before_statement(sql)
+        return self._session._conn.execute(sql, parameters)
+
+    def executemany(self, sql, parameters):
+        self._session.before_statement(sql)
+        return self._session._conn.executemany(sql, parameters)
+
+    def executescript(self, script):
+        # Scripts are only used to write (seeding)
+        self._session.before_statement('INSERT')
+        return self._session._conn.executescript(script)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        self._session.rollback_only = True
+
+    def close(self):
+        pass
+
+
+class SessionCursor:
+    """Cursor of a session connection; see SessionConnection"""
+
+    def __init__(self, session, cursor):
+        self._session = session
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, sql, parameters=()):
+        self._session.before_statement(sql)
+        self._cursor.execute(sql, parameters)
+        return self
+
+    def executemany(self, sql, parameters):
+        self._session.before_statement(sql)
+        self._cursor.executemany(sql, parameters)
+        return self
+
+    def executescript(self, script):
+        self._session.before_statement('INSERT')
+        self._cursor.executescript(script)
+        return self
+
+
+_pool = ConnectionPool(
+    DATABASE_PATH,
+    pragmas=PRODUCTION_PRAGMAS if DATABASE_MODE == 'production' else ()
+)
+_write_gate = WriteGate()
 
 def get_db():
-    """Get database connection with row factory"""
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
-    # Enable foreign keys
-    conn.execute('PRAGMA foreign_keys = ON')
-    return conn
+    """Get a database connection with row factory
 
-def init_database():
-    """Initialize database with schema"""
-    # Get project root (one level up from backend)
-    PROJECT_ROOT = os.path.dirname(BACKEND_DIR)
-    schema_path = os.path.join(PROJECT_ROOT, 'database', 'schema.sql')
-    
-    if os.path.exists(schema_path):
-        conn = get_db()
-        cursor = conn.cursor()
-        
-        with open(schema_path, 'r') as f:
-            schema_sql = f.read()
-            cursor.executescript(schema_sql)
-        
-        conn.commit()
+    Inside a request this is the request's session connection; elsewhere
+    it is a connection checked out of the pool.
+    """
+    if has_request_context():
+        session = g.get('db_session')
+        if session is None:
+            readonly = request.method in DatabaseSession.READ_METHODS
+            session = DatabaseSession(_pool, _write_gate, readonly)
+            g.db_session = session
+        return session.connection()
+    return _pool.acquire()
+
+def init_app(app):
+    """Commit or roll back the request session when a request finishes"""
+    @app.after_request
+    def commit_db_session(response):
+        session = g.pop('db_session', None)
+        if session is not None:
+            if response.status_code >= 500:
+                session.rollback_only = True
+            session.commit()
+        return response
+
+    @app.teardown_request
+    def close_db_session(exc):
+        session = g.pop('db_session', None)
+        if session is not None:
+            session.close()
+
+@contextmanager
+def write_transaction():
+    """Run writes through the writer gate, committed when the block ends
+
+    Inside a request with a database session this goes through the
+    session's connection (see DatabaseSession.write_transaction), so it
+    never waits on a gate its own request already holds.
+
+    Usage:
+        with write_transaction() as conn:
+            conn.execute(...)
+    """
+    session = g.get('db_session') if has_request_context() else None
+    if session is not None:
+        with session.write_transaction() as conn:
+            yield conn
+        return
+
+    conn = _pool.acquire()
+    try:
+        _write_gate.begin(conn)
+        try:
+            yield conn
+        except BaseException:
+            _write_gate.rollback(conn)
+            raise
+        _write_gate.commit(conn)
+    finally:
         conn.close()
-        return True
-    return False
+
+@contextmanager
+def pooled_connection():
+    """Check out a connection of its own, outside any request session
+
+    For reads that must not join (or hold locks in) the request transaction.
+    """
+    conn = _pool.acquire()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+def get_pool_stats():
+    """Get connection pool and writer statistics"""
+    return {**_pool.stats(), 'mode': DATABASE_MODE, 'writer': _write_gate.stats()}
+
+def init_database():
+    """Initialize database schema by applying pending migrations"""
+    from src.config.migrations import migrate
+    migrate(DATABASE_PATH)
+    return True
 
 def seed_database():
     """Seed database with initial data"""
@@ -0,0 +1,88 @@
+"""
+Versioned schema migrations keyed on PRAGMA user_version
+
+Migrations live in database/migrations as NNNN_description.sql and are
+applied in order, each exactly once. The schema version is stored in the
+database header, so checking for pending work is a single pragma read.
+"""
+import os
+import re
+import sqlite3
+
+MIGRATION_FILE = re.compile(r'^(\d+)_\w+\.sql$')
+
+
+def _migrations_dir():
+    from src.config.database import BACKEND_DIR
+    return os.path.join(os.path.dirname(BACKEND_DIR), 'database', 'migrations')
+
+
+def list_migrations():
+    """Get (version, path) pairs for all migration files, in order"""
+    migrations_dir = _migrations_dir()
+    migrations = []
+    for filename in os.listdir(migrations_dir):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), os.path.join(migrations_dir, filename)))
+    migrations.sort()
+    return migrations
+
+
+def split_statements(sql):
+    """Split a SQL script into complete statements (trigger bodies stay whole)"""
+    statements = []
+    current = ''
+    for line in sql.splitlines(keepends=True):
+        current += line
+        if sqlite3.complete_statement(current):
+            statement = current.strip()
+            if statement:
+                statements.append(statement)
+            current = ''
+    if current.strip():
+        statements.append(current.strip())
+    return statements
+
+
+def migrate(database_path, timeout=60):
+    """Apply pending migrations under an exclusive lock
+
+    Returns the list of versions applied (empty when already current).
+    """
+    migrations = list_migrations()
+    latest = migrations[-1][0] if migrations else 0
+
+    # Fast path: schema already current
+    from src.config.database import get_db
+    conn = get_db()
+    current = conn.execute('PRAGMA user_version').fetchone()[0]
+    conn.close()
+    if current >= latest:
+        return []
+
+    # isolation_level=None so executescript-style implicit commits never
+    # release the lock between statements
+    conn = sqlite3.connect(database_path, timeout=timeout, isolation_level=None)
+    try:
+        conn.execute('BEGIN EXCLUSIVE')
+        # Another worker may have migrated while we waited for the lock
+        current = conn.execute('PRAGMA user_version').fetchone()[0]
+        applied = []
+        for version, path in migrations:
+            if version <= current:
+                continue
+            with open(path, 'r') as f:
+                for statement in split_statements(f.read()):
+                    conn.execute(statement)
+            applied.append(version)
+        if applied:
+            conn.execute(f'PRAGMA user_version = {applied[-1]}')
+        conn.execute('COMMIT')
+        return applied
+    except Exception:
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        raise
+    finally:
+        conn.close()
@@ -3,19 +3,29 @@ Activity controller for handling activity-related requests
 """
 from flask import request, jsonify
 from src.models.activity import Activity
+from src.utils.pagination import InvalidCursor, decode_cursor, page_size, set_next_cursor
 
 class ActivityController:
     @staticmethod
     def search():
-        """Search activities"""
+        """Search activities (full-text, bm25-ranked; ?prefix=false for whole words only)"""
         search_query = request.args.get('search', '')
         category = request.args.get('category', '')
+        prefix = request.args.get('prefix', 'true').lower() != 'false'
         
-        activities = Activity.search(
+        try:
+            after = decode_cursor(request.args.get('cursor'), 2 if search_query else 1)
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+        
+        activities, next_cursor = Activity.search(
             search_query if search_query else None,
-            category if category else None
+            category if category else None,
+            limit=page_size(request.args.get('limit'), 50),
+            after=after,
+            prefix=prefix
         )
-        return jsonify(activities)
+        return set_next_cursor(jsonify(activities), next_cursor)
     
     @staticmethod
     def get_by_trip(trip_id):
@@ -1,21 +1,118 @@
 """
 AI Controller for handling AI feature requests
 """
-from flask import request, jsonify
+import hmac
+import os
+from flask import Response, request, jsonify, stream_with_context, url_for
 from src.services.ai_service import AIService
+from src.services.batch_optimizer import BatchOptimizer, WORKERS as BATCH_WORKERS, to_ndjson
+from src.services.optimization_jobs import optimization_jobs, QueueFull, MAX_WAIT
+
+# How long GET .../ai/optimize waits for its job before answering 202
+SYNC_WAIT = float(os.environ.get('OPTIMIZER_SYNC_WAIT', MAX_WAIT))
+# Admin endpoints require 'Authorization: Bearer <token>' and are disabled when unset
+ADMIN_API_TOKEN = os.environ.get('ADMIN_API_TOKEN', '')
 
 class AIController:
     @staticmethod
     def optimize_itinerary(trip_id):
-        """Get AI-optimized itinerary"""
+        """Get AI-optimized itinerary (solved on the worker pool, cached per itinerary)"""
         try:
-            result = AIService.optimize_itinerary(trip_id)
-            if 'error' in result:
-                return jsonify(result), 404
-            return jsonify(result)
+            # The job store reads and writes on connections of its own, so
+            # no request session (or pooled connection) is held while waiting
+            job = optimization_jobs.submit(trip_id)
+            if job is None:
+                return jsonify({'error': 'Trip not found'}), 404
+            if job['job_id'] is not None:
+                job = optimization_jobs.get(job['job_id'], wait=SYNC_WAIT) or job
+            if job['status'] == 'done':
+                return jsonify(job['result'])
+            if job['status'] == 'failed':
+                return jsonify({'error': job['error']}), 500
+            # Still solving: hand the client the job to poll
+            return AIController._job_response(job)
+        except QueueFull as e:
+            return AIController._queue_full(e)
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
+    @staticmethod
+    def submit_optimization(trip_id):
+        """Start an itinerary optimization job; 202 with the job to poll (200 if already cached)"""
+        try:
+            job = optimization_jobs.submit(trip_id)
+            if job is None:
+                return jsonify({'error': 'Trip not found'}), 404
+            return AIController._job_response(job)
+        except QueueFull as e:
+            return AIController._queue_full(e)
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    @staticmethod
+    def get_optimization_job(job_id):
+        """Get an optimization job; ?wait=seconds long-polls until it finishes"""
+        try:
+            wait = float(request.args.get('wait', 0))
+        except ValueError:
+            return jsonify({'error': 'wait must be a number of seconds'}), 400
+        job = optimization_jobs.get(job_id, wait=wait)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        return AIController._job_response(job)
+    
+    @staticmethod
+    def batch_optimize():
+        """
+        Optimize many trips (body: trip_ids, default all upcoming trips; workers)
+        Streams one NDJSON record per trip and a final throughput summary
+        """
+        if not ADMIN_API_TOKEN:
+            return jsonify({'error': 'Admin API is disabled (ADMIN_API_TOKEN is not set)'}), 403
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        if not hmac.compare_digest(supplied.encode('utf-8'), ADMIN_API_TOKEN.encode('utf-8')):
+            return jsonify({'error': 'Admin token required'}), 401
+        
+        data = request.get_json(silent=True) or {}
+        trip_ids = data.get('trip_ids')
+        if trip_ids is not None and (
+            not isinstance(trip_ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in trip_ids)
+        ):
+            return jsonify({'error': 'trip_ids must be a list of trip ids'}), 400
+        workers = data.get('workers', BATCH_WORKERS)
+        if not isinstance(workers, int) or workers < 1:
+            return jsonify({'error': 'workers must be a positive integer'}), 400
+        
+        try:
+            # Load everything up front (on a pooled connection, not the request's
+            # write session) so the stream holds no database connection
+            batch = BatchOptimizer.prepare(trip_ids)
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+        
+        records = BatchOptimizer.run(**batch, workers=min(workers, BATCH_WORKERS))
+        return Response(
+            stream_with_context(to_ndjson(record) for record in records),
+            mimetype='application/x-ndjson'
+        )
+    
+    @staticmethod
+    def _job_response(job):
+        response = jsonify(job)
+        # Cached results are answered directly, with no job to poll
+        if job['job_id'] is not None:
+            response.headers['Location'] = url_for('ai.get_optimization_job', job_id=job['job_id'])
+        if job['status'] not in ('done', 'failed'):
+            response.status_code = 202
+        return response
+    
+    @staticmethod
+    def _queue_full(error):
+        response = jsonify({'error': str(error)})
+        response.status_code = 503
+        response.headers['Retry-After'] = '5'
+        return response
+    
     @staticmethod
     def analyze_budget(trip_id):
         """Get AI budget analysis"""
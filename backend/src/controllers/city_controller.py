@@ -3,48 +3,61 @@ City controller for handling city-related requests
 """
 from flask import request, jsonify
 from src.models.city import City
-from src.services.city_data_service import search_cities, get_all_cities, get_city_details
-import os
+from src.services.city_data_service import (
+    DETAIL_FIELDS, DETAIL_SECTIONS, search_cities, get_all_cities_snapshot, get_city_details_snapshot,
+    with_detail_sections
+)
+from src.services.city_autocomplete_service import autocomplete_cities
+from src.services.city_catalog import city_catalog
+from src.services.geoapify_client import geoapify
+from src.utils.http_cache import snapshot_response
+import time
 
-# Optional import for Geoapify integration
-try:
-    import requests
-    REQUESTS_AVAILABLE = True
-except ImportError:
-    REQUESTS_AVAILABLE = False
+# City details change only on deploy; clients revalidate with the ETag after this
+DETAILS_MAX_AGE = 3600
 
 class CityController:
+    @staticmethod
+    def _requested_fields(allowed):
+        """Parse ?fields=a,b into a list (None if absent); raises ValueError on unknown fields"""
+        raw = request.args.get('fields', '').strip()
+        if not raw:
+            return None
+        fields = [field.strip() for field in raw.split(',') if field.strip()]
+        unknown = [field for field in fields if field not in allowed]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)} (allowed: {', '.join(allowed)})")
+        return fields
+    
     @staticmethod
     def search():
         """Search cities - hybrid approach (database + real-time)"""
         search_query = request.args.get('search', '').strip()
         country = request.args.get('country', '').strip()
         
-        # If search query provided, use real-time search
+        # If search query provided, search the database index and the real-time data
         if search_query:
-            # Use real-time search service
-            cities = search_cities(search_query)
+            try:
+                sections = CityController._requested_fields(DETAIL_SECTIONS) or ()
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            db_cities = City.search(search_query, country if country and country != 'all' else None)
+            # Database cities win the dedupe below, so they carry the requested sections too
+            db_cities = [with_detail_sections(city, sections) for city in db_cities]
+            # Use real-time search service (detail sections only on request)
+            real_time_cities = search_cities(search_query, sections)
             # Filter by country if specified
             if country and country != 'all':
-                cities = [c for c in cities if c.get('country', '').lower() == country.lower()]
+                real_time_cities = [c for c in real_time_cities if c.get('country', '').lower() == country.lower()]
+            
+            # Merge results (avoid duplicates, database cities first)
+            seen = set(c['name'].lower() for c in db_cities)
+            cities = db_cities + [c for c in real_time_cities if c['name'].lower() not in seen]
             return jsonify(cities)
         else:
-            # No search query - get all cities from database first, then supplement with real-time data
-            db_cities = City.search(None, country if country and country != 'all' else None)
-            real_time_cities = get_all_cities()
-            
-            # Merge results (avoid duplicates)
-            seen = set()
-            merged = []
-            for city in db_cities + real_time_cities:
-                city_key = city.get('name', '').lower()
-                if city_key not in seen:
-                    seen.add(city_key)
-                    merged.append(city)
-            
-            # Sort by popularity
-            merged.sort(key=lambda x: x.get('popularity', 0), reverse=True)
-            return jsonify(merged[:100])  # Limit to 100
+            # No search query - serve the unified catalog's popularity view
+            cities = city_catalog.snapshot().view(country if country and country != 'all' else None, limit=100)
+            return jsonify(cities)
     
     @staticmethod
     def real_time_search():
@@ -52,80 +65,42 @@ class CityController:
         query = request.args.get('q', '').strip()
         
         if not query:
-            # Return all cities from our database
-            cities = get_all_cities()
-            return jsonify(cities)
+            # Return all cities from the precomputed snapshot (304 if unchanged)
+            return snapshot_response(get_all_cities_snapshot())
+        
+        try:
+            sections = CityController._requested_fields(DETAIL_SECTIONS) or ()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # First try our local comprehensive search
-        local_cities = search_cities(query)
+        # Start the Geoapify lookup (if API key is set and requests available)
+        # so it runs while the local search does
+        started = time.monotonic()
+        upstream = geoapify.submit(query) if geoapify.enabled() else None
         
-        # Try Geoapify API for additional real-time results (if API key is set and requests available)
-        geoapify_key = os.environ.get('GEOAPIFY_API_KEY', '')
-        if geoapify_key and REQUESTS_AVAILABLE:
-            try:
-                geoapify_results = CityController._search_geoapify(query, geoapify_key)
-                # Merge with local results (avoid duplicates)
-                seen = set(c['name'].lower() for c in local_cities)
-                for city in geoapify_results:
-                    if city['name'].lower() not in seen:
-                        local_cities.append(city)
-                        seen.add(city['name'].lower())
-            except Exception as e:
-                print(f"Geoapify API error (using local data): {e}")
+        # Local comprehensive search (detail sections only on request)
+        local_cities = search_cities(query, sections)
+        
+        # Add whatever Geoapify returned before the deadline
+        if upstream is not None:
+            geoapify_results = geoapify.result(upstream, started)
+            # Merge with local results (avoid duplicates)
+            seen = set(c['name'].lower() for c in local_cities)
+            for city in geoapify_results:
+                if city['name'].lower() not in seen:
+                    local_cities.append(city)
+                    seen.add(city['name'].lower())
         
         return jsonify(local_cities[:50])  # Limit to 50 results
     
     @staticmethod
-    def _search_geoapify(query, api_key):
-        """Search cities using Geoapify API"""
-        if not REQUESTS_AVAILABLE:
-            return []
-        try:
-            url = f"https://api.geoapify.com/v1/geocode/autocomplete"
-            params = {
-                'text': query,
-                'type': 'city',
-                'limit': 20,
-                'apiKey': api_key
-            }
-            response = requests.get(url, params=params, timeout=5)
-            response.raise_for_status()
-            data = response.json()
-            
-            cities = []
-            if 'features' in data:
-                for feature in data['features']:
-                    props = feature.get('properties', {})
-                    # Geoapify returns 'city' field for cities
-                    city_name = props.get('city') or props.get('name', '')
-                    country = props.get('country', '')
-                    state = props.get('state', '')
-                    
-                    # Only process if it's actually a city (not a postcode or other result)
-                    if city_name and props.get('result_type') in ['city', 'town']:
-                        # Calculate importance score (0-100)
-                        rank = props.get('rank', {})
-                        importance = rank.get('importance', 0.5) if isinstance(rank, dict) else 0.5
-                        popularity = int(importance * 100) if importance else 70
-                        
-                        cities.append({
-                            'id': len(cities) + 1000,  # Use high ID to avoid conflicts
-                            'name': city_name,
-                            'country': country,
-                            'state': state,
-                            'cost_index': 'Medium',  # Default - can be enhanced with cost data
-                            'popularity': popularity,
-                            'description': f"{city_name}" + (f", {state}" if state else "") + f", {country}",
-                            'latitude': props.get('lat'),
-                            'longitude': props.get('lon'),
-                            'formatted': props.get('formatted', f"{city_name}, {country}"),
-                            'has_details': False,
-                            'source': 'geoapify'
-                        })
-            return cities
-        except Exception as e:
-            print(f"Geoapify search error: {e}")
-            return []
+    def autocomplete():
+        """Typo-tolerant autocomplete over database and built-in cities"""
+        query = request.args.get('q', '').strip()
+        limit = request.args.get('limit', 10, type=int)
+        if not query:
+            return jsonify([])
+        return jsonify(autocomplete_cities(query, limit))
     
     @staticmethod
     def get(city_id):
@@ -135,12 +110,36 @@ class CityController:
             return jsonify(city)
         return jsonify({'error': 'City not found'}), 404
     
+    @staticmethod
+    def nearby(city_id):
+        """Get cities nearest to a city, optionally within radius_km"""
+        radius_km = request.args.get('radius_km', type=float)
+        limit = request.args.get('limit', 10, type=int)
+        if radius_km is not None and radius_km <= 0:
+            return jsonify({'error': 'radius_km must be positive'}), 400
+        limit = max(1, min(limit, 100))
+        
+        city = City.get_by_id(city_id)
+        if not city:
+            return jsonify({'error': 'City not found'}), 404
+        if city['latitude'] is None or city['longitude'] is None:
+            return jsonify({'error': 'City has no coordinates'}), 422
+        
+        cities = City.nearby(city['latitude'], city['longitude'], radius_km, limit, exclude_id=city_id)
+        return jsonify(cities)
+    
     @staticmethod
     def get_details(city_name):
-        """Get detailed information about a city (hotels, shopping, tourist places, entertainment)"""
-        details = get_city_details(city_name)
-        if details:
-            return jsonify(details)
+        """Get detailed information about a city (hotels, shopping, tourist places, entertainment)
+        ?fields=hotels,shopping returns only those fields; each field set has its own ETag
+        """
+        try:
+            fields = CityController._requested_fields(DETAIL_FIELDS)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        snapshot = get_city_details_snapshot(city_name, fields)
+        if snapshot:
+            return snapshot_response(snapshot, max_age=DETAILS_MAX_AGE)
         return jsonify({'error': 'City details not found'}), 404
     
     @staticmethod
@@ -3,15 +3,22 @@ Community controller for handling community-related requests
 """
 from flask import request, jsonify
 from src.config.database import get_db
+from src.utils.pagination import InvalidCursor, decode_cursor, page_size, paginate, set_next_cursor
 
 class CommunityController:
     @staticmethod
     def get_posts():
-        """Get community posts with user and trip info"""
+        """Get community posts with user and trip info, newest first (?limit=, ?cursor=)"""
+        try:
+            after = decode_cursor(request.args.get('cursor'), 2)
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+        limit = page_size(request.args.get('limit'), 50)
+        
         conn = get_db()
         cursor = conn.cursor()
         
-        cursor.execute('''
+        query = '''
             SELECT 
                 cp.*, 
                 u.username, 
@@ -21,12 +28,21 @@ class CommunityController:
             FROM community_posts cp
             JOIN users u ON cp.user_id = u.id
             LEFT JOIN trips t ON cp.trip_id = t.id
-            ORDER BY cp.created_at DESC
-            LIMIT 50
-        ''')
+        '''
+        params = []
+        
+        if after:
+            query += ' WHERE (cp.created_at, cp.id) < (?, ?)'
+            params.extend(after)
         
+        query += ' ORDER BY cp.created_at DESC, cp.id DESC LIMIT ?'
+        params.append(limit + 1)
+        
+        cursor.execute(query, params)
         posts = [dict(row) for row in cursor.fetchall()]
         conn.close()
-        return jsonify(posts)
+        
+        posts, next_cursor = paginate(posts, limit, lambda p: (p['created_at'], p['id']))
+        return set_next_cursor(jsonify(posts), next_cursor)
 
 
@@ -3,14 +3,20 @@ Trip controller for handling trip-related requests
 """
 from flask import request, jsonify
 from src.models.trip import Trip
+from src.utils.pagination import InvalidCursor, decode_cursor, page_size, set_next_cursor
 
 class TripController:
     @staticmethod
     def list_all():
-        """Get all trips"""
+        """Get all trips, one page at a time (?limit=, ?cursor=)"""
         try:
-            trips = Trip.get_all()
-            return jsonify(trips), 200
+            trips, next_cursor = Trip.get_all(
+                limit=page_size(request.args.get('limit'), 100),
+                after=decode_cursor(request.args.get('cursor'), 2)
+            )
+            return set_next_cursor(jsonify(trips), next_cursor), 200
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
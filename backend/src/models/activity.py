@@ -1,37 +1,82 @@
 """
 Activity model and data access methods
 """
+import re
 from src.config.database import get_db
+from src.utils.pagination import paginate
+
+# Column weights for bm25 ranking: name, description, city_name, country
+SEARCH_WEIGHTS = (10.0, 1.0, 5.0, 2.0)
 
 class Activity:
     @staticmethod
-    def search(search_query=None, category=None):
-        """Search activities"""
+    def _match_expression(search_query, prefix=True):
+        """Build an FTS5 MATCH expression from free text (None if no terms)"""
+        terms = re.findall(r'\w+', search_query)
+        if not terms:
+            return None
+        suffix = '*' if prefix else ''
+        return ' '.join(f'"{term}"{suffix}' for term in terms)
+    
+    @staticmethod
+    def search(search_query=None, category=None, limit=50, after=None, prefix=True):
+        """
+        Search a page of activities
+        With a search query, results are ranked by bm25 relevance over the
+        activities_fts index and after is the (search_rank, id) of the last
+        activity on the previous page; otherwise newest first and after is (id,)
+        Returns (activities, next_cursor)
+        """
+        if search_query:
+            match = Activity._match_expression(search_query, prefix)
+            if match is None:
+                return [], None
+        
         conn = get_db()
         cursor = conn.cursor()
         
-        query = '''
-            SELECT a.*, c.name as city_name, c.country, c.cost_index
-            FROM activities a
-            LEFT JOIN cities c ON a.city_id = c.id
-            WHERE 1=1
-        '''
-        params = []
-        
         if search_query:
-            query += ' AND (a.name LIKE ? OR a.city LIKE ? OR c.name LIKE ?)'
-            params.extend([f'%{search_query}%', f'%{search_query}%', f'%{search_query}%'])
+            weights = ', '.join(str(w) for w in SEARCH_WEIGHTS)
+            query = f'''
+                SELECT a.*, c.name as city_name, c.country, c.cost_index,
+                       bm25(activities_fts, {weights}) as search_rank
+                FROM activities_fts
+                JOIN activities a ON a.id = activities_fts.rowid
+                LEFT JOIN cities c ON a.city_id = c.id
+                WHERE activities_fts MATCH ?
+            '''
+            params = [match]
+        else:
+            query = '''
+                SELECT a.*, c.name as city_name, c.country, c.cost_index
+                FROM activities a
+                LEFT JOIN cities c ON a.city_id = c.id
+                WHERE 1=1
+            '''
+            params = []
         
         if category:
             query += ' AND a.activity_type = ?'
             params.append(category)
         
-        query += ' ORDER BY a.id DESC'
+        if search_query:
+            if after:
+                query += ' AND (search_rank > ? OR (search_rank = ? AND a.id < ?))'
+                params.extend([after[0], after[0], after[1]])
+            query += ' ORDER BY search_rank ASC, a.id DESC LIMIT ?'
+            key = lambda a: (a['search_rank'], a['id'])
+        else:
+            if after:
+                query += ' AND a.id < ?'
+                params.extend(after)
+            query += ' ORDER BY a.id DESC LIMIT ?'
+            key = lambda a: (a['id'],)
+        params.append(limit + 1)
         
         cursor.execute(query, params)
         activities = [dict(row) for row in cursor.fetchall()]
         conn.close()
-        return activities
+        return paginate(activities, limit, key)
     
     @staticmethod
     def get_by_trip(trip_id):
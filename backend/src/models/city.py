@@ -1,45 +1,92 @@
 """
 City model and data access methods
 """
+import json
 from src.config.database import get_db
+from src.utils.geo import MAX_DISTANCE_KM, bounding_box, haversine_km
+
+# First search radius for nearest-city queries; grows 4x until enough cities are found
+NEARBY_START_RADIUS_KM = 250
 
 class City:
     @staticmethod
     def search(search_query=None, country=None):
-        """Search cities"""
+        """
+        Search cities by name or country
+        Terms of 3+ characters match anywhere via the cities_fts trigram index;
+        shorter terms match name/country prefixes via the NOCASE indexes
+        """
         conn = get_db()
         cursor = conn.cursor()
         
+        # trip_count is maintained on cities by triggers on trip_cities
         query = '''
-            SELECT c.*, 
-                   COUNT(DISTINCT tc.trip_id) as trip_count
+            SELECT c.*
             FROM cities c
-            LEFT JOIN trip_cities tc ON c.id = tc.city_id
             WHERE 1=1
         '''
         params = []
         
-        # Handle search query - if provided and not empty, filter by it
-        # SQLite doesn't support LOWER() with LIKE properly, so we'll use case-insensitive search differently
-        if search_query and search_query.strip():
-            search_term = search_query.strip().lower()
-            # Use LIKE with both uppercase and lowercase patterns for case-insensitive search
-            query += ' AND (LOWER(c.name) LIKE ? OR LOWER(c.country) LIKE ? OR c.name LIKE ? OR c.country LIKE ?)'
-            search_pattern = f'%{search_term}%'
-            params.extend([search_pattern, search_pattern, search_pattern, search_pattern])
         # If empty string or None, show all cities
+        if search_query and search_query.strip():
+            search_term = search_query.strip()
+            if len(search_term) >= 3:
+                query += ' AND c.id IN (SELECT rowid FROM cities_fts WHERE cities_fts MATCH ?)'
+                params.append('"{}"'.format(search_term.replace('"', '""')))
+            else:
+                # LIKE wildcards would defeat the prefix index; a 1-2 character
+                # term has no use for them anyway
+                prefix = search_term.replace('%', '').replace('_', '')
+                if prefix:
+                    query += ' AND (c.name LIKE ? OR c.country LIKE ?)'
+                    params.extend([prefix + '%', prefix + '%'])
         
         if country:
             query += ' AND c.country = ?'
             params.append(country)
         
-        query += ' GROUP BY c.id ORDER BY c.popularity DESC, c.name ASC LIMIT 100'
+        query += ' ORDER BY c.popularity DESC, c.name ASC LIMIT 100'
         
         cursor.execute(query, params)
         cities = [dict(row) for row in cursor.fetchall()]
         conn.close()
         return cities
     
+    @staticmethod
+    def get_catalog(ids=None):
+        """Get every city (or only the given ids) for the in-process catalog"""
+        conn = get_db()
+        cursor = conn.cursor()
+        query = 'SELECT * FROM cities'
+        params = []
+        if ids is not None:
+            query += ' WHERE id IN (SELECT value FROM json_each(?))'
+            params.append(json.dumps(list(ids)))
+        cursor.execute(query, params)
+        cities = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        return cities
+    
+    @staticmethod
+    def catalog_version():
+        """Latest city change sequence number (bumped by triggers on cities)"""
+        conn = get_db()
+        cursor = conn.cursor()
+        cursor.execute('SELECT COALESCE(MAX(seq), 0) AS version FROM city_changes')
+        version = cursor.fetchone()['version']
+        conn.close()
+        return version
+    
+    @staticmethod
+    def changed_since(version):
+        """Ids of cities inserted, updated or deleted after a catalog version"""
+        conn = get_db()
+        cursor = conn.cursor()
+        cursor.execute('SELECT city_id FROM city_changes WHERE seq > ?', (version,))
+        ids = [row['city_id'] for row in cursor.fetchall()]
+        conn.close()
+        return ids
+    
     @staticmethod
     def get_by_id(city_id):
         """Get city by ID"""
@@ -50,6 +97,41 @@ class City:
         conn.close()
         return dict(city) if city else None
     
+    @staticmethod
+    def nearby(latitude, longitude, radius_km=None, limit=10, exclude_id=None):
+        """
+        Get cities ranked by great-circle distance from a point
+        Candidates come from the cities_rtree bounding box; without a radius
+        the box grows until it holds the nearest `limit` cities
+        """
+        conn = get_db()
+        cursor = conn.cursor()
+        
+        radius = radius_km or NEARBY_START_RADIUS_KM
+        while True:
+            cursor.execute('''
+                SELECT c.*
+                FROM cities_rtree r
+                JOIN cities c ON c.id = r.id
+                WHERE r.max_lat >= ? AND r.min_lat <= ?
+                  AND r.max_lon >= ? AND r.min_lon <= ?
+                  AND c.id IS NOT ?
+            ''', (*bounding_box(latitude, longitude, radius), exclude_id))
+            ranked = []
+            for row in cursor.fetchall():
+                distance = haversine_km(latitude, longitude, row['latitude'], row['longitude'])
+                if distance <= radius:
+                    ranked.append((distance, row['id'], row))
+            
+            # Every city closer than the ones found lies inside the box
+            if radius_km or len(ranked) >= limit or radius >= MAX_DISTANCE_KM:
+                break
+            radius *= 4
+        
+        conn.close()
+        ranked.sort(key=lambda item: item[:2])
+        return [{**dict(row), 'distance_km': round(distance, 1)} for distance, _, row in ranked[:limit]]
+    
     @staticmethod
     def add_to_trip(trip_id, city_id, visit_order=0):
         """Add city to trip (many-to-many)"""
@@ -2,6 +2,7 @@
 Trip model and data access methods
 """
 from src.config.database import get_db
+from src.utils.pagination import paginate
 
 class Trip:
     @staticmethod
@@ -48,27 +49,35 @@ class Trip:
         return dict(trip) if trip else None
     
     @staticmethod
-    def get_all():
-        """Get all trips"""
+    def get_all(limit=100, after=None):
+        """
+        Get a page of trips, newest first
+        after is the (created_at, id) of the last trip on the previous page
+        Returns (trips, next_cursor)
+        """
         conn = get_db()
         cursor = conn.cursor()
         
-        cursor.execute('''
+        query = '''
             SELECT t.*, 
-                   u.username, u.first_name, u.last_name,
-                   COUNT(DISTINCT isec.id) as section_count,
-                   COUNT(DISTINCT a.id) as activity_count
+                   u.username, u.first_name, u.last_name
             FROM trips t
             JOIN users u ON t.user_id = u.id
-            LEFT JOIN itinerary_sections isec ON t.id = isec.trip_id
-            LEFT JOIN activities a ON isec.id = a.itinerary_section_id
-            GROUP BY t.id
-            ORDER BY t.created_at DESC
-        ''')
+        '''
+        params = []
+        
+        if after:
+            query += ' WHERE (t.created_at, t.id) < (?, ?)'
+            params.extend(after)
+        
+        # Section/activity counts are maintained on trips by triggers
+        query += ' ORDER BY t.created_at DESC, t.id DESC LIMIT ?'
+        params.append(limit + 1)
         
+        cursor.execute(query, params)
         trips = [dict(row) for row in cursor.fetchall()]
         conn.close()
-        return trips
+        return paginate(trips, limit, lambda t: (t['created_at'], t['id']))
     
     @staticmethod
     def get_by_user(user_id):
@@ -77,14 +86,9 @@ class Trip:
         cursor = conn.cursor()
         
         cursor.execute('''
-            SELECT t.*, 
-                   COUNT(DISTINCT isec.id) as section_count,
-                   COUNT(DISTINCT a.id) as activity_count
+            SELECT t.*
             FROM trips t
-            LEFT JOIN itinerary_sections isec ON t.id = isec.trip_id
-            LEFT JOIN activities a ON isec.id = a.itinerary_section_id
             WHERE t.user_id = ?
-            GROUP BY t.id
             ORDER BY t.created_at DESC
         ''', (user_id,))
         
@@ -95,49 +99,20 @@ class Trip:
     @staticmethod
     def get_complete(trip_id):
         """Get complete trip with all related data"""
-        conn = get_db()
-        cursor = conn.cursor()
+        from src.services.trip_graph_service import TripGraphLoader
         
-        # Get trip info
-        trip = Trip.get_by_id(trip_id)
-        if not trip:
-            conn.close()
+        # Get trip info, cities, sections with activities and budget summary
+        graph = TripGraphLoader.load(trip_id)
+        if not graph:
             return None
         
-        # Get cities
-        cursor.execute('''
-            SELECT c.*, tc.visit_order, tc.arrival_date, tc.departure_date
-            FROM cities c
-            JOIN trip_cities tc ON c.id = tc.city_id
-            WHERE tc.trip_id = ?
-            ORDER BY tc.visit_order ASC
-        ''', (trip_id,))
-        trip['cities'] = [dict(row) for row in cursor.fetchall()]
+        trip = graph['trip']
+        trip['cities'] = graph['cities']
+        trip['sections'] = graph['sections']
+        trip['budget'] = graph['budget']
         
-        # Get sections
-        cursor.execute('''
-            SELECT * FROM itinerary_sections
-            WHERE trip_id = ?
-            ORDER BY order_index ASC
-        ''', (trip_id,))
-        sections = [dict(row) for row in cursor.fetchall()]
-        
-        # Get activities for each section
-        for section in sections:
-            cursor.execute('''
-                SELECT a.*, c.name as city_name, c.country
-                FROM activities a
-                LEFT JOIN cities c ON a.city_id = c.id
-                WHERE a.itinerary_section_id = ?
-                ORDER BY a.day_number ASC, a.time_slot ASC
-            ''', (section['id'],))
-            section['activities'] = [dict(row) for row in cursor.fetchall()]
-        
-        trip['sections'] = sections
-        
-        # Get budget summary
-        from src.services.budget_service import BudgetService
-        trip['budget'] = BudgetService.get_budget_summary(trip_id)
+        conn = get_db()
+        cursor = conn.cursor()
         
         # Get expenses by category
         cursor.execute('''
@@ -186,5 +161,36 @@ class Trip:
         conn.commit()
         conn.close()
         return True
+    
+    @staticmethod
+    def repair_counters(trip_id=None):
+        """Recompute denormalized section/activity counters and planned cost"""
+        conn = get_db()
+        cursor = conn.cursor()
+        
+        query = '''
+            UPDATE trips SET
+                section_count = (SELECT COUNT(*) FROM itinerary_sections WHERE trip_id = trips.id),
+                activity_count = (
+                    SELECT COUNT(*) FROM activities a
+                    JOIN itinerary_sections isec ON a.itinerary_section_id = isec.id
+                    WHERE isec.trip_id = trips.id
+                ),
+                planned_cost = (
+                    SELECT COALESCE(SUM(a.cost), 0) FROM activities a
+                    JOIN itinerary_sections isec ON a.itinerary_section_id = isec.id
+                    WHERE isec.trip_id = trips.id
+                )
+        '''
+        params = []
+        if trip_id is not None:
+            query += ' WHERE id = ?'
+            params.append(trip_id)
+        
+        cursor.execute(query, params)
+        conn.commit()
+        updated = cursor.rowcount
+        conn.close()
+        return updated
 
 
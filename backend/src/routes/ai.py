@@ -7,6 +7,9 @@ from src.controllers.ai_controller import AIController
 bp = Blueprint('ai', __name__)
 
 bp.add_url_rule('/trips/<int:trip_id>/ai/optimize', 'optimize_itinerary', AIController.optimize_itinerary, methods=['GET'])
+bp.add_url_rule('/trips/<int:trip_id>/ai/optimize/jobs', 'submit_optimization', AIController.submit_optimization, methods=['POST'])
+bp.add_url_rule('/ai/jobs/<job_id>', 'get_optimization_job', AIController.get_optimization_job, methods=['GET'])
+bp.add_url_rule('/admin/ai/optimize-trips', 'batch_optimize', AIController.batch_optimize, methods=['POST'])
 bp.add_url_rule('/trips/<int:trip_id>/ai/budget-analysis', 'analyze_budget', AIController.analyze_budget, methods=['GET'])
 
 
@@ -0,0 +1,75 @@
+"""
+Columnar view of a trip's activities
+One NumPy array per field (cost, rating, duration, type code, city),
+built in a single pass over the activity dicts, so the scheduler derives
+its per-activity needs, costs and values and the insights generator
+computes totals and type distributions as array operations
+"""
+import re
+from functools import lru_cache
+import numpy as np
+
+DEFAULT_DURATION = 120
+
+_DURATION_PART = re.compile(
+    r'(\d+(?:\.\d+)?)\s*(?:(?:-|–|to)\s*(\d+(?:\.\d+)?))?\s*(hours?|hrs?|h|minutes?|mins?|m)\b'
+)
+
+
+@lru_cache(maxsize=1024)
+def parse_duration(text, default=DEFAULT_DURATION):
+    """
+    Minutes for a free-text duration: '2-3 hours' -> 150, '45 mins' -> 45,
+    '1 hour 30 mins' -> 90, 'Full day' -> 480; default when unparseable
+    """
+    if not text:
+        return default
+    text = str(text).strip().lower()
+    if 'full day' in text or 'whole day' in text:
+        return 8 * 60
+    if 'half day' in text:
+        return 4 * 60
+
+    total = 0.0
+    for low, high, unit in _DURATION_PART.findall(text):
+        value = (float(low) + float(high)) / 2 if high else float(low)
+        total += value * (60 if unit.startswith('h') else 1)
+    return int(round(total)) if total > 0 else default
+
+
+class ActivityColumns:
+    """
+    Activities as parallel arrays, in the order they were given
+
+    cost      float64, as stored (missing -> 0)
+    rating    float64 (missing -> 0)
+    duration  int64 minutes, parsed from the free-text duration
+    type_code int64 index into type_names ('Other' when missing)
+    city      int64 city_id (missing -> -1)
+    """
+
+    def __init__(self, activities):
+        self.size = n = len(activities)
+        self.cost = np.array([a.get('cost') or 0 for a in activities], dtype=np.float64)
+        self.rating = np.array([a.get('rating') or 0 for a in activities], dtype=np.float64)
+        self.duration = np.array([parse_duration(a.get('duration')) for a in activities], dtype=np.int64)
+        self.city = np.array([-1 if a.get('city_id') is None else a['city_id'] for a in activities], dtype=np.int64)
+
+        codes = {}
+        self.type_code = np.fromiter(
+            (codes.setdefault(a.get('activity_type') or 'Other', len(codes)) for a in activities),
+            dtype=np.int64, count=n
+        )
+        self.type_names = list(codes)
+
+    def __len__(self):
+        return self.size
+
+    def total_cost(self, mask=None):
+        return float(self.cost.sum() if mask is None else self.cost[mask].sum())
+
+    def type_counts(self, mask=None):
+        """{type name: count} over all activities or the masked ones, in first-seen type order"""
+        codes = self.type_code if mask is None else self.type_code[mask]
+        counts = np.bincount(codes, minlength=len(self.type_names))
+        return {name: int(count) for name, count in zip(self.type_names, counts.tolist()) if count}
@@ -1,9 +1,14 @@
 """
 AI Services for Itinerary Optimization and Budget Intelligence
 """
+import numpy as np
 from src.config.database import get_db
+from src.services.activity_columns import ActivityColumns
+from src.services.itinerary_scheduler import optimize_schedule
+from src.services.route_planner import RoutePlanner
+from src.services.trip_graph_service import TripGraphLoader
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import List, Dict, Tuple
 import json
 
 class AIService:
@@ -15,47 +20,24 @@ class AIService:
         - Avoids travel fatigue
         - Balances activities + rest
         - Respects budget limits
+        - Orders city visits to cut travel distance
         """
-        conn = get_db()
-        cursor = conn.cursor()
-        
-        # Get trip details
-        cursor.execute('SELECT * FROM trips WHERE id = ?', (trip_id,))
-        trip = cursor.fetchone()
-        if not trip:
-            conn.close()
+        # Load trip, sections, activities and budget in a fixed number of queries
+        graph = TripGraphLoader.load(trip_id)
+        if not graph:
             return {'error': 'Trip not found'}
-        
-        trip_dict = dict(trip)
-        
-        # Get itinerary sections
-        cursor.execute('''
-            SELECT * FROM itinerary_sections
-            WHERE trip_id = ?
-            ORDER BY order_index ASC
-        ''', (trip_id,))
-        sections = [dict(row) for row in cursor.fetchall()]
-        
-        # Get all activities
-        all_activities = []
-        for section in sections:
-            cursor.execute('''
-                SELECT a.*, c.name as city_name, c.cost_index
-                FROM activities a
-                LEFT JOIN cities c ON a.city_id = c.id
-                WHERE a.itinerary_section_id = ?
-                ORDER BY a.day_number ASC, a.time_slot ASC
-            ''', (section['id'],))
-            activities = [dict(row) for row in cursor.fetchall()]
-            all_activities.extend(activities)
-        
-        # Get budget constraints
-        cursor.execute('''
-            SELECT COALESCE(SUM(budget), 0) as total_budget
-            FROM itinerary_sections
-            WHERE trip_id = ?
-        ''', (trip_id,))
-        total_budget = cursor.fetchone()['total_budget']
+        return AIService.optimize_graph(graph)
+    
+    @staticmethod
+    def optimize_graph(graph: Dict) -> Dict:
+        """
+        Optimize a trip graph loaded by TripGraphLoader.load
+        Pure function of the graph (no database access), so it can run in a
+        worker process and its result can be cached by the graph's content
+        """
+        trip_dict = graph['trip']
+        all_activities = graph['activities']
+        total_budget = graph['budget']['budgeted']
         
         # Calculate trip duration
         if trip_dict['start_date'] and trip_dict['end_date']:
@@ -65,95 +47,87 @@ class AIService:
         else:
             days = 7  # Default
         
+        # Route stage: visit order over the trip's cities, then a planned city per day
+        route = AIService._plan_route(graph['cities'], all_activities)
+        route_ids = [stop['id'] for stop in route['stops']]
+        day_cities = RoutePlanner.allocate_days(route_ids, [a.get('city_id') for a in all_activities], days)
+        city_rank = {city_id: rank for rank, city_id in enumerate(route_ids)}
+        
+        # One columnar pass over the activities, shared by the optimizer and the insights
+        columns = ActivityColumns(all_activities)
+        
         # AI Optimization Logic
-        optimized_activities = AIService._optimize_activity_schedule(
-            all_activities, days, total_budget
+        optimized_activities, solver_stats, assignment = AIService._optimize_activity_schedule(
+            all_activities, days, total_budget, day_cities, city_rank, columns
         )
         
         # Generate optimization insights
         insights = AIService._generate_insights(
-            all_activities, optimized_activities, days, total_budget
+            columns, assignment, optimized_activities, days, total_budget
         )
         
-        conn.close()
-        
         return {
             'optimized_schedule': optimized_activities,
             'insights': insights,
             'original_activity_count': len(all_activities),
             'optimized_activity_count': len(optimized_activities),
-            'budget_efficiency': insights.get('budget_savings', 0)
+            'budget_efficiency': insights.get('budget_savings', 0),
+            'solver': solver_stats,
+            'route': route
         }
     
     @staticmethod
-    def _optimize_activity_schedule(activities: List[Dict], days: int, budget: float) -> List[Dict]:
-        """Optimize activity distribution across days"""
-        if not activities:
-            return []
-        
-        # Group activities by type
-        activity_types = {}
+    def _plan_route(cities: List[Dict], activities: List[Dict]) -> Dict:
+        """
+        Order the trip's cities (plus any other cities its activities are in)
+        by nearest-neighbour + 2-opt, starting from the first planned city
+        """
+        stops = [
+            {'id': c['id'], 'name': c['name'], 'latitude': c.get('latitude'), 'longitude': c.get('longitude')}
+            for c in cities
+        ]
+        seen = {stop['id'] for stop in stops}
         for activity in activities:
-            activity_type = activity.get('activity_type', 'Other')
-            if activity_type not in activity_types:
-                activity_types[activity_type] = []
-            activity_types[activity_type].append(activity)
-        
-        # Distribute activities intelligently
-        optimized = []
-        activities_per_day = max(2, min(4, len(activities) // days))  # 2-4 activities per day
-        
-        # Balance activity types across days
-        for day in range(1, days + 1):
-            day_activities = []
-            day_cost = 0
-            day_start_time = 9  # Start at 9 AM
-            
-            # Select mix of activity types per day
-            type_rotation = ['Sightseeing', 'Food', 'Activity', 'Culture', 'Nature']
-            for activity_type in type_rotation:
-                if activity_type in activity_types and activity_types[activity_type]:
-                    activity = activity_types[activity_type].pop(0)
-                    activity_cost = activity.get('cost', 0) or 0
-                    
-                    # Check budget constraint
-                    if day_cost + activity_cost <= (budget / days) * 1.2:  # 20% buffer
-                        activity['optimized_day'] = day
-                        activity['optimized_time'] = f"{day_start_time}:00 AM"
-                        day_start_time += 3  # 3 hours between activities
-                        day_cost += activity_cost
-                        day_activities.append(activity)
-                        
-                        if len(day_activities) >= activities_per_day:
-                            break
-            
-            optimized.extend(day_activities)
-            
-            # Add rest periods
-            if day % 2 == 0:  # Every other day, add a rest slot
-                optimized.append({
-                    'name': 'Rest Period',
-                    'activity_type': 'Rest',
-                    'optimized_day': day,
-                    'optimized_time': '2:00 PM - 4:00 PM',
-                    'cost': 0,
-                    'description': 'Relaxation time to avoid travel fatigue'
+            city_id = activity.get('city_id')
+            if city_id is not None and city_id not in seen:
+                seen.add(city_id)
+                stops.append({
+                    'id': city_id,
+                    'name': activity.get('city_name'),
+                    'latitude': activity.get('city_latitude'),
+                    'longitude': activity.get('city_longitude')
                 })
-        
-        return optimized
+        return RoutePlanner.plan(stops)
+    
+    @staticmethod
+    def _optimize_activity_schedule(activities: List[Dict], days: int, budget: float,
+                                    day_cities: List = None, city_rank: Dict = None,
+                                    columns: ActivityColumns = None) -> Tuple[List[Dict], Dict, List[int]]:
+        """
+        Optimize activity distribution across days with the scheduling engine
+        (day-hour, spending and activities-per-day limits, balanced types,
+        days kept in their planned route city); returns the schedule, solver
+        statistics and each activity's 0-based day (-1 if left out)
+        """
+        if not activities:
+            return [], {}, []
+        return optimize_schedule(activities, days, budget, day_cities=day_cities, city_rank=city_rank,
+                                 columns=columns)
     
     @staticmethod
-    def _generate_insights(original: List[Dict], optimized: List[Dict], days: int, budget: float) -> Dict:
-        """Generate AI insights about optimization"""
-        original_cost = sum(a.get('cost', 0) or 0 for a in original)
-        optimized_cost = sum(a.get('cost', 0) or 0 for a in optimized)
+    def _generate_insights(columns: ActivityColumns, assignment: List[int], optimized: List[Dict],
+                           days: int, budget: float) -> Dict:
+        """Generate AI insights about optimization from the activity columns and the chosen days"""
+        scheduled = np.asarray(assignment, dtype=np.int64) >= 0
+        original_cost = columns.total_cost()
+        optimized_cost = columns.total_cost(scheduled)
         savings = original_cost - optimized_cost
         
-        # Calculate activity distribution
-        activity_distribution = {}
-        for activity in optimized:
-            activity_type = activity.get('activity_type', 'Other')
-            activity_distribution[activity_type] = activity_distribution.get(activity_type, 0) + 1
+        # Calculate activity distribution (everything else in the schedule is a rest period)
+        activity_distribution = columns.type_counts(scheduled)
+        rest_periods = len(optimized) - int(np.count_nonzero(scheduled))
+        if rest_periods:
+            activity_distribution['Rest'] = rest_periods
         
         insights = {
             'optimization_score': min(100, int((savings / max(original_cost, 1)) * 100 + 50)),
@@ -193,50 +167,54 @@ class AIService:
         conn = get_db()
         cursor = conn.cursor()
         
-        # Get trip budget
+        # Every figure in one round trip. Each table is aggregated on its own
+        # before anything is joined, so expenses and activities never
+        # multiply each other's rows; planned cost is the trips.planned_cost
+        # rollup maintained by triggers.
         cursor.execute('''
-            SELECT t.total_budget,
-                   COALESCE(SUM(isec.budget), 0) as section_budget
-            FROM trips t
-            LEFT JOIN itinerary_sections isec ON t.id = isec.trip_id
-            WHERE t.id = ?
-            GROUP BY t.id
-        ''', (trip_id,))
+            WITH section_totals AS (
+                SELECT COALESCE(SUM(budget), 0) AS section_budget
+                FROM itinerary_sections
+                WHERE trip_id = :trip_id
+            ),
+            expense_totals AS (
+                SELECT COALESCE(SUM(amount), 0) AS total_spent
+                FROM expenses
+                WHERE trip_id = :trip_id
+            ),
+            categories AS (
+                SELECT expense_category, SUM(amount) AS total, COUNT(*) AS count
+                FROM expenses
+                WHERE trip_id = :trip_id
+                GROUP BY expense_category
+                ORDER BY expense_category
+            ),
+            expensive AS (
+                SELECT a.name, a.cost
+                FROM activities a
+                JOIN itinerary_sections isec ON a.itinerary_section_id = isec.id
+                WHERE isec.trip_id = :trip_id AND a.cost > 500
+                ORDER BY a.cost DESC, a.id ASC
+                LIMIT 3
+            )
+            SELECT t.total_budget, t.planned_cost, st.section_budget, et.total_spent,
+                   (SELECT json_group_array(json_object(
+                        'expense_category', expense_category, 'total', total, 'count', count
+                    )) FROM categories) AS category_breakdown,
+                   (SELECT json_group_array(json_object('name', name, 'cost', cost))
+                    FROM expensive) AS expensive_activities
+            FROM trips t, section_totals st, expense_totals et
+            WHERE t.id = :trip_id
+        ''', {'trip_id': trip_id})
         result = cursor.fetchone()
+        conn.close()
         
         if not result:
-            conn.close()
             return {'error': 'Trip not found'}
         
         total_budget = result['total_budget'] or result['section_budget'] or 0
-        
-        # Get all expenses and planned costs
-        cursor.execute('''
-            SELECT 
-                COALESCE(SUM(exp.amount), 0) as total_spent,
-                COALESCE(SUM(a.cost), 0) as planned_activity_cost
-            FROM trips t
-            LEFT JOIN expenses exp ON t.id = exp.trip_id
-            LEFT JOIN itinerary_sections isec ON t.id = isec.trip_id
-            LEFT JOIN activities a ON isec.id = a.itinerary_section_id
-            WHERE t.id = ?
-        ''', (trip_id,))
-        
-        costs = cursor.fetchone()
-        total_spent = costs['total_spent'] or 0
-        planned_cost = costs['planned_activity_cost'] or 0
-        
-        # Get all activities with alternatives
-        cursor.execute('''
-            SELECT a.*, c.name as city_name, c.cost_index
-            FROM activities a
-            JOIN itinerary_sections isec ON a.itinerary_section_id = isec.id
-            LEFT JOIN cities c ON a.city_id = c.id
-            WHERE isec.trip_id = ?
-            ORDER BY a.cost DESC
-        ''', (trip_id,))
-        
-        activities = [dict(row) for row in cursor.fetchall()]
+        total_spent = result['total_spent'] or 0
+        planned_cost = result['planned_cost'] or 0
         
         # Predict total cost
         predicted_total = total_spent + planned_cost
@@ -258,10 +236,8 @@ class AIService:
             analysis['budget_status'] = 'over_budget'
             analysis['over_budget_by'] = predicted_total - total_budget
             
-            # Generate suggestions for expensive activities
-            expensive_activities = [a for a in activities if (a.get('cost') or 0) > 500]
-            
-            for activity in expensive_activities[:3]:  # Top 3 expensive
+            # Generate suggestions for the top 3 expensive activities (over 500)
+            for activity in json.loads(result['expensive_activities']):
                 alternative_cost = (activity.get('cost') or 0) * 0.6  # 40% cheaper alternative
                 savings = (activity.get('cost') or 0) - alternative_cost
                 
@@ -286,21 +262,7 @@ class AIService:
             )
         
         # Category-wise breakdown
-        cursor.execute('''
-            SELECT 
-                expense_category,
-                SUM(amount) as total,
-                COUNT(*) as count
-            FROM expenses
-            WHERE trip_id = ?
-            GROUP BY expense_category
-        ''', (trip_id,))
-        
-        analysis['category_breakdown'] = [
-            dict(row) for row in cursor.fetchall()
-        ]
-        
-        conn.close()
+        analysis['category_breakdown'] = json.loads(result['category_breakdown'])
         
         return analysis
 
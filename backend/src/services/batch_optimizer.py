@@ -0,0 +1,170 @@
+"""
+Batch itinerary optimization
+Loads many trips with a few bulk queries, fans the solves out over a
+process pool (one worker per core by default) and yields one result
+record per trip as it finishes, followed by a throughput summary
+"""
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from src.config.database import get_db, pooled_connection
+from src.services.ai_service import AIService
+from src.services.optimization_jobs import MP_CONTEXT
+from src.services.trip_graph_service import TripGraphLoader
+
+WORKERS = int(os.environ.get('BATCH_OPTIMIZER_WORKERS', os.cpu_count() or 1))
+# Trips loaded per bulk query round
+LOAD_CHUNK = 500
+
+
+def _solve(trip_id, graph):
+    """Optimize one trip graph in a worker; returns its result record"""
+    started = time.perf_counter()
+    try:
+        result = AIService.optimize_graph(graph)
+    except Exception as e:
+        return {
+            'trip_id': trip_id,
+            'status': 'failed',
+            'solve_ms': round((time.perf_counter() - started) * 1000, 1),
+            'error': str(e) or type(e).__name__
+        }
+    return {
+        'trip_id': trip_id,
+        'status': 'done',
+        'solve_ms': round((time.perf_counter() - started) * 1000, 1),
+        'result': result
+    }
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class BatchOptimizer:
+    @staticmethod
+    def upcoming_trip_ids(conn=None):
+        """Ids of upcoming trips that have not started yet (or have no dates), soonest first"""
+        own_conn = conn is None
+        if own_conn:
+            conn = get_db()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT id FROM trips
+            WHERE status = 'upcoming' AND (start_date IS NULL OR start_date >= DATE('now'))
+            ORDER BY start_date IS NULL, start_date ASC, id ASC
+        ''')
+        ids = [row['id'] for row in cursor.fetchall()]
+        if own_conn:
+            conn.close()
+        return ids
+
+    @staticmethod
+    def load(trip_ids, conn=None):
+        """
+        Trip graphs in the requested order, loaded LOAD_CHUNK trips per
+        bulk query round; returns (graphs as (trip_id, graph), missing ids)
+        """
+        trip_ids = list(dict.fromkeys(trip_ids))
+        graphs, missing = [], []
+        for start in range(0, len(trip_ids), LOAD_CHUNK):
+            chunk = trip_ids[start:start + LOAD_CHUNK]
+            loaded = TripGraphLoader.load_many(chunk, conn)
+            for trip_id in chunk:
+                if trip_id in loaded:
+                    graphs.append((trip_id, loaded[trip_id]))
+                else:
+                    missing.append(trip_id)
+        return graphs, missing
+
+    @staticmethod
+    def run(graphs, workers=WORKERS, missing=(), load_ms=None):
+        """
+        Optimize preloaded (trip_id, graph) pairs; yields a record per trip
+        in completion order, then {'summary': {...}} with throughput and
+        solve time percentiles. Needs no database, so it can be streamed
+        after the loading request's session has ended.
+        """
+        workers = max(1, min(workers, len(graphs) or 1))
+        started = time.perf_counter()
+        solve_times = []
+        failed = 0
+
+        def record(item):
+            nonlocal failed
+            solve_times.append(item['solve_ms'])
+            failed += item['status'] == 'failed'
+            return item
+
+        for trip_id in missing:
+            yield {'trip_id': trip_id, 'status': 'failed', 'error': 'Trip not found'}
+
+        if workers == 1:
+            for trip_id, graph in graphs:
+                yield record(_solve(trip_id, graph))
+        else:
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(MP_CONTEXT))
+            try:
+                futures = {executor.submit(_solve, trip_id, graph): trip_id for trip_id, graph in graphs}
+                for future in as_completed(futures):
+                    try:
+                        item = future.result()
+                    except BrokenProcessPool:
+                        # A worker died (e.g. killed for memory): every solve
+                        # it had not finished fails, and the summary still follows
+                        failed += 1
+                        yield {'trip_id': futures[future], 'status': 'failed', 'error': 'Optimizer worker died'}
+                        continue
+                    yield record(item)
+            finally:
+                # Also reached when the consumer stops early (e.g. the client
+                # disconnected): drop queued solves instead of waiting for them
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        elapsed = time.perf_counter() - started
+        solve_times.sort()
+        summary = {
+            'trips': len(graphs),
+            'done': len(graphs) - failed,
+            'failed': failed,
+            'missing': len(missing),
+            'workers': workers,
+            'elapsed_s': round(elapsed, 3),
+            'trips_per_sec': round(len(graphs) / elapsed, 2) if elapsed > 0 else None
+        }
+        if load_ms is not None:
+            summary['load_ms'] = load_ms
+        if solve_times:
+            summary['solve_ms'] = {
+                'mean': round(sum(solve_times) / len(solve_times), 1),
+                'p50': _percentile(solve_times, 0.5),
+                'p95': _percentile(solve_times, 0.95),
+                'max': solve_times[-1]
+            }
+        yield {'summary': summary}
+
+    @staticmethod
+    def prepare(trip_ids=None):
+        """
+        Load the trips to optimize (all upcoming trips when trip_ids is
+        None); returns keyword arguments for run(). Reads on a connection
+        of its own, so a POST request does not hold the writer lock for it.
+        """
+        started = time.perf_counter()
+        with pooled_connection() as conn:
+            if trip_ids is None:
+                trip_ids = BatchOptimizer.upcoming_trip_ids(conn)
+            graphs, missing = BatchOptimizer.load(trip_ids, conn)
+        return {
+            'graphs': graphs,
+            'missing': missing,
+            'load_ms': round((time.perf_counter() - started) * 1000, 1)
+        }
+
+
+def to_ndjson(record):
+    """One NDJSON line for a result or summary record"""
+    return json.dumps(record, separators=(',', ':'), default=str) + '\n'
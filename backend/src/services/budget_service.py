@@ -1,37 +1,47 @@
 """
 Budget calculation and analysis service
 """
+import json
 from src.config.database import get_db
 
 class BudgetService:
     @staticmethod
     def get_budget_summary(trip_id):
         """Calculate budget summary for a trip"""
-        conn = get_db()
+        summary = BudgetService.get_budget_summaries([trip_id]).get(trip_id)
+        return summary or {'budgeted': 0, 'spent': 0, 'remaining': 0}
+    
+    @staticmethod
+    def get_budget_summaries(trip_ids, conn=None):
+        """
+        Budget summaries ({trip_id: summary}) for the existing trips among
+        trip_ids in one query; uses conn if given, else get_db()
+        """
+        own_conn = conn is None
+        if own_conn:
+            conn = get_db()
         cursor = conn.cursor()
         
-        # Get budget from sections
-        cursor.execute('''
-            SELECT COALESCE(SUM(budget), 0) as total_budget
-            FROM itinerary_sections
-            WHERE trip_id = ?
-        ''', (trip_id,))
-        section_budget = cursor.fetchone()['total_budget']
-        
-        # Get actual expenses
+        # Budget from sections, actual expenses from expenses
         cursor.execute('''
-            SELECT COALESCE(SUM(amount), 0) as total_spent
-            FROM expenses
-            WHERE trip_id = ?
-        ''', (trip_id,))
-        total_spent = cursor.fetchone()['total_spent']
-        
-        conn.close()
-        return {
-            'budgeted': section_budget,
-            'spent': total_spent,
-            'remaining': section_budget - total_spent
+            SELECT t.id,
+                   (SELECT COALESCE(SUM(budget), 0) FROM itinerary_sections WHERE trip_id = t.id) AS budgeted,
+                   (SELECT COALESCE(SUM(amount), 0) FROM expenses WHERE trip_id = t.id) AS spent
+            FROM trips t
+            WHERE t.id IN (SELECT value FROM json_each(?))
+        ''', (json.dumps(list(trip_ids)),))
+        summaries = {
+            row['id']: {
+                'budgeted': row['budgeted'],
+                'spent': row['spent'],
+                'remaining': row['budgeted'] - row['spent']
+            }
+            for row in cursor.fetchall()
         }
+        
+        if own_conn:
+            conn.close()
+        return summaries
     
     @staticmethod
     def get_detailed_breakdown(trip_id):
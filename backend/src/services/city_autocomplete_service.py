@@ -0,0 +1,89 @@
+"""
+Typo-tolerant city autocomplete
+One fuzzy index over the unified city catalog (database cities plus the
+built-in CITY_DATA and INDIAN_CITIES), rebuilt on a background thread when
+the catalog changes while searches keep using the previous index
+"""
+import os
+import threading
+import time
+from src.services.city_catalog import city_catalog
+from src.services.city_index import FuzzyCityIndex, fold
+
+# Minimum seconds between index rebuilds while the catalog keeps changing
+REBUILD_INTERVAL = float(os.environ.get('CITY_AUTOCOMPLETE_REFRESH', 30))
+MAX_LIMIT = 50
+
+
+class CityAutocomplete:
+    """
+    Lazily built autocomplete index that follows the catalog version
+    Only the first build blocks a request; later rebuilds run on a daemon
+    thread and replace the index in one assignment when they finish
+    """
+
+    def __init__(self, rebuild_interval=REBUILD_INTERVAL):
+        self.rebuild_interval = rebuild_interval
+        self._lock = threading.Lock()
+        self._index = None
+        self._version = None
+        self._built_at = 0.0
+        self._rebuilding = False
+
+    @staticmethod
+    def build_records(snapshot):
+        """Catalog records deduplicated by folded name; built-in cities have no database id"""
+        records = []
+        seen = set()
+        for city in snapshot.records:
+            name = fold(city['name'])
+            if name in seen:
+                continue
+            seen.add(name)
+            records.append(city if city['source'] == 'database' else {**city, 'id': None})
+        return records
+
+    def index(self):
+        """Get the index, starting a background rebuild if the catalog changed"""
+        snapshot = city_catalog.snapshot()
+        index = self._index
+        if index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = FuzzyCityIndex(self.build_records(snapshot))
+                    self._version = snapshot.version
+                    self._built_at = time.monotonic()
+                return self._index
+
+        if snapshot.version != self._version and time.monotonic() - self._built_at >= self.rebuild_interval:
+            with self._lock:
+                if not self._rebuilding:
+                    self._rebuilding = True
+                    threading.Thread(target=self._rebuild, name='city-autocomplete-rebuild', daemon=True).start()
+        return index
+
+    def _rebuild(self):
+        """Build a fresh index off the request path and swap it in"""
+        try:
+            snapshot = city_catalog.snapshot()
+            index = FuzzyCityIndex(self.build_records(snapshot))
+        except Exception as e:
+            index = None
+            print(f"City autocomplete rebuild failed: {e!r}")
+        with self._lock:
+            if index is not None:
+                self._index, self._version = index, snapshot.version
+            # Also after a failure, so a broken catalog is not retried on every request
+            self._built_at = time.monotonic()
+            self._rebuilding = False
+
+    def search(self, query, limit=10):
+        limit = max(1, min(limit, MAX_LIMIT))
+        return [dict(record) for record in self.index().search(query, limit)]
+
+
+_autocomplete = CityAutocomplete()
+
+def autocomplete_cities(query, limit=10):
+    """Get the best matching cities for a partially typed, possibly misspelled name"""
+    return _autocomplete.search(query, limit)
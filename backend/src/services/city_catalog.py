@@ -0,0 +1,196 @@
+"""
+Unified city catalog
+The cities table merged with the built-in CITY_DATA and INDIAN_CITIES
+once, kept current from the city_changes log, and served from
+precomputed views sorted by popularity
+Changed cities are bisected into the sorted views, so a catalog bump costs
+one pass per changed row instead of a re-sort of every city
+"""
+import threading
+from bisect import bisect_left
+from collections import Counter
+from operator import itemgetter
+from src.models.city import City
+from src.services.city_data_service import get_all_cities, has_city_details
+
+# Past this many changed cities a full reload is cheaper than patching
+MAX_INCREMENTAL = 500
+
+
+class CatalogSnapshot:
+    """The merged catalog at one version; records are shared, do not mutate them"""
+
+    def __init__(self, version, records, by_country=None):
+        self.version = version
+        self.records = tuple(records)
+        if by_country is None:
+            grouped = {}
+            for record in self.records:
+                grouped.setdefault(_country(record), []).append(record)
+            by_country = {country: tuple(records) for country, records in grouped.items()}
+        self.by_country = by_country
+
+    def __len__(self):
+        return len(self.records)
+
+    def view(self, country=None, limit=None):
+        """Cities by popularity, optionally only one country's"""
+        records = self.by_country.get(country.lower(), ()) if country else self.records
+        return list(records[:limit])
+
+
+def _country(record):
+    return (record.get('country') or '').lower()
+
+
+class SortedRecords:
+    """Records in catalog order, kept sorted by bisecting a parallel list of keys"""
+
+    def __init__(self, entries=()):
+        self.keys = [key for key, _ in entries]
+        self.records = [record for _, record in entries]
+
+    def __len__(self):
+        return len(self.records)
+
+    def insert(self, key, record):
+        i = bisect_left(self.keys, key)
+        self.keys.insert(i, key)
+        self.records.insert(i, record)
+
+    def remove(self, key):
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            del self.keys[i]
+            del self.records[i]
+
+
+class CityCatalog:
+    """
+    Versioned catalog that reloads only the cities changed since its version
+
+    Catalog order is popularity descending; at equal popularity database
+    cities come first (by name) and then built-in cities in their listed
+    order. A built-in city is hidden while a database city has its name.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._db_cities = {}
+        self._db_names = Counter()
+        self._static = None
+        self._snapshot = None
+        self._all = SortedRecords()
+        self._countries = {}
+        self._country_views = {}
+        self._dirty = set()
+
+    @staticmethod
+    def _db_record(city):
+        return {**city, 'has_details': has_city_details(city['name']), 'source': 'database'}
+
+    @staticmethod
+    def _db_key(city):
+        return (-(city['popularity'] or 0), 0, city['name'], city['id'])
+
+    def _static_records(self):
+        """Built-in cities by folded name, as (sort key, record) pairs"""
+        if self._static is None:
+            self._static = {}
+            for position, city in enumerate(get_all_cities()):
+                record = {**city, 'trip_count': 0, 'source': 'catalog'}
+                key = (-(record['popularity'] or 0), 1, position)
+                self._static.setdefault(city['name'].lower(), []).append((key, record))
+        return self._static
+
+    def _insert(self, key, record):
+        country = _country(record)
+        self._all.insert(key, record)
+        self._countries.setdefault(country, SortedRecords()).insert(key, record)
+        self._dirty.add(country)
+
+    def _remove(self, key, record):
+        country = _country(record)
+        self._all.remove(key)
+        if country in self._countries:
+            self._countries[country].remove(key)
+        self._dirty.add(country)
+
+    def _reload(self, cities):
+        """Rebuild every view from scratch with one sort"""
+        self._db_cities = {c['id']: self._db_record(c) for c in cities}
+        self._db_names = Counter(c['name'].lower() for c in self._db_cities.values())
+        entries = [(self._db_key(c), c) for c in self._db_cities.values()]
+        for name, items in self._static_records().items():
+            if name not in self._db_names:
+                entries.extend(items)
+        entries.sort(key=itemgetter(0))
+
+        grouped = {}
+        for entry in entries:
+            grouped.setdefault(_country(entry[1]), []).append(entry)
+        self._all = SortedRecords(entries)
+        self._countries = {country: SortedRecords(items) for country, items in grouped.items()}
+        self._country_views = {}
+        self._dirty = set(self._countries)
+
+    def _apply(self, city_id, city):
+        """Replace one database city (None removes it), unhiding or hiding built-in namesakes"""
+        static = self._static_records()
+        old = self._db_cities.pop(city_id, None)
+        if old is not None:
+            self._remove(self._db_key(old), old)
+            name = old['name'].lower()
+            self._db_names[name] -= 1
+            if self._db_names[name] <= 0:
+                del self._db_names[name]
+                for key, record in static.get(name, ()):
+                    self._insert(key, record)
+
+        if city is not None:
+            record = self._db_record(city)
+            name = record['name'].lower()
+            if not self._db_names[name]:
+                for key, static_record in static.get(name, ()):
+                    self._remove(key, static_record)
+            self._db_names[name] += 1
+            self._db_cities[city_id] = record
+            self._insert(self._db_key(record), record)
+
+    def _publish(self, version):
+        """Snapshot of the current views, re-freezing only the countries that changed"""
+        for country in self._dirty:
+            records = self._countries.get(country)
+            if records:
+                self._country_views[country] = tuple(records.records)
+            else:
+                self._countries.pop(country, None)
+                self._country_views.pop(country, None)
+        self._dirty = set()
+        return CatalogSnapshot(version, self._all.records, dict(self._country_views))
+
+    def snapshot(self):
+        """Get the current catalog, applying any city changes first"""
+        version = City.catalog_version()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.version == version:
+                return snapshot
+
+            changed = City.changed_since(snapshot.version) if snapshot is not None else None
+            if changed is None or len(changed) > MAX_INCREMENTAL:
+                self._reload(City.get_catalog())
+            else:
+                current = {c['id']: c for c in City.get_catalog(changed)}
+                for city_id in changed:
+                    self._apply(city_id, current.get(city_id))
+
+            self._snapshot = self._publish(version)
+            return self._snapshot
+
+
+city_catalog = CityCatalog()
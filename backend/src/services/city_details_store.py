@@ -0,0 +1,170 @@
+"""
+On-disk store for the detailed city dataset (hotels, shopping, tourist
+places, entertainment)
+data/city_details.json is the editable source; the build step compiles it
+to one compact JSON line per city plus an offset index holding each city's
+summary. The compiled file is memory-mapped and a city is decoded only on
+first access, so workers do not materialize the dataset at import time
+The compiled files are build output (not committed): they are rebuilt when
+missing or when the index was compiled from a different source
+"""
+import hashlib
+import json
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from src.config.database import BACKEND_DIR
+
+DATA_DIR = os.path.join(BACKEND_DIR, 'data')
+SOURCE_PATH = os.path.join(DATA_DIR, 'city_details.json')
+DATA_PATH = os.path.join(DATA_DIR, 'city_details.jsonl')
+INDEX_PATH = os.path.join(DATA_DIR, 'city_details.idx.json')
+INDEX_FORMAT = 2
+# Decoded city records kept in memory (least recently used are dropped)
+CACHE_SIZE = int(os.environ.get('CITY_DETAILS_CACHE_SIZE', 256))
+
+# Fields copied into the index so listings and search never touch the data file
+SUMMARY_FIELDS = ('name', 'country', 'cost_index', 'popularity', 'description', 'latitude', 'longitude')
+
+
+def city_key(city_name):
+    """Dataset key for a city name ('New York' -> 'newyork')"""
+    return city_name.lower().replace(" ", "")
+
+
+def _write_atomic(path, data):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def source_stamp(source_path=SOURCE_PATH, content=None):
+    """Size, mtime and SHA-256 of the source dataset, recorded in the index"""
+    if content is None:
+        with open(source_path, 'rb') as f:
+            content = f.read()
+    return {
+        'size': len(content),
+        'mtime_ns': os.stat(source_path).st_mtime_ns,
+        'sha256': hashlib.sha256(content).hexdigest()
+    }
+
+
+def is_current(index, source_path=SOURCE_PATH):
+    """
+    Whether a loaded index was compiled from the current source; a changed
+    mtime alone (e.g. after a checkout) falls back to comparing the hash
+    """
+    stamp = index.get('source')
+    if index.get('format') != INDEX_FORMAT or not stamp:
+        return False
+    try:
+        stat = os.stat(source_path)
+    except FileNotFoundError:
+        # Only the compiled files were deployed
+        return True
+    if stat.st_size != stamp['size']:
+        return False
+    if stat.st_mtime_ns == stamp['mtime_ns']:
+        return True
+    return source_stamp(source_path)['sha256'] == stamp['sha256']
+
+
+def build(source_path=SOURCE_PATH, data_path=DATA_PATH, index_path=INDEX_PATH):
+    """Compile the source dataset into the data file and its offset index"""
+    with open(source_path, 'rb') as f:
+        content = f.read()
+    cities = json.loads(content)
+
+    lines = []
+    index = {}
+    offset = 0
+    for key, city in cities.items():
+        line = json.dumps(city, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+        index[key] = {
+            'offset': offset,
+            'length': len(line) - 1,
+            'summary': {field: city.get(field) for field in SUMMARY_FIELDS}
+        }
+        lines.append(line)
+        offset += len(line)
+
+    _write_atomic(data_path, b''.join(lines))
+    _write_atomic(index_path, json.dumps(
+        {'format': INDEX_FORMAT, 'source': source_stamp(source_path, content), 'cities': index},
+        ensure_ascii=False, separators=(',', ':')
+    ).encode('utf-8'))
+    return len(index)
+
+
+class CityDetailsStore:
+    """Lazily opened, memory-mapped view of the compiled dataset"""
+
+    def __init__(self, data_path=DATA_PATH, index_path=INDEX_PATH, source_path=SOURCE_PATH, cache_size=CACHE_SIZE):
+        self.data_path = data_path
+        self.index_path = index_path
+        self.source_path = source_path
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._index = None
+        self._mmap = None
+        self._decoded = OrderedDict()
+
+    def _load_index(self):
+        """The compiled index, or None when it is missing or stale"""
+        if not (os.path.exists(self.index_path) and os.path.exists(self.data_path)):
+            return None
+        with open(self.index_path, encoding='utf-8') as f:
+            index = json.load(f)
+        return index if is_current(index, self.source_path) else None
+
+    def _open(self):
+        with self._lock:
+            if self._index is not None:
+                return self._index
+            index = self._load_index()
+            if index is None:
+                build(self.source_path, self.data_path, self.index_path)
+                index = self._load_index()
+                if index is None:
+                    raise ValueError(f'City data index {self.index_path} does not match {self.source_path}')
+
+            with open(self.data_path, 'rb') as f:
+                # mmap cannot map an empty file
+                if os.fstat(f.fileno()).st_size:
+                    self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._index = index['cities']
+            return self._index
+
+    def summaries(self):
+        """(key, summary) for every city, in dataset order"""
+        return [(key, entry['summary']) for key, entry in self._open().items()]
+
+    def has(self, key):
+        return key in self._open()
+
+    def get(self, key):
+        """Full record for a city, decoded on first access (shared; do not mutate)"""
+        with self._lock:
+            city = self._decoded.get(key)
+            if city is not None:
+                self._decoded.move_to_end(key)
+                return city
+        entry = self._open().get(key)
+        if entry is None:
+            return None
+
+        start = entry['offset']
+        city = json.loads(self._mmap[start:start + entry['length']])
+        with self._lock:
+            city = self._decoded.setdefault(key, city)
+            self._decoded.move_to_end(key)
+            while len(self._decoded) > self.cache_size:
+                self._decoded.popitem(last=False)
+            return city
+
+    def stats(self):
+        index = self._open()
+        return {'cities': len(index), 'decoded': len(self._decoded)}
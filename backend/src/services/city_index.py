@@ -0,0 +1,208 @@
+"""
+Compiled in-memory indexes over the city catalog
+Built once at load time; answer substring and typo-tolerant autocomplete
+queries from n-gram inverted indexes instead of scanning every city
+"""
+import math
+import unicodedata
+from collections import Counter
+from types import MappingProxyType
+
+# Grams up to this length are indexed; any query of this length or shorter
+# is answered by a single posting-list lookup
+MAX_GRAM = 3
+
+
+def normalize(text):
+    """Normalize a name for matching"""
+    return ' '.join((text or '').lower().split())
+
+
+def _grams(text, size):
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class CityIndex:
+    """
+    Substring index over catalog records
+
+    records are result dicts in rank order (earlier records sort first);
+    keys(record) returns the strings a query may match against.
+    Records are frozen and shared between all results.
+    """
+
+    def __init__(self, records, keys):
+        self._records = tuple(MappingProxyType(dict(record)) for record in records)
+        self._keys = tuple(tuple({normalize(k) for k in keys(record) if k}) for record in records)
+
+        postings = {}
+        for position, record_keys in enumerate(self._keys):
+            for key in record_keys:
+                for size in range(1, MAX_GRAM + 1):
+                    for gram in _grams(key, size):
+                        postings.setdefault(gram, set()).add(position)
+        # Sorted posting lists, so merged results come out in rank order
+        self._postings = {gram: sorted(positions) for gram, positions in postings.items()}
+
+    def __len__(self):
+        return len(self._records)
+
+    def records(self):
+        """All records in rank order"""
+        return self._records
+
+    def search(self, query, limit=None):
+        """Get records whose keys contain the query, in rank order"""
+        q = normalize(query)
+        if not q:
+            return []
+
+        if len(q) <= MAX_GRAM:
+            positions = self._postings.get(q, [])
+        else:
+            # Walk the rarest trigram's posting list in rank order and verify
+            # containment, stopping as soon as the limit is reached
+            rarest = min((self._postings.get(g, []) for g in _grams(q, MAX_GRAM)), key=len)
+            positions = []
+            for p in rarest:
+                if any(q in key for key in self._keys[p]):
+                    positions.append(p)
+                    if limit is not None and len(positions) >= limit:
+                        break
+
+        if limit is not None:
+            positions = positions[:limit]
+        return [self._records[p] for p in positions]
+
+
+def fold(text):
+    """Normalize a name for fuzzy matching: lowercase, accents stripped"""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return normalize(''.join(ch if ch.isalnum() else ' ' for ch in stripped))
+
+
+def _padded_trigrams(text, closed=True):
+    """Trigrams of '$text$' ('$text' for a prefix still being typed)"""
+    padded = '$' + text + ('$' if closed else '')
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def prefix_edit_distance(query, name, max_distance):
+    """
+    Smallest edit distance between query and any prefix of name
+    (so 'jaipr' matches 'jaipur' at distance 1 while still typing)
+    Only the diagonal band of width max_distance is computed; returns
+    max_distance + 1 once the distance is known to exceed it
+    """
+    if name.startswith(query):
+        return 0
+
+    over = max_distance + 1
+    width = len(name)
+    previous = [min(j, over) for j in range(width + 1)]
+    for i, qc in enumerate(query, 1):
+        current = [min(i, over)] + [over] * width
+        best = current[0]
+        for j in range(max(1, i - max_distance), min(width, i + max_distance) + 1):
+            cost = previous[j - 1] + (qc != name[j - 1])
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            if cost > over:
+                cost = over
+            current[j] = cost
+            if cost < best:
+                best = cost
+        if best > max_distance:
+            return over
+        previous = current
+    return min(previous)
+
+
+class FuzzyCityIndex:
+    """
+    Typo-tolerant autocomplete over catalog records
+
+    Candidates are the records sharing the most padded trigrams with the
+    query; they are re-ranked by prefix edit distance and boosted by
+    popularity. Like most autocompleters the first letter must be right,
+    so posting lists are partitioned by it. Queries of up to three
+    characters allow no typos and are answered from a precomputed top
+    list per prefix.
+    """
+
+    CANDIDATES = 64
+    SHORT_PREFIX = 3
+
+    def __init__(self, records):
+        # Most popular first, so posting lists (and ties between equally
+        # good candidates) come out in popularity order
+        boosted = sorted(((self._popularity_boost(r), i, r) for i, r in enumerate(records)),
+                         key=lambda item: (-item[0], item[1]))
+        self._records = tuple(MappingProxyType(dict(record)) for _, _, record in boosted)
+        self._boost = tuple(boost for boost, _, _ in boosted)
+        self._names = tuple(fold(record['name']) for record in self._records)
+
+        postings = {}
+        short = {}
+        for position, name in enumerate(self._names):
+            for gram in _padded_trigrams(name):
+                postings.setdefault(name[0] + gram, []).append(position)
+            for size in range(1, self.SHORT_PREFIX + 1):
+                if len(name) >= size:
+                    top = short.setdefault(name[:size], [])
+                    if len(top) < self.CANDIDATES:
+                        top.append(position)
+        self._postings = postings
+        self._short = short
+
+    @staticmethod
+    def _popularity_boost(record):
+        popularity = record.get('popularity') or 0
+        trip_count = record.get('trip_count') or 0
+        return popularity / 100 + math.log1p(trip_count) / 10
+
+    @staticmethod
+    def max_typos(query):
+        return 0 if len(query) <= 3 else 1 if len(query) <= 6 else 2
+
+    def __len__(self):
+        return len(self._records)
+
+    def search(self, query, limit=10):
+        """Get the best matching records for a partially typed, possibly misspelled name"""
+        q = fold(query)
+        if not q:
+            return []
+
+        if len(q) <= self.SHORT_PREFIX:
+            return [self._records[p] for p in self._short.get(q, [])[:limit]]
+
+        grams = _padded_trigrams(q, closed=False)
+        counts = Counter()
+        # The anchored '$xy' gram goes first so near ties favour names
+        # with the same start, most popular first
+        for gram in sorted(grams, key=lambda g: g[0] != '$'):
+            posting = self._postings.get(q[0] + gram)
+            if posting:
+                counts.update(posting)
+        if not counts:
+            return []
+
+        # Each edit destroys at most three trigrams
+        max_typos = self.max_typos(q)
+        min_shared = len(grams) - 3 * max_typos
+        ranked = []
+        for position, shared in counts.most_common(self.CANDIDATES):
+            if shared < min_shared:
+                break
+            name = self._names[position][:len(q) + max_typos]
+            distance = prefix_edit_distance(q, name, max_typos)
+            if distance <= max_typos:
+                # Fewer edits first; popularity breaks ties and lifts
+                # well-known cities over obscure exact-prefix matches
+                ranked.append((self._boost[position] - distance, -position))
+        ranked.sort(reverse=True)
+        return [self._records[-neg_position] for _, neg_position in ranked[:limit]]
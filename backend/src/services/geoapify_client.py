@@ -0,0 +1,244 @@
+"""
+Geoapify city autocomplete client
+Upstream calls run on a shared executor over a keep-alive session; callers
+wait at most a deadline, and a circuit breaker stops calling an unhealthy
+upstream for a cooldown
+"""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from src.services.geocode_cache import geocode_cache
+
+# Optional import for Geoapify integration
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    REQUESTS_AVAILABLE = True
+except ImportError:
+    REQUESTS_AVAILABLE = False
+
+AUTOCOMPLETE_URL = os.environ.get('GEOAPIFY_URL', 'https://api.geoapify.com/v1/geocode/autocomplete')
+DEADLINE = int(os.environ.get('GEOAPIFY_DEADLINE_MS', 800)) / 1000
+TIMEOUT = float(os.environ.get('GEOAPIFY_TIMEOUT', 5))
+WORKERS = int(os.environ.get('GEOAPIFY_WORKERS', 4))
+BREAKER_FAILURES = int(os.environ.get('GEOAPIFY_BREAKER_FAILURES', 5))
+BREAKER_COOLDOWN = float(os.environ.get('GEOAPIFY_BREAKER_COOLDOWN', 30))
+
+
+class CircuitBreaker:
+    """
+    Opens after `failures` consecutive failures; after `cooldown` seconds
+    a single trial call is let through (half-open) and closes it on success
+    """
+
+    def __init__(self, failures=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN):
+        self.failures = failures
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._consecutive = 0
+        self._opened_at = None
+        self._trial = False
+        self._opens = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now):
+        if self._opened_at is None:
+            return 'closed'
+        return 'half_open' if now - self._opened_at >= self.cooldown else 'open'
+
+    def allow(self):
+        """Whether a call may go upstream now"""
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._consecutive = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive += 1
+            if self._trial or self._consecutive >= self.failures:
+                if self._opened_at is None or self._trial:
+                    self._opens += 1
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self._state(time.monotonic()),
+                'consecutive_failures': self._consecutive,
+                'opens': self._opens
+            }
+
+
+class GeoapifyClient:
+    """Deadline-bounded, cached Geoapify city search"""
+
+    def __init__(self, url=AUTOCOMPLETE_URL, deadline=DEADLINE, timeout=TIMEOUT, workers=WORKERS, breaker=None,
+                 cache=geocode_cache):
+        self.url = url
+        self.deadline = deadline
+        self.timeout = timeout
+        self.workers = workers
+        self.breaker = breaker or CircuitBreaker()
+        self.cache = cache
+        self._lock = threading.Lock()
+        self._pid = None
+        self._executor = None
+        self._session = None
+        self._latencies = deque(maxlen=1000)
+        self._stats = {'calls': 0, 'failures': 0, 'deadline_exceeded': 0, 'rejected': 0}
+
+    @staticmethod
+    def api_key():
+        return os.environ.get('GEOAPIFY_API_KEY', '')
+
+    def enabled(self):
+        return REQUESTS_AVAILABLE and bool(self.api_key())
+
+    def _resources(self):
+        """Executor and session, created lazily and again after a fork"""
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='geoapify')
+                self._session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+                self._session.mount('https://', adapter)
+                self._session.mount('http://', adapter)
+            return self._executor, self._session
+
+    def _count(self, stat):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def submit(self, query):
+        """
+        Start a search; returns a Future of the upstream cities
+        Cached queries resolve immediately, and an open breaker resolves to []
+        """
+        future = Future()
+        cached = self.cache.get(query)
+        if cached is not None:
+            future.set_result(cached)
+            return future
+        if not self.breaker.allow():
+            self._count('rejected')
+            future.set_result([])
+            return future
+
+        executor, session = self._resources()
+        return executor.submit(self._fetch, session, query)
+
+    def result(self, future, started=None):
+        """
+        Wait for a submitted search until the deadline (measured from
+        `started`, a time.monotonic() value); [] if it is late or failed.
+        A late call keeps running and fills the cache for the next request.
+        """
+        elapsed = time.monotonic() - started if started is not None else 0
+        try:
+            return future.result(timeout=max(0.0, self.deadline - elapsed))
+        except FutureTimeout:
+            self._count('deadline_exceeded')
+        except Exception as e:
+            print(f"Geoapify API error (using local data): {e}")
+        return []
+
+    def search(self, query):
+        """Search and wait up to the deadline"""
+        started = time.monotonic()
+        return self.result(self.submit(query), started)
+
+    def _fetch(self, session, query):
+        self._count('calls')
+        started = time.monotonic()
+        try:
+            response = session.get(self.url, params={
+                'text': query,
+                'type': 'city',
+                'limit': 20,
+                'apiKey': self.api_key()
+            }, timeout=self.timeout)
+            response.raise_for_status()
+            cities = self.parse(response.json())
+        except Exception:
+            self._count('failures')
+            self.breaker.record_failure()
+            self.cache.set_failed(query)
+            raise
+        finally:
+            with self._lock:
+                self._latencies.append(time.monotonic() - started)
+
+        self.breaker.record_success()
+        self.cache.set(query, cities)
+        return cities
+
+    @staticmethod
+    def parse(data):
+        """Turn a Geoapify autocomplete response into city records"""
+        cities = []
+        if 'features' in data:
+            for feature in data['features']:
+                props = feature.get('properties', {})
+                # Geoapify returns 'city' field for cities
+                city_name = props.get('city') or props.get('name', '')
+                country = props.get('country', '')
+                state = props.get('state', '')
+                
+                # Only process if it's actually a city (not a postcode or other result)
+                if city_name and props.get('result_type') in ['city', 'town']:
+                    # Calculate importance score (0-100)
+                    rank = props.get('rank', {})
+                    importance = rank.get('importance', 0.5) if isinstance(rank, dict) else 0.5
+                    popularity = int(importance * 100) if importance else 70
+                    
+                    cities.append({
+                        'id': len(cities) + 1000,  # Use high ID to avoid conflicts
+                        'name': city_name,
+                        'country': country,
+                        'state': state,
+                        'cost_index': 'Medium',  # Default - can be enhanced with cost data
+                        'popularity': popularity,
+                        'description': f"{city_name}" + (f", {state}" if state else "") + f", {country}",
+                        'latitude': props.get('lat'),
+                        'longitude': props.get('lon'),
+                        'formatted': props.get('formatted', f"{city_name}, {country}"),
+                        'has_details': False,
+                        'source': 'geoapify'
+                    })
+        return cities
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            latencies = sorted(self._latencies)
+        if latencies:
+            stats['latency_ms'] = {
+                'p50': round(latencies[len(latencies) // 2] * 1000, 1),
+                'p99': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 1),
+                'max': round(latencies[-1] * 1000, 1)
+            }
+        stats['breaker'] = self.breaker.stats()
+        stats['deadline_ms'] = round(self.deadline * 1000)
+        return stats
+
+
+geoapify = GeoapifyClient()
@@ -0,0 +1,140 @@
+"""
+Two-tier cache for external geocoding results
+An in-process LRU in front of the geocode_cache table, which survives
+restarts; entries expire after a TTL and empty results are cached for a
+shorter time so misses do not hammer the API either. Failed lookups are
+remembered in process only, briefly, so a failing query is not retried on
+every keystroke
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from src.config.database import pooled_connection, write_transaction
+from src.services.city_index import normalize
+
+CACHE_TTL = int(os.environ.get('GEOCODE_CACHE_TTL', 7 * 24 * 3600))
+NEGATIVE_TTL = int(os.environ.get('GEOCODE_CACHE_NEGATIVE_TTL', 3600))
+FAILURE_TTL = int(os.environ.get('GEOCODE_CACHE_FAILURE_TTL', 60))
+MEMORY_SIZE = int(os.environ.get('GEOCODE_CACHE_MEMORY_SIZE', 1024))
+MAX_ROWS = int(os.environ.get('GEOCODE_CACHE_MAX_ROWS', 50000))
+# Expired and overflow rows are pruned once every this many writes
+PRUNE_EVERY = 100
+
+
+class GeocodeCache:
+    """LRU + SQLite cache keyed on the normalized query"""
+
+    def __init__(self, ttl=CACHE_TTL, negative_ttl=NEGATIVE_TTL, failure_ttl=FAILURE_TTL, memory_size=MEMORY_SIZE,
+                 max_rows=MAX_ROWS, prune_every=PRUNE_EVERY, clock=time.time):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.failure_ttl = failure_ttl
+        self.memory_size = memory_size
+        self.max_rows = max_rows
+        self.prune_every = prune_every
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._writes = 0
+        self._stats = {'memory_hits': 0, 'store_hits': 0, 'misses': 0, 'negative_hits': 0}
+
+    @staticmethod
+    def key(query):
+        return normalize(query)
+
+    def _remember(self, key, results, expires_at):
+        with self._lock:
+            self._memory[key] = (results, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def _count(self, stat, results):
+        with self._lock:
+            self._stats[stat] += 1
+            if results == []:
+                self._stats['negative_hits'] += 1
+
+    def get(self, query):
+        """Get cached results for a query, or None on a miss"""
+        key = self.key(query)
+        now = self.clock()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._memory.move_to_end(key)
+                else:
+                    del self._memory[key]
+                    entry = None
+        if entry is not None:
+            self._count('memory_hits', entry[0])
+            return entry[0]
+
+        with pooled_connection() as conn:
+            row = conn.execute(
+                'SELECT results, expires_at FROM geocode_cache WHERE query_key = ? AND expires_at > ?',
+                (key, int(now))
+            ).fetchone()
+        if row is None:
+            with self._lock:
+                self._stats['misses'] += 1
+            return None
+
+        results = json.loads(row['results'])
+        self._remember(key, results, row['expires_at'])
+        self._count('store_hits', results)
+        return results
+
+    def set(self, query, results):
+        """Cache results for a query (empty results get the negative TTL)"""
+        key = self.key(query)
+        now = int(self.clock())
+        expires_at = now + (self.ttl if results else self.negative_ttl)
+        self._remember(key, results, expires_at)
+
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.prune_every == 0
+        # The in-process tier already has the entry; a failed store write
+        # only costs a future API call
+        try:
+            with write_transaction() as conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO geocode_cache (query_key, results, created_at, expires_at)
+                    VALUES (?, ?, ?, ?)
+                ''', (key, json.dumps(results), now, expires_at))
+                if prune:
+                    self._prune(conn, now)
+        except sqlite3.Error as e:
+            print(f"Geocode cache write error: {e}")
+
+    def set_failed(self, query):
+        """Remember a failed lookup as empty for failure_ttl, in this process only"""
+        self._remember(self.key(query), [], self.clock() + self.failure_ttl)
+
+    def _prune(self, conn, now):
+        """Drop expired rows, then the soonest-expiring rows beyond max_rows"""
+        conn.execute('DELETE FROM geocode_cache WHERE expires_at <= ?', (now,))
+        conn.execute('''
+            DELETE FROM geocode_cache WHERE query_key IN (
+                SELECT query_key FROM geocode_cache
+                ORDER BY expires_at DESC
+                LIMIT -1 OFFSET ?
+            )
+        ''', (self.max_rows,))
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_size'] = len(self._memory)
+        lookups = stats['memory_hits'] + stats['store_hits'] + stats['misses']
+        stats['hit_ratio'] = round((stats['memory_hits'] + stats['store_hits']) / lookups, 4) if lookups else None
+        return stats
+
+
+geocode_cache = GeocodeCache()
@@ -0,0 +1,399 @@
+"""
+Itinerary scheduling engine
+Assigns candidate activities to trip days as a multi-day bin-packing
+problem: every day has an hour budget, a spending cap and an activity cap,
+and the objective rewards scheduling (well-rated) activities while
+penalizing repeats of an activity type within a day and activities away
+from the day's planned city on the trip route. A greedy best-fit
+schedule is improved by simulated annealing until the time budget runs
+out; the best schedule found so far is returned
+"""
+import math
+import os
+import random
+import time
+import numpy as np
+from src.services.activity_columns import ActivityColumns
+
+TIME_BUDGET = int(os.environ.get('ITINERARY_TIME_BUDGET_MS', 200)) / 1000
+
+# Day layout, in minutes since midnight
+DAY_START = 9 * 60
+DAY_END = 21 * 60
+REST_MINUTES = 120
+REST_FROM = 14 * 60
+TRAVEL_BUFFER = 30
+
+MAX_PER_DAY = 4
+# A day may spend up to this multiple of budget / days (the trip total still caps spending)
+DAILY_BUDGET_BUFFER = 1.2
+# Cost of the n-th activity of the same type on one day is (n - 1) * penalty
+TYPE_REPEAT_PENALTY = 0.6
+# Cost of an activity on a day planned for a different city of the route
+CITY_MISMATCH_PENALTY = 1.0
+
+# Preferred place in the day by type; unlisted types go in the middle
+TYPE_TIME_ORDER = {
+    'Sightseeing': 0, 'Culture': 1, 'Nature': 2, 'Adventure': 3,
+    'Shopping': 5, 'Food': 6, 'Nightlife': 9
+}
+
+def format_time(minutes):
+    """'9:00 AM' style clock time for minutes since midnight"""
+    hours, minutes = divmod(int(minutes), 60)
+    suffix = 'AM' if hours % 24 < 12 else 'PM'
+    return f"{(hours % 12) or 12}:{minutes:02d} {suffix}"
+
+
+class _IndexSet:
+    """Set of ints with O(1) add, remove and random choice"""
+
+    def __init__(self):
+        self.items = []
+        self._positions = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, item):
+        self._positions[item] = len(self.items)
+        self.items.append(item)
+
+    def remove(self, item):
+        position = self._positions.pop(item)
+        last = self.items.pop()
+        if last != item:
+            self.items[position] = last
+            self._positions[last] = position
+
+    def choice(self, rng):
+        return self.items[rng.randrange(len(self.items))]
+
+
+class ItineraryScheduler:
+    """Schedules one trip's activities; see optimize_schedule()"""
+
+    def __init__(self, activities, days, budget, seed=0, day_cities=None, city_rank=None, columns=None):
+        self.activities = activities
+        self.days = max(1, int(days))
+        # Planned city id per day (None: any city) and each city's place on the route
+        day_cities = list(day_cities or [])[:self.days]
+        self.day_cities = day_cities + [None] * (self.days - len(day_cities))
+        self.city_rank = city_rank or {}
+        # No (or a zero) budget means spending is unconstrained
+        self.budget = budget if budget and budget > 0 else None
+        self.day_cost_cap = self.budget / self.days * DAILY_BUDGET_BUFFER if self.budget else math.inf
+        self.rng = random.Random(seed)
+
+        # The per-activity fields and the greedy order are derived on the
+        # arrays; moves index plain lists, which is faster per element
+        self.columns = columns if columns is not None else ActivityColumns(activities)
+        self._needs = self.columns.duration + TRAVEL_BUFFER
+        self._costs = np.maximum(self.columns.cost, 0.0)
+        self._values = 1.0 + np.clip(self.columns.rating, 0.0, 5.0) / 5
+        self.durations = self.columns.duration.tolist()
+        self.needs = self._needs.tolist()
+        self.costs = self._costs.tolist()
+        self.values = self._values.tolist()
+        self.types = self.columns.type_code.tolist()
+        self.type_names = self.columns.type_names
+        self.cities = self.columns.city.tolist()
+        self.capacity = [
+            DAY_END - DAY_START - (REST_MINUTES if self.is_rest_day(day) else 0)
+            for day in range(self.days)
+        ]
+        self._reset([-1] * len(activities))
+
+    @staticmethod
+    def is_rest_day(day):
+        """Every second day (0-based index) gets a rest period against travel fatigue"""
+        return day % 2 == 1
+
+    # ----- state -----
+
+    def _reset(self, assignment):
+        self.assignment = [-1] * len(assignment)
+        self.minutes = [0] * self.days
+        self.spent = [0.0] * self.days
+        self.type_counts = [[0] * len(self.type_names) for _ in range(self.days)]
+        self.members = [_IndexSet() for _ in range(self.days)]
+        self.scheduled = _IndexSet()
+        self.unscheduled = _IndexSet()
+        self.total_cost = 0.0
+        self.score = 0.0
+        for i in range(len(assignment)):
+            self.unscheduled.add(i)
+        for i, day in enumerate(assignment):
+            if day >= 0:
+                self._add(i, day)
+
+    def _add(self, i, day):
+        self.score += self.add_delta(i, day)
+        self.type_counts[day][self.types[i]] += 1
+        self.minutes[day] += self.needs[i]
+        self.spent[day] += self.costs[i]
+        self.total_cost += self.costs[i]
+        self.members[day].add(i)
+        self.unscheduled.remove(i)
+        self.scheduled.add(i)
+        self.assignment[i] = day
+
+    def _remove(self, i):
+        day = self.assignment[i]
+        self.score += self.remove_delta(i)
+        self.type_counts[day][self.types[i]] -= 1
+        self.minutes[day] -= self.needs[i]
+        self.spent[day] -= self.costs[i]
+        self.total_cost -= self.costs[i]
+        self.members[day].remove(i)
+        self.scheduled.remove(i)
+        self.unscheduled.add(i)
+        self.assignment[i] = -1
+        return day
+
+    def away(self, i, day):
+        """Penalty for activity i on a day planned for another city"""
+        planned = self.day_cities[day]
+        if planned is None or self.cities[i] < 0 or self.cities[i] == planned:
+            return 0.0
+        return CITY_MISMATCH_PENALTY
+
+    def add_delta(self, i, day):
+        return self.values[i] - TYPE_REPEAT_PENALTY * self.type_counts[day][self.types[i]] - self.away(i, day)
+
+    def remove_delta(self, i):
+        day = self.assignment[i]
+        return -self.values[i] + TYPE_REPEAT_PENALTY * (self.type_counts[day][self.types[i]] - 1) + self.away(i, day)
+
+    def fits(self, i, day, leaving=None, swapping=False):
+        """
+        Whether activity i fits on a day, optionally in place of `leaving`
+        (which leaves the trip, or with swapping=True trades days with i)
+        """
+        count, minutes, spent, total = len(self.members[day]), self.minutes[day], self.spent[day], self.total_cost
+        if leaving is not None:
+            count -= 1
+            minutes -= self.needs[leaving]
+            spent -= self.costs[leaving]
+            total -= self.costs[i] if swapping else self.costs[leaving]
+        return (
+            count < MAX_PER_DAY
+            and minutes + self.needs[i] <= self.capacity[day]
+            and spent + self.costs[i] <= self.day_cost_cap
+            and (self.budget is None or total + self.costs[i] <= self.budget)
+        )
+
+    def evaluate(self, assignment):
+        """Objective of an assignment (activity index -> 0-based day or -1), None if infeasible"""
+        saved = self.assignment[:]
+        try:
+            self._reset([-1] * len(assignment))
+            for i, day in enumerate(assignment):
+                if day >= 0:
+                    if not self.fits(i, day):
+                        return None
+                    self._add(i, day)
+            return self.score
+        finally:
+            self._reset(saved)
+
+    # ----- search -----
+
+    def _greedy(self, deadline=None):
+        """
+        Best-fit: most valuable per hour first, each onto the day it helps
+        most; stops early at the deadline (the partial schedule is feasible).
+        Returns whether every activity was considered.
+        """
+        n = len(self.activities)
+        order = np.lexsort((np.arange(n), self._costs, -self._values / self._needs)).tolist()
+        open_days = list(range(self.days))
+        max_free = max(self.capacity)
+        for count, i in enumerate(order):
+            if not open_days:
+                break
+            if deadline is not None and count % 64 == 0 and time.perf_counter() >= deadline:
+                return False
+            # Cheap rejections before trying every open day
+            if self.needs[i] > max_free or (self.budget is not None and self.total_cost + self.costs[i] > self.budget):
+                continue
+            best_day, best_key = None, None
+            for day in open_days:
+                if self.fits(i, day):
+                    key = (self.add_delta(i, day), -self.minutes[day], -day)
+                    if best_key is None or key > best_key:
+                        best_day, best_key = day, key
+            if best_day is not None:
+                self._add(i, best_day)
+                if len(self.members[best_day]) >= MAX_PER_DAY:
+                    open_days.remove(best_day)
+                max_free = max((self.capacity[day] - self.minutes[day] for day in open_days), default=0)
+        return True
+
+    def _try_move(self, temperature):
+        """Propose one random move; apply it if the annealing rule accepts it"""
+        rng = self.rng
+        move = rng.random()
+
+        if move < 0.4 and self.unscheduled:
+            # Insert an unscheduled activity, evicting one from the day if needed
+            i = self.unscheduled.choice(rng)
+            day = rng.randrange(self.days)
+            if self.fits(i, day):
+                delta = self.add_delta(i, day)
+                if self._accept(delta, temperature):
+                    self._add(i, day)
+                return
+            if not self.members[day]:
+                return
+            j = self.members[day].choice(rng)
+            if not self.fits(i, day, leaving=j):
+                return
+            delta = self.remove_delta(j)
+            same = self.types[i] == self.types[j]
+            delta += self.values[i] - TYPE_REPEAT_PENALTY * (
+                self.type_counts[day][self.types[i]] - (1 if same else 0)
+            ) - self.away(i, day)
+            if self._accept(delta, temperature):
+                self._remove(j)
+                self._add(i, day)
+            return
+
+        if not self.scheduled:
+            return
+        i = self.scheduled.choice(rng)
+        day = self.assignment[i]
+
+        if move < 0.75:
+            # Move an activity to another day
+            target = rng.randrange(self.days)
+            if target == day or not self.fits(i, target):
+                return
+            delta = self.remove_delta(i) + self.add_delta(i, target)
+            if self._accept(delta, temperature):
+                self._remove(i)
+                self._add(i, target)
+        elif move < 0.95:
+            # Swap two activities on different days
+            j = self.scheduled.choice(rng)
+            other = self.assignment[j]
+            if other == day or self.types[i] == self.types[j]:
+                return
+            if not (self.fits(j, day, leaving=i, swapping=True) and self.fits(i, other, leaving=j, swapping=True)):
+                return
+            counts_day, counts_other = self.type_counts[day], self.type_counts[other]
+            delta = TYPE_REPEAT_PENALTY * (
+                (counts_day[self.types[i]] - 1) - counts_day[self.types[j]]
+                + (counts_other[self.types[j]] - 1) - counts_other[self.types[i]]
+            ) + self.away(i, day) + self.away(j, other) - self.away(j, day) - self.away(i, other)
+            if self._accept(delta, temperature):
+                self._remove(i)
+                self._remove(j)
+                self._add(j, day)
+                self._add(i, other)
+        else:
+            # Drop an activity (only taken while the temperature is high)
+            if self._accept(self.remove_delta(i), temperature):
+                self._remove(i)
+
+    def _accept(self, delta, temperature):
+        return delta >= 0 or self.rng.random() < math.exp(delta / temperature)
+
+    def solve(self, time_budget=TIME_BUDGET, max_iterations=None, start_temperature=0.5, end_temperature=0.01):
+        """Run greedy + annealing; returns (best assignment, stats)"""
+        started = time.perf_counter()
+        deadline = started + time_budget
+        greedy_complete = self._greedy(deadline)
+        greedy_score = self.score
+        best_score, best = self.score, self.assignment[:]
+
+        if max_iterations is None:
+            max_iterations = 200 * len(self.activities) + 2000
+        iterations = 0
+        temperature = start_temperature
+        while iterations < max_iterations and self.activities:
+            if iterations % 256 == 0:
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                # Cool geometrically over whichever budget runs out first
+                progress = max((now - started) / time_budget if time_budget > 0 else 1.0,
+                               iterations / max_iterations)
+                temperature = start_temperature * (end_temperature / start_temperature) ** min(progress, 1.0)
+            self._try_move(temperature)
+            iterations += 1
+            if self.score > best_score + 1e-9:
+                best_score, best = self.score, self.assignment[:]
+
+        return best, {
+            'objective': round(best_score, 4),
+            'greedy_objective': round(greedy_score, 4),
+            'greedy_complete': greedy_complete,
+            'scheduled': int(np.count_nonzero(np.asarray(best) >= 0)),
+            'unscheduled': int(np.count_nonzero(np.asarray(best) < 0)),
+            'iterations': iterations,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+            'time_budget_ms': round(time_budget * 1000)
+        }
+
+    # ----- output -----
+
+    def build_schedule(self, assignment):
+        """Day-by-day schedule with clock times and rest periods, following the route within a day"""
+        by_day = [[] for _ in range(self.days)]
+        for i, day in enumerate(assignment):
+            if day >= 0:
+                by_day[day].append(i)
+
+        schedule = []
+        for day, members in enumerate(by_day):
+            members.sort(key=lambda i: (
+                self.city_rank.get(self.cities[i], len(self.city_rank)),
+                TYPE_TIME_ORDER.get(self.type_names[self.types[i]], 4), -self.values[i], i
+            ))
+            clock = DAY_START
+            rest_pending = self.is_rest_day(day)
+            for i in members:
+                # The rest period goes in at the first break from 2 PM on
+                if rest_pending and clock >= REST_FROM:
+                    schedule.append(self._rest_period(day, clock))
+                    clock += REST_MINUTES
+                    rest_pending = False
+                schedule.append({
+                    **self.activities[i],
+                    'optimized_day': day + 1,
+                    'optimized_time': format_time(clock),
+                    'optimized_duration_minutes': self.durations[i]
+                })
+                clock += self.needs[i]
+            if rest_pending:
+                schedule.append(self._rest_period(day, max(clock, REST_FROM)))
+        return schedule
+
+    @staticmethod
+    def _rest_period(day, start):
+        return {
+            'name': 'Rest Period',
+            'activity_type': 'Rest',
+            'optimized_day': day + 1,
+            'optimized_time': f"{format_time(start)} - {format_time(start + REST_MINUTES)}",
+            'cost': 0,
+            'description': 'Relaxation time to avoid travel fatigue'
+        }
+
+
+def optimize_schedule(activities, days, budget, time_budget=TIME_BUDGET, seed=0, day_cities=None, city_rank=None,
+                      columns=None):
+    """
+    Schedule activities over `days` days within `budget`, optionally keeping
+    each day in its planned city (day_cities) and ordering a day's visits
+    by the cities' route positions (city_rank); columns is the activities'
+    ActivityColumns if the caller already has it
+    Returns (schedule, stats, assignment); the schedule holds copies of the
+    scheduled activities with optimized_day/optimized_time, plus rest
+    periods, and assignment maps each activity index to its 0-based day or -1
+    """
+    scheduler = ItineraryScheduler(activities, days, budget, seed=seed,
+                                   day_cities=day_cities, city_rank=city_rank, columns=columns)
+    assignment, stats = scheduler.solve(time_budget)
+    return scheduler.build_schedule(assignment), stats, assignment
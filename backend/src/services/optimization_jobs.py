@@ -0,0 +1,350 @@
+"""
+Background itinerary optimization jobs
+Solves run in a bounded process pool so CPU-heavy optimizations never
+occupy a web worker; results are memoized under a content hash of the trip
+graph, so an unchanged trip is answered without solving it again
+Jobs and results live in SQLite (optimization_jobs/optimization_results),
+so any web worker can answer a poll for a job another worker started
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from src.config.database import pooled_connection, write_transaction
+from src.services.ai_service import AIService
+from src.services.trip_graph_service import TripGraphLoader
+
+WORKERS = int(os.environ.get('OPTIMIZER_WORKERS', min(4, os.cpu_count() or 1)))
+MAX_PENDING = int(os.environ.get('OPTIMIZER_MAX_PENDING', 64))
+CACHE_SIZE = int(os.environ.get('OPTIMIZER_CACHE_SIZE', 256))
+# Finished jobs can be polled for this long (seconds)
+JOB_TTL = int(os.environ.get('OPTIMIZER_JOB_TTL', 600))
+# Unfinished jobs older than this (seconds) are failed: their worker is gone
+JOB_TIMEOUT = int(os.environ.get('OPTIMIZER_JOB_TIMEOUT', 300))
+# Longest a single poll may wait for a job to finish (seconds)
+MAX_WAIT = 30
+# How often a long poll re-reads a job another worker is solving (seconds)
+POLL_INTERVAL = 0.1
+# How often a worker sweeps expired and timed-out jobs (seconds)
+EXPIRE_INTERVAL = 60
+# A cache hit refreshes its LRU timestamp at most this often (seconds)
+TOUCH_INTERVAL = 60
+
+FINISHED = ('done', 'failed')
+# Worker processes start from a clean interpreter instead of forking a
+# threaded web worker
+MP_CONTEXT = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+class QueueFull(Exception):
+    """Raised when too many optimizations are already waiting for a worker"""
+
+
+def itinerary_fingerprint(graph):
+    """
+    Content hash of everything AIService.optimize_graph reads: trip dates,
+    budget, cities, sections and activities (with their costs)
+    """
+    trip = graph['trip']
+    content = {
+        'dates': [trip.get('start_date'), trip.get('end_date')],
+        'budget': graph['budget']['budgeted'],
+        'cities': [
+            [c['id'], c.get('name'), c.get('latitude'), c.get('longitude'), c.get('visit_order')]
+            for c in graph['cities']
+        ],
+        'sections': [[s['id'], s.get('order_index')] for s in graph['sections']],
+        'activities': graph['activities']
+    }
+    encoded = json.dumps(content, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def _solve(job_id, graph):
+    """Worker process entry point: mark the job running, then optimize"""
+    try:
+        with write_transaction() as conn:
+            conn.execute(
+                "UPDATE optimization_jobs SET status = 'running' WHERE job_id = ? AND status = 'queued'",
+                (job_id,)
+            )
+    except sqlite3.Error as e:
+        # Only the reported status is affected; the solve still runs
+        print(f"Optimization job status write error: {e}")
+    return AIService.optimize_graph(graph)
+
+
+class OptimizationJobs:
+    """
+    Job queue over a process pool with a result cache
+
+    Identical submissions share one in-flight job, across all workers. A
+    trip keeps at most one cached result: when its fingerprint changes
+    (activities, sections or budget were edited) the old result is dropped.
+    """
+
+    def __init__(self, workers=WORKERS, max_pending=MAX_PENDING, cache_size=CACHE_SIZE, job_ttl=JOB_TTL,
+                 job_timeout=JOB_TIMEOUT):
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.cache_size = cache_size
+        self.job_ttl = job_ttl
+        self.job_timeout = job_timeout
+        self._lock = threading.RLock()
+        self._changed = threading.Condition(self._lock)
+        self._pid = None
+        self._executor = None
+        self._expired_at = 0.0
+        self._stats = {'hits': 0, 'misses': 0, 'invalidations': 0, 'solved': 0, 'failed': 0, 'rejected': 0}
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context(MP_CONTEXT))
+
+    def _pool(self):
+        """Process pool, created lazily and again after a fork"""
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._executor = self._new_pool()
+        return self._executor
+
+    def submit(self, trip_id):
+        """
+        Start optimizing a trip; returns the job (see get()), or None if the
+        trip does not exist. A cached result comes back finished, with no
+        job to poll (job_id is None).
+        Raises QueueFull when max_pending jobs are already waiting.
+        """
+        # Read on a connection of its own: this runs in POST requests, and a
+        # cache hit should not touch the writer gate at all
+        with pooled_connection() as conn:
+            graph = TripGraphLoader.load(trip_id, conn)
+            if not graph:
+                return None
+            fingerprint = itinerary_fingerprint(graph)
+            cached = conn.execute(
+                'SELECT * FROM optimization_results WHERE fingerprint = ?', (fingerprint,)
+            ).fetchone()
+        now = time.time()
+        if cached is not None:
+            with self._lock:
+                self._stats['hits'] += 1
+            if now - cached['used_at'] >= TOUCH_INTERVAL:
+                self._touch(fingerprint, now)
+            return self._cached_view(cached, now)
+
+        job = {
+            'job_id': uuid.uuid4().hex,
+            'trip_id': trip_id,
+            'fingerprint': fingerprint,
+            'status': 'queued',
+            'cached': 0,
+            'result': None,
+            'error': None,
+            'submitted_at': now,
+            'finished_at': None
+        }
+        with write_transaction() as conn:
+            self._expire_due(conn, now)
+            # A new fingerprint means the trip was edited since its result was cached
+            invalidated = conn.execute(
+                'DELETE FROM optimization_results WHERE trip_id = ? AND fingerprint != ?', (trip_id, fingerprint)
+            ).rowcount
+            # Another worker may have stored the result since the read above
+            cached = conn.execute(
+                'SELECT * FROM optimization_results WHERE fingerprint = ?', (fingerprint,)
+            ).fetchone()
+            inflight = None
+            if cached is None:
+                inflight = conn.execute('''
+                    SELECT * FROM optimization_jobs
+                    WHERE fingerprint = ? AND status IN ('queued', 'running')
+                    ORDER BY submitted_at LIMIT 1
+                ''', (fingerprint,)).fetchone()
+            if cached is None and inflight is None:
+                pending = conn.execute(
+                    "SELECT COUNT(*) FROM optimization_jobs WHERE status IN ('queued', 'running')"
+                ).fetchone()[0]
+                if pending >= self.max_pending:
+                    with self._lock:
+                        self._stats['rejected'] += 1
+                    raise QueueFull(f'{pending} optimizations already pending')
+                conn.execute('''
+                    INSERT INTO optimization_jobs
+                        (job_id, trip_id, fingerprint, status, cached, result, submitted_at, finished_at)
+                    VALUES (:job_id, :trip_id, :fingerprint, :status, :cached, :result, :submitted_at, :finished_at)
+                ''', job)
+
+        with self._lock:
+            if invalidated:
+                self._stats['invalidations'] += 1
+            if cached is not None:
+                self._stats['hits'] += 1
+            elif inflight is None:
+                self._stats['misses'] += 1
+        if cached is not None:
+            return self._cached_view(cached, now)
+        if inflight is not None:
+            return self._view(inflight)
+
+        with self._lock:
+            executor = self._pool()
+            try:
+                future = executor.submit(_solve, job['job_id'], graph)
+            except BrokenProcessPool:
+                # A worker died (e.g. killed for memory); start a fresh pool
+                self._executor = executor = self._new_pool()
+                future = executor.submit(_solve, job['job_id'], graph)
+        # The callback runs right away if the solve already finished
+        future.add_done_callback(lambda future, job=job: self._finish(job, future))
+        return self._view(job)
+
+    def get(self, job_id, wait=0):
+        """
+        Job status: job_id, trip_id, status (queued/running/done/failed),
+        cached, timings, and the result or error once finished; None for an
+        unknown or expired job. wait > 0 long-polls up to that many seconds
+        (at most MAX_WAIT) for the job to finish.
+        """
+        deadline = time.monotonic() + min(max(wait, 0), MAX_WAIT)
+        while True:
+            with pooled_connection() as conn:
+                job = conn.execute('SELECT * FROM optimization_jobs WHERE job_id = ?', (job_id,)).fetchone()
+            if job is None or job['status'] in FINISHED:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            # Woken early when a job solved in this process finishes
+            with self._changed:
+                self._changed.wait(min(remaining, POLL_INTERVAL))
+        return self._view(job) if job is not None else None
+
+    def _finish(self, job, future):
+        finished_at = time.time()
+        try:
+            result = future.result()
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            print(f"Itinerary optimization failed for trip {job['trip_id']}: {e!r}")
+            update = ("UPDATE optimization_jobs SET status = 'failed', error = ?, finished_at = ? WHERE job_id = ?",
+                      (error, finished_at, job['job_id']))
+            stat, result = 'failed', None
+        else:
+            result = json.dumps(result, separators=(',', ':'), default=str)
+            update = ("UPDATE optimization_jobs SET status = 'done', result = ?, finished_at = ? WHERE job_id = ?",
+                      (result, finished_at, job['job_id']))
+            stat = 'solved'
+
+        try:
+            with write_transaction() as conn:
+                conn.execute(*update)
+                if result is not None:
+                    self._store(conn, job, result, finished_at)
+        except sqlite3.Error as e:
+            print(f"Optimization job result write error: {e}")
+        with self._lock:
+            self._stats[stat] += 1
+            self._changed.notify_all()
+
+    def _store(self, conn, job, result, now):
+        """Cache a result unless the trip was edited while it was being solved"""
+        latest = conn.execute('''
+            SELECT fingerprint FROM optimization_jobs
+            WHERE trip_id = ? ORDER BY submitted_at DESC LIMIT 1
+        ''', (job['trip_id'],)).fetchone()
+        if latest is None or latest['fingerprint'] != job['fingerprint']:
+            return
+        conn.execute('''
+            INSERT OR REPLACE INTO optimization_results (fingerprint, trip_id, result, used_at)
+            VALUES (?, ?, ?, ?)
+        ''', (job['fingerprint'], job['trip_id'], result, now))
+        conn.execute('''
+            DELETE FROM optimization_results WHERE fingerprint IN (
+                SELECT fingerprint FROM optimization_results
+                ORDER BY used_at DESC
+                LIMIT -1 OFFSET ?
+            )
+        ''', (self.cache_size,))
+
+    def _touch(self, fingerprint, now):
+        """Refresh a cached result's LRU timestamp; losing the update only ages it"""
+        try:
+            with write_transaction() as conn:
+                conn.execute('UPDATE optimization_results SET used_at = ? WHERE fingerprint = ?', (now, fingerprint))
+        except sqlite3.Error as e:
+            print(f"Optimization result touch error: {e}")
+
+    def _expire_due(self, conn, now):
+        """Run _expire() at most once every EXPIRE_INTERVAL seconds per worker"""
+        with self._lock:
+            if now - self._expired_at < EXPIRE_INTERVAL:
+                return
+            self._expired_at = now
+        self._expire(conn, now)
+
+    def _expire(self, conn, now):
+        """Forget finished jobs older than job_ttl and fail jobs whose worker went away"""
+        conn.execute('DELETE FROM optimization_jobs WHERE finished_at < ?', (now - self.job_ttl,))
+        conn.execute('''
+            UPDATE optimization_jobs SET status = 'failed', error = 'Optimization timed out', finished_at = ?
+            WHERE status IN ('queued', 'running') AND submitted_at < ?
+        ''', (now, now - self.job_timeout))
+
+    @staticmethod
+    def _cached_view(cached, now):
+        """A cache hit as a finished job; there is no job row to poll"""
+        return OptimizationJobs._view({
+            'job_id': None,
+            'trip_id': cached['trip_id'],
+            'status': 'done',
+            'cached': 1,
+            'fingerprint': cached['fingerprint'],
+            'result': cached['result'],
+            'error': None,
+            'submitted_at': now,
+            'finished_at': now
+        })
+
+    @staticmethod
+    def _view(job):
+        status = job['status']
+        view = {
+            'job_id': job['job_id'],
+            'trip_id': job['trip_id'],
+            'status': status,
+            'cached': bool(job['cached']),
+            'fingerprint': job['fingerprint'],
+            'submitted_at': job['submitted_at'],
+            'finished_at': job['finished_at']
+        }
+        if job['finished_at'] is not None:
+            view['elapsed_ms'] = round((job['finished_at'] - job['submitted_at']) * 1000, 1)
+        if status == 'done':
+            view['result'] = json.loads(job['result'])
+        elif status == 'failed':
+            view['error'] = job['error']
+        return view
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        with pooled_connection() as conn:
+            row = conn.execute('''
+                SELECT
+                    (SELECT COUNT(*) FROM optimization_jobs WHERE status IN ('queued', 'running')) AS pending,
+                    (SELECT COUNT(*) FROM optimization_jobs) AS jobs,
+                    (SELECT COUNT(*) FROM optimization_results) AS cached_results
+            ''').fetchone()
+        stats.update(workers=self.workers, **dict(row))
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 3) if lookups else None
+        return stats
+
+
+optimization_jobs = OptimizationJobs()
@@ -0,0 +1,154 @@
+"""
+Geographic route planning for multi-city trips
+Orders a trip's stops with nearest-neighbour + 2-opt over a cached
+haversine distance matrix, and spreads trip days over the route
+"""
+import math
+import os
+import time
+from functools import lru_cache
+from src.utils.geo import EARTH_RADIUS_KM, haversine_km
+
+ROUTE_TIME_LIMIT = int(os.environ.get('ROUTE_TIME_LIMIT_MS', 100)) / 1000
+# Matrices grow with the square of the stop count; larger routes are not
+# cached, so the cache holds at most 256 * this² distances
+MATRIX_CACHE_MAX_STOPS = int(os.environ.get('ROUTE_MATRIX_CACHE_MAX_STOPS', 50))
+
+
+def distance_matrix(points):
+    """Haversine distances (km) between every pair of (lat, lon) points"""
+    # haversine_km inlined with each point's radians and cosine computed once
+    n = len(points)
+    phis = [math.radians(lat) for lat, _ in points]
+    lambdas = [math.radians(lon) for _, lon in points]
+    cosines = [math.cos(phi) for phi in phis]
+    sin, sqrt, asin = math.sin, math.sqrt, math.asin
+    diameter = 2 * EARTH_RADIUS_KM
+    matrix = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        phi1, lambda1, cos1, row = phis[i], lambdas[i], cosines[i], matrix[i]
+        for j in range(i + 1, n):
+            a = sin((phis[j] - phi1) / 2) ** 2 + cos1 * cosines[j] * sin((lambdas[j] - lambda1) / 2) ** 2
+            row[j] = matrix[j][i] = diameter * asin(sqrt(a) if a < 1.0 else 1.0)
+    return tuple(tuple(row) for row in matrix)
+
+
+cached_distance_matrix = lru_cache(maxsize=256)(distance_matrix)
+
+
+def route_matrix(points):
+    """distance_matrix(points), cached per point tuple up to MATRIX_CACHE_MAX_STOPS points"""
+    if len(points) > MATRIX_CACHE_MAX_STOPS:
+        return distance_matrix(points)
+    return cached_distance_matrix(points)
+
+
+def path_length(matrix, order):
+    return sum(matrix[a][b] for a, b in zip(order, order[1:]))
+
+
+def nearest_neighbour(matrix, start=0):
+    """Open path from `start` that always moves to the closest unvisited stop"""
+    unvisited = set(range(len(matrix))) - {start}
+    order = [start]
+    while unvisited:
+        row = matrix[order[-1]]
+        closest = min(unvisited, key=row.__getitem__)
+        unvisited.remove(closest)
+        order.append(closest)
+    return order
+
+
+def two_opt(matrix, order, deadline):
+    """Improve an open path with a fixed first stop by 2-opt segment reversals until no gain or the deadline"""
+    order = list(order)
+    n = len(order)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, n - 1):
+            if time.perf_counter() >= deadline:
+                return order
+            a, b = order[i - 1], order[i]
+            row_a, row_b = matrix[a], matrix[b]
+            for k in range(i + 1, n):
+                c = order[k]
+                if k + 1 < n:
+                    e = order[k + 1]
+                    gain = row_a[b] + matrix[c][e] - row_a[c] - row_b[e]
+                else:
+                    # Open end: reversing the tail only changes its first edge
+                    gain = row_a[b] - row_a[c]
+                if gain > 1e-9:
+                    order[i:k + 1] = reversed(order[i:k + 1])
+                    improved = True
+                    a, b = order[i - 1], order[i]
+                    row_a, row_b = matrix[a], matrix[b]
+    return order
+
+
+class RoutePlanner:
+    @staticmethod
+    def plan(stops, time_limit=ROUTE_TIME_LIMIT):
+        """
+        Order stops (dicts with id, name, latitude, longitude; the first is
+        the starting point) to shorten the total travel distance
+        Stops without coordinates keep their place at the end of the route
+        """
+        started = time.perf_counter()
+        located = [s for s in stops if s.get('latitude') is not None and s.get('longitude') is not None]
+        unlocated = [s for s in stops if s not in located]
+
+        order = list(range(len(located)))
+        original_km = optimized_km = 0.0
+        if len(located) > 2:
+            matrix = route_matrix(tuple((float(s['latitude']), float(s['longitude'])) for s in located))
+            original_km = path_length(matrix, order)
+            candidate = two_opt(matrix, nearest_neighbour(matrix), started + time_limit)
+            # Never hand back a longer route than the one planned by the user
+            if path_length(matrix, candidate) < original_km:
+                order = candidate
+            optimized_km = path_length(matrix, order)
+        elif len(located) == 2:
+            original_km = optimized_km = haversine_km(
+                located[0]['latitude'], located[0]['longitude'], located[1]['latitude'], located[1]['longitude']
+            )
+
+        route = [located[i] for i in order] + unlocated
+        return {
+            'stops': [{'id': s['id'], 'name': s.get('name')} for s in route],
+            'original_distance_km': round(original_km, 1),
+            'optimized_distance_km': round(optimized_km, 1),
+            'distance_saved_km': round(original_km - optimized_km, 1),
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+        }
+
+    @staticmethod
+    def allocate_days(route_ids, activity_city_ids, days):
+        """
+        Planned city for each trip day: consecutive days per stop in route
+        order, in proportion to the stop's activities (largest remainder),
+        with every stop that has activities getting at least one day while
+        days allow
+        """
+        counts = {city_id: 0 for city_id in route_ids}
+        for city_id in activity_city_ids:
+            if city_id in counts:
+                counts[city_id] += 1
+        weighted = [city_id for city_id in route_ids if counts[city_id]]
+        if not weighted or days <= 0:
+            return [None] * max(days, 0)
+
+        total = sum(counts[city_id] for city_id in weighted)
+        minimum = 1 if days >= len(weighted) else 0
+        spare = days - minimum * len(weighted)
+        shares = {city_id: spare * counts[city_id] / total for city_id in weighted}
+        allocation = {city_id: minimum + int(shares[city_id]) for city_id in weighted}
+        leftover = days - sum(allocation.values())
+        for city_id in sorted(weighted, key=lambda c: shares[c] - int(shares[c]), reverse=True)[:leftover]:
+            allocation[city_id] += 1
+
+        plan = []
+        for city_id in weighted:
+            plan.extend([city_id] * allocation[city_id])
+        return plan
@@ -0,0 +1,93 @@
+"""
+Batched loader for a trip and its itinerary graph
+"""
+import json
+from src.config.database import get_db
+from src.services.budget_service import BudgetService
+
+class TripGraphLoader:
+    @staticmethod
+    def load(trip_id, conn=None):
+        """
+        Load a trip with its cities, sections, activities and budget summary
+        in a fixed number of queries, regardless of itinerary size
+        """
+        return TripGraphLoader.load_many([trip_id], conn).get(trip_id)
+    
+    @staticmethod
+    def load_many(trip_ids, conn=None):
+        """
+        Load the graphs (as returned by load()) of many trips in the same
+        fixed number of queries; returns {trip_id: graph} for the trips
+        that exist. Uses conn if given, else get_db().
+        """
+        own_conn = conn is None
+        if own_conn:
+            conn = get_db()
+        cursor = conn.cursor()
+        
+        # Get trips with user info
+        cursor.execute('''
+            SELECT t.*, u.username, u.first_name, u.last_name, u.email
+            FROM trips t
+            JOIN users u ON t.user_id = u.id
+            WHERE t.id IN (SELECT value FROM json_each(?))
+        ''', (json.dumps(list(trip_ids)),))
+        graphs = {
+            row['id']: {'trip': dict(row), 'cities': [], 'sections': [], 'activities': []}
+            for row in cursor.fetchall()
+        }
+        if not graphs:
+            if own_conn:
+                conn.close()
+            return {}
+        ids = json.dumps(list(graphs))
+        
+        # Get cities
+        cursor.execute('''
+            SELECT c.*, tc.visit_order, tc.arrival_date, tc.departure_date, tc.trip_id AS graph_trip_id
+            FROM cities c
+            JOIN trip_cities tc ON c.id = tc.city_id
+            WHERE tc.trip_id IN (SELECT value FROM json_each(?))
+            ORDER BY tc.trip_id, tc.visit_order ASC
+        ''', (ids,))
+        for row in cursor.fetchall():
+            city = dict(row)
+            graphs[city.pop('graph_trip_id')]['cities'].append(city)
+        
+        # Get sections
+        cursor.execute('''
+            SELECT * FROM itinerary_sections
+            WHERE trip_id IN (SELECT value FROM json_each(?))
+            ORDER BY trip_id, order_index ASC
+        ''', (ids,))
+        sections_by_id = {}
+        for row in cursor.fetchall():
+            section = dict(row)
+            section['activities'] = []
+            sections_by_id[section['id']] = section
+            graphs[section['trip_id']]['sections'].append(section)
+        
+        # Get activities for all sections in one query and group them
+        cursor.execute('''
+            SELECT a.*, c.name as city_name, c.country, c.cost_index,
+                   c.latitude as city_latitude, c.longitude as city_longitude
+            FROM activities a
+            JOIN itinerary_sections isec ON a.itinerary_section_id = isec.id
+            LEFT JOIN cities c ON a.city_id = c.id
+            WHERE isec.trip_id IN (SELECT value FROM json_each(?))
+            ORDER BY a.day_number ASC, a.time_slot ASC
+        ''', (ids,))
+        for row in cursor.fetchall():
+            sections_by_id[row['itinerary_section_id']]['activities'].append(dict(row))
+        
+        for trip_id, summary in BudgetService.get_budget_summaries(graphs, conn).items():
+            graphs[trip_id]['budget'] = summary
+        
+        if own_conn:
+            conn.close()
+        
+        for graph in graphs.values():
+            for section in graph['sections']:
+                graph['activities'].extend(section['activities'])
+        return graphs
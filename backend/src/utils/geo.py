@@ -0,0 +1,38 @@
+"""
+Great-circle distance helpers
+"""
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+# Half the earth's circumference: no two points are further apart
+MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat, lon, radius_km):
+    """
+    (min_lat, max_lat, min_lon, max_lon) covering every point within
+    radius_km of (lat, lon); longitude spans the full range near the poles
+    or when the box would cross the antimeridian
+    """
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+    if min_lat <= -90.0 or max_lat >= 90.0:
+        return min_lat, max_lat, -180.0, 180.0
+
+    # Widest longitude offset at the box's latitude furthest from the equator
+    ratio = math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(lat))
+    if ratio >= 1.0:
+        return min_lat, max_lat, -180.0, 180.0
+    dlon = math.degrees(math.asin(ratio))
+    if lon - dlon < -180.0 or lon + dlon > 180.0:
+        return min_lat, max_lat, -180.0, 180.0
+    return min_lat, max_lat, lon - dlon, lon + dlon
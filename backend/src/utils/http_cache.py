@@ -0,0 +1,39 @@
+"""
+HTTP caching helpers for pre-serialized JSON payloads
+"""
+import gzip
+import hashlib
+from flask import current_app, request
+
+DEFAULT_MAX_AGE = 300
+
+
+class JsonSnapshot:
+    """
+    JSON payload serialized once, with a gzip variant and a strong ETag
+    derived from the content
+    """
+
+    def __init__(self, data):
+        # Compact, like jsonify outside debug mode
+        self.body = current_app.json.dumps(data, separators=(',', ':')).encode('utf-8')
+        self.gzipped = gzip.compress(self.body, compresslevel=9, mtime=0)
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+
+
+def snapshot_response(snapshot, max_age=DEFAULT_MAX_AGE):
+    """
+    Serve a JsonSnapshot with ETag/Cache-Control, answering a matching
+    If-None-Match with 304 and gzip-capable clients with the compressed bytes
+    """
+    use_gzip = 'gzip' in request.accept_encodings
+    body = snapshot.gzipped if use_gzip else snapshot.body
+
+    response = current_app.response_class(body, mimetype='application/json')
+    # Each encoding is its own representation and needs its own strong ETag
+    response.set_etag(snapshot.etag + ('-gz' if use_gzip else ''))
+    response.headers['Cache-Control'] = f'public, max-age={max_age}'
+    response.vary.add('Accept-Encoding')
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response.make_conditional(request)
@@ -0,0 +1,69 @@
+"""
+Keyset (cursor) pagination helpers
+
+Listings are ordered by a unique key such as (created_at, id) and each page
+continues strictly after the last row of the previous one, so fetching a
+deep page costs the same as fetching the first. Cursors are opaque to
+clients: the key of the last row, JSON-encoded and base64url'd.
+"""
+import base64
+import json
+from flask import request, url_for
+
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor token cannot be decoded"""
+
+
+def encode_cursor(values):
+    """Encode the key values of the last row on a page as an opaque token"""
+    raw = json.dumps(list(values), separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token, size):
+    """Decode a cursor token into a list of `size` key values (None if no token)"""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        raise InvalidCursor('Invalid cursor')
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor('Invalid cursor')
+    # Key values are bound as SQL parameters: only scalars are valid
+    if not all(isinstance(v, (str, int, float)) and not isinstance(v, bool) for v in values):
+        raise InvalidCursor('Invalid cursor')
+    return values
+
+
+def page_size(value, default):
+    """Parse a ?limit= value, clamped to 1..MAX_PAGE_SIZE"""
+    try:
+        size = int(value) if value else default
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def paginate(rows, limit, key):
+    """
+    Split rows fetched with LIMIT limit + 1 into (page, next_cursor)
+    next_cursor is None on the last page
+    """
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(key(page[-1]))
+
+
+def set_next_cursor(response, next_cursor):
+    """Expose the next page cursor on a list response (X-Next-Cursor and Link)"""
+    if next_cursor:
+        args = {**request.args.to_dict(), **(request.view_args or {}), 'cursor': next_cursor}
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{url_for(request.endpoint, **args)}>; rel="next"'
+    return response
@@ -0,0 +1,124 @@
+"""
+Shared fixtures: the app on a throwaway SQLite database, helpers to seed
+trips directly through SQL, and a local stand-in for the Geoapify API
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pytest
+
+# The database path is read when src.config.database is first imported
+os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='globetrotter-tests-'), 'test.db')
+os.environ['SEED_DATABASE'] = 'false'
+
+
+@pytest.fixture(scope='session')
+def app():
+    from src.config.app import create_app
+    return create_app()
+
+
+@pytest.fixture
+def db(app):
+    from src.config.database import DATABASE_PATH
+    conn = sqlite3.connect(DATABASE_PATH)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA foreign_keys = ON')
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def create_trip(db):
+    """create_trip(sections=1, activities=0, expenses=0, **trip) -> trip id, with a city on the trip"""
+    def create(sections=1, activities=0, expenses=0, costs=None, amounts=None, **trip):
+        name = uuid.uuid4().hex[:12]
+        user_id = db.execute(
+            'INSERT INTO users (username, email, password) VALUES (?, ?, ?)',
+            (name, f'{name}@example.com', 'x')
+        ).lastrowid
+        trip_id = db.execute(
+            'INSERT INTO trips (user_id, title, start_date, end_date, total_budget) VALUES (?, ?, ?, ?, ?)',
+            (user_id, trip.get('title', 'Test trip'), trip.get('start_date', '2030-01-01'),
+             trip.get('end_date', '2030-01-07'), trip.get('total_budget', 0))
+        ).lastrowid
+        city_id = db.execute(
+            'INSERT INTO cities (name, country, latitude, longitude) VALUES (?, ?, ?, ?)',
+            (f'City {name}', 'Testland', 10.0, 20.0)
+        ).lastrowid
+        db.execute('INSERT INTO trip_cities (trip_id, city_id, visit_order) VALUES (?, ?, 1)', (trip_id, city_id))
+
+        section_ids = [
+            db.execute(
+                'INSERT INTO itinerary_sections (trip_id, title, budget, order_index) VALUES (?, ?, ?, ?)',
+                (trip_id, f'Section {i}', 100, i)
+            ).lastrowid
+            for i in range(sections)
+        ]
+        db.executemany(
+            'INSERT INTO activities (itinerary_section_id, name, activity_type, city_id, cost, duration) '
+            "VALUES (?, ?, 'Culture', ?, ?, '1 hour')",
+            [(section_ids[i % len(section_ids)], f'Activity {i}', city_id, costs[i] if costs else 10)
+             for i in range(activities)]
+        )
+        db.executemany(
+            "INSERT INTO expenses (trip_id, expense_category, amount) VALUES (?, ?, ?)",
+            [(trip_id, ('Transport', 'Stay', 'Meals', 'Misc')[i % 4], amounts[i] if amounts else 5)
+             for i in range(expenses)]
+        )
+        db.commit()
+        return trip_id
+    return create
+
+
+class GeoapifyStub:
+    """
+    Autocomplete endpoint on localhost; set `delay` (seconds) and `status`
+    to inject latency and failures. `requests` counts the calls received.
+    """
+
+    def __init__(self):
+        self.delay = 0
+        self.status = 200
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests += 1
+                time.sleep(stub.delay)
+                query = parse_qs(urlparse(self.path).query).get('text', [''])[0]
+                body = json.dumps({'features': [] if query.startswith('nowhere') else [{'properties': {
+                    'city': query.title(), 'country': 'Stubland', 'result_type': 'city', 'lat': 1.0, 'lon': 2.0
+                }}]}).encode('utf-8')
+                try:
+                    self.send_response(stub.status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client timed out first
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_port}/v1/geocode/autocomplete'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+@pytest.fixture
+def geoapify_stub():
+    stub = GeoapifyStub()
+    yield stub
+    stub.server.shutdown()
+    stub.server.server_close()
@@ -0,0 +1,67 @@
+"""
+Batch optimization endpoint access control and pool cleanup
+"""
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from src.controllers import ai_controller
+from src.services import batch_optimizer
+from src.services.batch_optimizer import BatchOptimizer
+
+
+def test_admin_endpoint_is_disabled_without_a_token(app, monkeypatch):
+    monkeypatch.setattr(ai_controller, 'ADMIN_API_TOKEN', '')
+    response = app.test_client().post('/api/admin/ai/optimize-trips', json={'trip_ids': []})
+    assert response.status_code == 403
+
+
+def test_admin_endpoint_checks_the_token(app, create_trip, monkeypatch):
+    monkeypatch.setattr(ai_controller, 'ADMIN_API_TOKEN', 's3cret')
+    client = app.test_client()
+    url = '/api/admin/ai/optimize-trips'
+    assert client.post(url, json={}).status_code == 401
+    assert client.post(url, json={}, headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    assert client.post(url, json={}, headers={'Authorization': 'Bearer ünïcode'}).status_code == 401
+
+    trip_id = create_trip(activities=3)
+    response = client.post(url, json={'trip_ids': [trip_id], 'workers': 1},
+                           headers={'Authorization': 'Bearer s3cret'})
+    assert response.status_code == 200
+    records = [line for line in response.get_data(as_text=True).splitlines() if line]
+    assert len(records) == 2 and '"status":"done"' in records[0] and '"summary"' in records[1]
+
+
+def test_abandoned_stream_does_not_wait_for_queued_solves(app, create_trip):
+    batch = BatchOptimizer.prepare([create_trip(activities=2) for _ in range(4)])
+    records = BatchOptimizer.run(**batch, workers=2)
+    assert 'trip_id' in next(records)
+    # Closing the generator (as a client disconnect does) shuts the pool down
+    records.close()
+
+
+def test_broken_pool_still_ends_with_a_summary(app, create_trip, monkeypatch):
+    class DyingExecutor:
+        """Solves the first trip, then loses its worker like a killed process pool"""
+
+        def __init__(self, *args, **kwargs):
+            self.submitted = 0
+
+        def submit(self, fn, *args):
+            future = Future()
+            if self.submitted == 0:
+                future.set_result(fn(*args))
+            else:
+                future.set_exception(BrokenProcessPool('A process in the process pool was terminated abruptly'))
+            self.submitted += 1
+            return future
+
+        def shutdown(self, **kwargs):
+            pass
+
+    monkeypatch.setattr(batch_optimizer, 'ProcessPoolExecutor', DyingExecutor)
+    trip_ids = [create_trip(activities=2) for _ in range(3)]
+    records = list(BatchOptimizer.run(**BatchOptimizer.prepare(trip_ids), workers=3))
+
+    results, summary = records[:-1], records[-1]['summary']
+    assert sorted(r['trip_id'] for r in results) == sorted(trip_ids)
+    assert sorted(r['status'] for r in results) == ['done', 'failed', 'failed']
+    assert summary['done'] == 1 and summary['failed'] == 2
@@ -0,0 +1,75 @@
+"""
+The single-query budget analysis matches a per-section computation and
+stays fast on large trips
+"""
+import random
+import time
+from collections import defaultdict
+from src.services.ai_service import AIService
+
+
+def per_section_totals(db, trip_id):
+    """The figures computed the slow way: section by section, table by table"""
+    sections = db.execute('SELECT id, budget FROM itinerary_sections WHERE trip_id = ?', (trip_id,)).fetchall()
+    planned, activities = 0, []
+    for section in sections:
+        rows = db.execute(
+            'SELECT id, name, cost FROM activities WHERE itinerary_section_id = ?', (section['id'],)
+        ).fetchall()
+        planned += sum(row['cost'] or 0 for row in rows)
+        activities.extend(rows)
+
+    categories = defaultdict(lambda: [0, 0])
+    for row in db.execute('SELECT expense_category, amount FROM expenses WHERE trip_id = ?', (trip_id,)):
+        categories[row['expense_category']][0] += row['amount']
+        categories[row['expense_category']][1] += 1
+    expensive = sorted((a for a in activities if (a['cost'] or 0) > 500), key=lambda a: (-a['cost'], a['id']))[:3]
+    return {
+        'section_budget': sum(section['budget'] or 0 for section in sections),
+        'planned_cost': planned,
+        'spent': sum(total for total, _ in categories.values()),
+        'categories': [
+            {'expense_category': name, 'total': total, 'count': count}
+            for name, (total, count) in sorted(categories.items())
+        ],
+        'expensive': [a['name'] for a in expensive]
+    }
+
+
+def test_matches_per_section_computation_on_a_large_trip(create_trip, db):
+    rng = random.Random(5)
+    activities, expenses = 4000, 3000
+    trip_id = create_trip(
+        sections=40, activities=activities, expenses=expenses, total_budget=1000,
+        costs=[rng.choice([0, rng.randint(1, 400), rng.randint(501, 2000)]) for _ in range(activities)],
+        amounts=[rng.randint(1, 300) for _ in range(expenses)]
+    )
+    # Another trip's rows must not leak into the figures
+    create_trip(sections=3, activities=50, expenses=50)
+    expected = per_section_totals(db, trip_id)
+
+    started = time.perf_counter()
+    analysis = AIService.analyze_budget(trip_id)
+    elapsed = time.perf_counter() - started
+
+    assert analysis['planned_cost'] == expected['planned_cost']
+    assert analysis['current_spent'] == expected['spent']
+    assert analysis['predicted_total'] == expected['spent'] + expected['planned_cost']
+    assert analysis['budget_limit'] == 1000
+    assert analysis['budget_status'] == 'over_budget'
+    assert analysis['category_breakdown'] == expected['categories']
+    assert [s['current_activity'] for s in analysis['suggestions']] == expected['expensive']
+    # One aggregate query: milliseconds, where the old fan-out join took seconds
+    assert elapsed < 0.5
+
+
+def test_section_budgets_are_the_fallback_limit(create_trip, db):
+    trip_id = create_trip(sections=4, activities=8, expenses=4)
+    analysis = AIService.analyze_budget(trip_id)
+    assert analysis['budget_limit'] == per_section_totals(db, trip_id)['section_budget'] == 400
+    assert analysis['predicted_total'] == 8 * 10 + 4 * 5
+    assert analysis['budget_status'] == 'within_budget'
+
+
+def test_unknown_trip():
+    assert AIService.analyze_budget(10 ** 9) == {'error': 'Trip not found'}
@@ -0,0 +1,74 @@
+"""
+Autocomplete keeps serving the current index while a rebuild runs
+"""
+import threading
+from src.services import city_autocomplete_service
+from src.services.city_autocomplete_service import CityAutocomplete
+
+
+class FakeCatalog:
+    def __init__(self, names):
+        self.version = 0
+        self.records = []
+        self.update(names)
+
+    def update(self, names):
+        self.version += 1
+        self.records = [{'id': i, 'name': name, 'source': 'database'} for i, name in enumerate(names, 1)]
+
+    def snapshot(self):
+        return self
+
+
+def test_rebuild_happens_off_the_request_path(monkeypatch):
+    catalog = FakeCatalog(['Paris', 'Rome'])
+    monkeypatch.setattr(city_autocomplete_service, 'city_catalog', catalog)
+    autocomplete = CityAutocomplete(rebuild_interval=0)
+    first = autocomplete.index()
+
+    started, release = threading.Event(), threading.Event()
+    real_rebuild = autocomplete._rebuild
+
+    def slow_rebuild():
+        started.set()
+        release.wait(5)
+        real_rebuild()
+
+    monkeypatch.setattr(autocomplete, '_rebuild', slow_rebuild)
+    catalog.update(['Paris', 'Rome', 'Lisbon'])
+
+    # The catalog changed: the old index is returned while the rebuild is running
+    assert autocomplete.index() is first
+    assert started.wait(5)
+    assert autocomplete.index() is first
+    assert not any(r['name'] == 'Lisbon' for r in autocomplete.search('Lisb'))
+
+    release.set()
+    for thread in threading.enumerate():
+        if thread.name == 'city-autocomplete-rebuild':
+            thread.join(5)
+    assert autocomplete.index() is not first
+    assert autocomplete.search('Lisb')[0]['name'] == 'Lisbon'
+
+
+def test_failed_catalog_read_does_not_block_later_rebuilds(monkeypatch):
+    catalog = FakeCatalog(['Paris'])
+    monkeypatch.setattr(city_autocomplete_service, 'city_catalog', catalog)
+    autocomplete = CityAutocomplete(rebuild_interval=0)
+    first = autocomplete.index()
+
+    # Reading the catalog itself fails on the rebuild thread
+    catalog.update(['Paris', 'Oslo'])
+    monkeypatch.setattr(catalog, 'snapshot', lambda: 1 / 0)
+    autocomplete._rebuilding = True
+    autocomplete._rebuild()
+    assert not autocomplete._rebuilding
+    assert autocomplete._index is first
+
+    monkeypatch.undo()
+    monkeypatch.setattr(city_autocomplete_service, 'city_catalog', catalog)
+    assert autocomplete.index() is first
+    for thread in threading.enumerate():
+        if thread.name == 'city-autocomplete-rebuild':
+            thread.join(5)
+    assert autocomplete.search('Oslo')[0]['name'] == 'Oslo'
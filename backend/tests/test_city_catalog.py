@@ -0,0 +1,88 @@
+"""
+Incremental catalog updates produce the same views as a full rebuild
+"""
+import random
+from src.services import city_catalog as catalog_module
+from src.services.city_catalog import CityCatalog
+
+STATIC = [
+    {'name': name, 'country': country, 'popularity': popularity}
+    for name, country, popularity in [
+        ('Paris', 'France', 90), ('Lyon', 'France', 60), ('Rome', 'Italy', 85), ('Milan', 'Italy', 60),
+        ('Tokyo', 'Japan', 95), ('Kyoto', 'Japan', 70), ('Goa', 'India', 60), ('Delhi', 'India', 80)
+    ]
+]
+NAMES = [city['name'] for city in STATIC] + ['Nice', 'Porto', 'Lisbon', 'Osaka']
+COUNTRIES = ['France', 'Italy', 'Japan', 'India', 'Portugal']
+
+
+class FakeCities:
+    def __init__(self):
+        self.rows = {}
+        self.log = []
+
+    def catalog_version(self):
+        return len(self.log)
+
+    def changed_since(self, version):
+        return self.log[version:]
+
+    def get_catalog(self, ids=None):
+        return [dict(row) for city_id, row in self.rows.items() if ids is None or city_id in ids]
+
+    def save(self, city_id, rng):
+        self.rows[city_id] = {
+            'id': city_id, 'name': rng.choice(NAMES), 'country': rng.choice(COUNTRIES),
+            'popularity': rng.choice([None, 50, 60, 70, 80, 90]), 'trip_count': rng.randint(0, 5)
+        }
+        self.log.append(city_id)
+
+    def delete(self, city_id):
+        self.rows.pop(city_id, None)
+        self.log.append(city_id)
+
+
+def order(snapshot):
+    return [(r['source'], r.get('id'), r['name']) for r in snapshot.records]
+
+
+def order_view(snapshot, country):
+    return [(r['source'], r.get('id'), r['name']) for r in snapshot.view(country)]
+
+
+def expected_order(rows):
+    """Database cities by (popularity, name), then unshadowed built-in cities, stably by popularity"""
+    db = sorted(rows.values(), key=lambda c: (-(c['popularity'] or 0), c['name'], c['id']))
+    names = {c['name'].lower() for c in db}
+    merged = [('database', c['id'], c['name'], c['popularity']) for c in db]
+    merged += [('catalog', None, c['name'], c['popularity']) for c in STATIC if c['name'].lower() not in names]
+    merged.sort(key=lambda c: c[3] or 0, reverse=True)
+    return [entry[:3] for entry in merged]
+
+
+def test_incremental_updates_match_full_rebuild(monkeypatch):
+    cities = FakeCities()
+    monkeypatch.setattr(catalog_module, 'City', cities)
+    monkeypatch.setattr(catalog_module, 'get_all_cities', lambda: STATIC)
+    monkeypatch.setattr(catalog_module, 'has_city_details', lambda name: False)
+
+    rng = random.Random(3)
+    for city_id in range(1, 9):
+        cities.save(city_id, rng)
+    catalog = CityCatalog()
+    catalog.snapshot()
+
+    for _ in range(200):
+        for _ in range(rng.randint(1, 3)):
+            city_id = rng.randint(1, 12)
+            if rng.random() < 0.3:
+                cities.delete(city_id)
+            else:
+                cities.save(city_id, rng)
+        incremental = catalog.snapshot()
+        rebuilt = CityCatalog().snapshot()
+
+        assert order(incremental) == order(rebuilt) == expected_order(cities.rows)
+        assert incremental.by_country.keys() == rebuilt.by_country.keys()
+        for country in COUNTRIES:
+            assert order_view(incremental, country) == order_view(rebuilt, country)
@@ -0,0 +1,53 @@
+"""
+The compiled city dataset follows its source and keeps a bounded decode cache
+"""
+import json
+import os
+from src.services.city_details_store import CityDetailsStore, build
+
+
+def write_source(path, cities):
+    path.write_text(json.dumps(cities), encoding='utf-8')
+
+
+def make_store(tmp_path, **kwargs):
+    return CityDetailsStore(
+        data_path=str(tmp_path / 'city_details.jsonl'),
+        index_path=str(tmp_path / 'city_details.idx.json'),
+        source_path=str(tmp_path / 'city_details.json'),
+        **kwargs
+    )
+
+
+def test_builds_missing_files_and_rebuilds_stale_index(tmp_path):
+    source = tmp_path / 'city_details.json'
+    write_source(source, {'goa': {'name': 'Goa', 'hotels': ['A']}})
+    assert make_store(tmp_path).get('goa')['hotels'] == ['A']
+
+    write_source(source, {'goa': {'name': 'Goa', 'hotels': ['A', 'B']}, 'pune': {'name': 'Pune'}})
+    store = make_store(tmp_path)
+    assert store.get('goa')['hotels'] == ['A', 'B']
+    assert store.has('pune')
+
+
+def test_touched_but_unchanged_source_is_not_rebuilt(tmp_path):
+    source = tmp_path / 'city_details.json'
+    write_source(source, {'goa': {'name': 'Goa'}})
+    index_path = tmp_path / 'city_details.idx.json'
+    build(str(source), str(tmp_path / 'city_details.jsonl'), str(index_path))
+    built_at = index_path.stat().st_mtime_ns
+
+    os.utime(source, ns=(built_at + 10**9, built_at + 10**9))
+    index_path.touch()
+    touched = index_path.stat().st_mtime_ns
+    assert make_store(tmp_path).has('goa')
+    assert index_path.stat().st_mtime_ns == touched
+
+
+def test_decoded_cache_is_bounded(tmp_path):
+    write_source(tmp_path / 'city_details.json', {f'city{i}': {'name': f'City {i}'} for i in range(10)})
+    store = make_store(tmp_path, cache_size=3)
+    for i in range(10):
+        assert store.get(f'city{i}')['name'] == f'City {i}'
+    assert store.stats() == {'cities': 10, 'decoded': 3}
+    assert store.get('city0')['name'] == 'City 0'
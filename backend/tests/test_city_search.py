@@ -0,0 +1,20 @@
+"""
+City search attaches requested detail sections to database cities too
+"""
+from src.services.city_data_service import get_city_details
+
+
+def test_database_city_gets_requested_sections(app, db):
+    city_id = db.execute("INSERT INTO cities (name, country, popularity) VALUES ('Goa', 'India', 80)").lastrowid
+    db.commit()
+    client = app.test_client()
+
+    cities = client.get('/api/cities?search=goa&fields=hotels').get_json()
+    goa = next(city for city in cities if city['name'] == 'Goa')
+    assert goa['id'] == city_id and 'has_details' not in goa  # the database record, not the built-in one
+    assert goa['hotels'] == get_city_details('Goa')['hotels']
+    assert 'shopping' not in goa
+
+    plain = client.get('/api/cities?search=goa').get_json()
+    assert 'hotels' not in next(city for city in plain if city['name'] == 'Goa')
+    assert client.get('/api/cities?search=goa&fields=bogus').status_code == 400
@@ -0,0 +1,92 @@
+"""
+Request sessions take the writer gate only for writes, and
+write_transaction() inside a request never waits on its own request
+"""
+import threading
+import time
+import uuid
+from flask import g
+from src.config.database import get_db, is_write_statement, write_transaction
+
+
+def insert_user(conn):
+    name = uuid.uuid4().hex[:12]
+    conn.execute('INSERT INTO users (username, email, password) VALUES (?, ?, ?)', (name, f'{name}@example.com', 'x'))
+    return name
+
+
+def user_exists(db, name):
+    return db.execute('SELECT 1 FROM users WHERE username = ?', (name,)).fetchone() is not None
+
+
+def finish_request():
+    g.pop('db_session').commit()
+
+
+def test_write_statements_are_recognised():
+    assert is_write_statement('  insert into x values (1)')
+    assert is_write_statement('-- note\nUPDATE x SET a = 1')
+    assert is_write_statement('WITH t AS (SELECT 1) INSERT INTO x SELECT * FROM t')
+    assert not is_write_statement('SELECT * FROM x')
+    assert not is_write_statement('WITH t AS (SELECT 1) SELECT * FROM t')
+
+
+def test_read_only_post_does_not_hold_the_gate(app, db):
+    with app.test_request_context('/', method='POST'):
+        get_db().execute('SELECT COUNT(*) FROM trips').fetchone()
+        # Another thread can write while this request is still open
+        written = []
+        thread = threading.Thread(target=lambda: written.append(_write_elsewhere()))
+        thread.start()
+        thread.join(5)
+        assert written and user_exists(db, written[0])
+        finish_request()
+
+
+def _write_elsewhere():
+    with write_transaction() as conn:
+        return insert_user(conn)
+
+
+def test_write_transaction_after_reads_in_a_post(app, db):
+    with app.test_request_context('/', method='POST'):
+        get_db().execute('SELECT COUNT(*) FROM trips').fetchone()
+        started = time.monotonic()
+        with write_transaction() as conn:
+            name = insert_user(conn)
+        assert time.monotonic() - started < 1
+        # Committed on its own, before the request ends
+        assert user_exists(db, name)
+        finish_request()
+
+
+def test_write_transaction_joins_a_writing_request(app, db):
+    with app.test_request_context('/', method='POST'):
+        first = insert_user(get_db())
+        started = time.monotonic()
+        with write_transaction() as conn:
+            second = insert_user(conn)
+        assert time.monotonic() - started < 1
+        try:
+            with write_transaction() as conn:
+                insert_user(conn)
+                raise RuntimeError('undo this block only')
+        except RuntimeError:
+            pass
+        finish_request()
+    assert user_exists(db, first) and user_exists(db, second)
+    assert db.execute('SELECT COUNT(*) FROM users WHERE username IN (?, ?)', (first, second)).fetchone()[0] == 2
+
+
+def test_write_transaction_during_a_get(app, db):
+    with app.test_request_context('/', method='GET'):
+        conn = get_db()
+        conn.execute('SELECT COUNT(*) FROM trips').fetchone()
+        started = time.monotonic()
+        with write_transaction() as write_conn:
+            name = insert_user(write_conn)
+        assert time.monotonic() - started < 1
+        assert user_exists(db, name)
+        # The request keeps reading on a fresh snapshot
+        assert user_exists(conn, name)
+        finish_request()
@@ -0,0 +1,104 @@
+"""
+Geoapify client against a local stand-in: the per-call deadline, the
+circuit breaker's transitions and the latency metrics
+"""
+import time
+import uuid
+from src.services.geoapify_client import CircuitBreaker, GeoapifyClient
+from src.services.geocode_cache import GeocodeCache
+
+
+def client_for(stub, **options):
+    options.setdefault('breaker', CircuitBreaker(failures=2, cooldown=0.3))
+    return GeoapifyClient(url=stub.url, cache=GeocodeCache(), **options)
+
+
+def unique_query():
+    return f'town {uuid.uuid4().hex[:8]}'
+
+
+def test_search_returns_parsed_cities_and_records_latency(app, geoapify_stub):
+    geoapify_stub.delay = 0.05
+    client = client_for(geoapify_stub)
+    query = unique_query()
+
+    cities = client.search(query)
+    assert [c['name'] for c in cities] == [query.title()]
+    assert cities[0]['source'] == 'geoapify'
+
+    stats = client.stats()
+    assert stats['calls'] == 1 and stats['failures'] == 0
+    assert stats['latency_ms']['p50'] >= 50
+    assert stats['latency_ms']['max'] >= stats['latency_ms']['p50']
+    # A repeated query is answered from the cache
+    assert client.search(query) == cities
+    assert geoapify_stub.requests == 1
+
+
+def test_slow_upstream_is_cut_off_at_the_deadline(app, geoapify_stub):
+    geoapify_stub.delay = 0.5
+    client = client_for(geoapify_stub, deadline=0.1)
+    query = unique_query()
+
+    started = time.monotonic()
+    future = client.submit(query)
+    assert client.result(future, started) == []
+    assert time.monotonic() - started < 0.4
+    assert client.stats()['deadline_exceeded'] == 1
+
+    # The late call still completes and fills the cache for the next search
+    future.result(timeout=5)
+    assert client.search(query)[0]['name'] == query.title()
+    assert geoapify_stub.requests == 1
+    assert client.breaker.state == 'closed'
+
+
+def test_http_timeout_counts_as_a_failure(app, geoapify_stub):
+    geoapify_stub.delay = 0.5
+    client = client_for(geoapify_stub, deadline=2, timeout=0.1)
+
+    assert client.search(unique_query()) == []
+    stats = client.stats()
+    assert stats['failures'] == 1 and stats['deadline_exceeded'] == 0
+    assert stats['breaker']['consecutive_failures'] == 1
+
+
+def test_breaker_opens_on_failures_and_recovers_after_cooldown(app, geoapify_stub):
+    geoapify_stub.status = 503
+    client = client_for(geoapify_stub)
+    breaker = client.breaker
+
+    assert client.search(unique_query()) == []
+    assert breaker.state == 'closed'
+    assert client.search(unique_query()) == []
+    assert breaker.state == 'open' and breaker.stats()['opens'] == 1
+
+    # Open: calls are rejected without reaching the upstream
+    assert client.search(unique_query()) == []
+    assert geoapify_stub.requests == 2
+    assert client.stats()['rejected'] == 1
+
+    # Half-open after the cooldown: one trial call, which fails and reopens
+    time.sleep(0.35)
+    assert breaker.state == 'half_open'
+    assert client.search(unique_query()) == []
+    assert geoapify_stub.requests == 3
+    assert breaker.state == 'open' and breaker.stats()['opens'] == 2
+
+    # A successful trial closes it again
+    time.sleep(0.35)
+    geoapify_stub.status = 200
+    assert breaker.state == 'half_open'
+    assert client.search(unique_query())
+    assert breaker.stats() == {'state': 'closed', 'consecutive_failures': 0, 'opens': 2}
+
+
+def test_half_open_breaker_lets_a_single_trial_through(app):
+    breaker = CircuitBreaker(failures=1, cooldown=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed' and breaker.allow()
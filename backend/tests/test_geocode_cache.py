@@ -0,0 +1,137 @@
+"""
+Geocode cache: TTLs, negative caching, both eviction tiers and hit ratios,
+driven by a fake clock and the local Geoapify stand-in
+"""
+import time
+import uuid
+import pytest
+from src.services.geoapify_client import CircuitBreaker, GeoapifyClient
+from src.services.geocode_cache import GeocodeCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def unique_query(prefix='town'):
+    return f'{prefix} {uuid.uuid4().hex[:8]}'
+
+
+def stored(db, cache, query):
+    return db.execute('SELECT 1 FROM geocode_cache WHERE query_key = ?', (cache.key(query),)).fetchone() is not None
+
+
+def test_entries_expire_after_the_ttl(app, clock):
+    cache = GeocodeCache(ttl=100, clock=clock)
+    query = unique_query()
+    cache.set(query, [{'name': 'A'}])
+
+    clock.advance(99)
+    assert cache.get(query) == [{'name': 'A'}]
+    # A fresh instance (a restarted worker) reads it back from the table
+    assert GeocodeCache(clock=clock).get(query) == [{'name': 'A'}]
+
+    clock.advance(2)
+    assert cache.get(query) is None
+    assert GeocodeCache(clock=clock).get(query) is None
+
+
+def test_empty_results_use_the_negative_ttl(app, clock):
+    cache = GeocodeCache(ttl=100, negative_ttl=10, clock=clock)
+    empty, found = unique_query(), unique_query()
+    cache.set(empty, [])
+    cache.set(found, [{'name': 'B'}])
+
+    assert cache.get(empty) == []
+    assert cache.stats()['negative_hits'] == 1
+    clock.advance(11)
+    assert cache.get(empty) is None
+    assert cache.get(found) == [{'name': 'B'}]
+
+
+def test_memory_tier_evicts_least_recently_used(app, db, clock):
+    cache = GeocodeCache(memory_size=2, clock=clock)
+    first, second, third = unique_query(), unique_query(), unique_query()
+    cache.set(first, [1])
+    cache.set(second, [2])
+    cache.get(first)
+    cache.set(third, [3])
+
+    assert cache.stats()['memory_size'] == 2
+    # The evicted entry is still answered from the table
+    assert cache.get(second) == [2]
+    stats = cache.stats()
+    assert stats['store_hits'] == 1 and stats['memory_hits'] == 1
+
+
+def test_prune_drops_expired_and_overflow_rows(app, db, clock):
+    cache = GeocodeCache(ttl=100, max_rows=2, prune_every=1, clock=clock)
+    # Past every row other tests left behind
+    clock.advance(30 * 24 * 3600)
+    expired = unique_query()
+    cache.set(expired, [0])
+    clock.advance(101)
+    queries = [unique_query() for _ in range(3)]
+    for query in queries:
+        clock.advance(1)
+        cache.set(query, [query])
+
+    assert not stored(db, cache, expired)
+    assert [stored(db, cache, query) for query in queries] == [False, True, True]
+    assert db.execute('SELECT COUNT(*) FROM geocode_cache').fetchone()[0] == 2
+
+
+def test_hit_ratio(app, clock):
+    cache = GeocodeCache(clock=clock)
+    assert cache.stats()['hit_ratio'] is None
+    query = unique_query()
+    assert cache.get(query) is None
+    cache.set(query, [1])
+    cache.get(query)
+    cache.get(query)
+    cache.get(unique_query())
+
+    stats = cache.stats()
+    assert stats['memory_hits'] == 2 and stats['misses'] == 2
+    assert stats['hit_ratio'] == 0.5
+
+
+def test_upstream_lookups_are_cached(app, geoapify_stub, clock):
+    cache = GeocodeCache(negative_ttl=10, failure_ttl=5, clock=clock)
+    client = GeoapifyClient(url=geoapify_stub.url, cache=cache, breaker=CircuitBreaker(failures=100))
+
+    # Repeated queries never reach the upstream again
+    query = unique_query()
+    assert client.search(query) == client.search(query)
+    assert geoapify_stub.requests == 1
+
+    # Empty results are cached for the negative TTL
+    nowhere = unique_query('nowhere')
+    assert client.search(nowhere) == [] and client.search(nowhere) == []
+    assert geoapify_stub.requests == 2
+    clock.advance(11)
+    client.search(nowhere)
+    assert geoapify_stub.requests == 3
+
+    # Failed lookups are cached, briefly and only in memory
+    geoapify_stub.status = 500
+    failing = unique_query()
+    assert client.search(failing) == [] and client.search(failing) == []
+    assert geoapify_stub.requests == 4
+    assert GeocodeCache(clock=clock).get(failing) is None
+    clock.advance(6)
+    geoapify_stub.status = 200
+    assert client.search(failing)[0]['name'] == failing.title()
+    assert geoapify_stub.requests == 5
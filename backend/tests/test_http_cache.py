@@ -0,0 +1,15 @@
+"""
+Pre-serialized JSON snapshots match jsonify's compact output
+"""
+import gzip
+from flask import jsonify
+from src.utils.http_cache import JsonSnapshot
+
+
+def test_snapshot_body_is_compact(app):
+    data = [{'name': 'Paris', 'tags': ['food', 'art'], 'popularity': 95}]
+    with app.app_context():
+        snapshot = JsonSnapshot(data)
+        assert snapshot.body == b'[{"name":"Paris","popularity":95,"tags":["food","art"]}]'
+        assert snapshot.body == jsonify(data).get_data().rstrip(b'\n')
+    assert gzip.decompress(snapshot.gzipped) == snapshot.body
@@ -0,0 +1,37 @@
+"""
+The scheduler's greedy seed respects the solve time budget
+"""
+import random
+import time
+from src.services.itinerary_scheduler import ItineraryScheduler
+
+TYPES = ['Sightseeing', 'Food', 'Culture', 'Nature']
+
+
+def make_activities(count, seed=1):
+    rng = random.Random(seed)
+    return [{
+        'id': i,
+        'activity_type': rng.choice(TYPES),
+        'cost': rng.randint(0, 100),
+        'duration': rng.choice(['1 hour', '2 hours', '45 mins']),
+        'rating': round(rng.uniform(3, 5), 1)
+    } for i in range(count)]
+
+
+def test_greedy_stops_at_the_deadline():
+    scheduler = ItineraryScheduler(make_activities(20000), 60, None)
+    started = time.perf_counter()
+    assignment, stats = scheduler.solve(time_budget=0)
+    assert time.perf_counter() - started < 1.0
+    assert stats['greedy_complete'] is False
+    assert stats['iterations'] == 0
+    assert len(assignment) == 20000
+
+
+def test_small_trip_seeds_completely():
+    scheduler = ItineraryScheduler(make_activities(30), 5, 500)
+    assignment, stats = scheduler.solve(time_budget=0.05)
+    assert stats['greedy_complete'] is True
+    assert stats['scheduled'] > 0
+    assert sum(a['cost'] for a, day in zip(scheduler.activities, assignment) if day >= 0) <= 500
@@ -0,0 +1,77 @@
+"""
+Optimization jobs are stored in SQLite, so any web worker can answer a poll
+"""
+from flask import g
+from src.controllers.ai_controller import AIController
+from src.services.optimization_jobs import OptimizationJobs
+
+
+def test_job_started_by_one_worker_is_polled_from_another(app, create_trip):
+    trip_id = create_trip(sections=2, activities=6)
+    # Two instances share nothing in memory, like two web worker processes
+    started_by, polled_by = OptimizationJobs(workers=1), OptimizationJobs(workers=1)
+
+    job = started_by.submit(trip_id)
+    assert job['status'] in ('queued', 'running', 'done')
+
+    polled = polled_by.get(job['job_id'], wait=20)
+    assert polled['status'] == 'done'
+    assert polled['result']['original_activity_count'] == 6
+
+    # The memoized result is shared too
+    again = polled_by.submit(trip_id)
+    assert again['cached'] and again['status'] == 'done'
+    assert again['result'] == polled['result']
+    assert polled_by.get('no-such-job') is None
+
+
+def test_edited_trip_is_solved_again(app, db, create_trip):
+    trip_id = create_trip(sections=1, activities=3)
+    jobs = OptimizationJobs(workers=1)
+    first = jobs.get(jobs.submit(trip_id)['job_id'], wait=20)
+    assert first['status'] == 'done'
+
+    section_id = db.execute('SELECT id FROM itinerary_sections WHERE trip_id = ?', (trip_id,)).fetchone()[0]
+    db.execute(
+        "INSERT INTO activities (itinerary_section_id, name, activity_type, cost, duration) "
+        "VALUES (?, 'Extra', 'Food', 5, '1 hour')", (section_id,)
+    )
+    db.commit()
+
+    second = jobs.submit(trip_id)
+    assert not second['cached'] and second['fingerprint'] != first['fingerprint']
+    assert jobs.get(second['job_id'], wait=20)['result']['original_activity_count'] == 4
+
+
+def test_submitting_a_job_does_not_open_a_write_session(app, create_trip):
+    trip_id = create_trip(activities=2)
+    with app.test_request_context(f'/api/trips/{trip_id}/ai/optimize/jobs', method='POST'):
+        response = AIController.submit_optimization(trip_id)
+        assert response.status_code in (200, 202)
+        assert g.get('db_session') is None
+
+
+def test_cache_hit_creates_no_job(app, db, create_trip):
+    trip_id = create_trip(activities=2)
+    jobs = OptimizationJobs(workers=1)
+    solved = jobs.get(jobs.submit(trip_id)['job_id'], wait=20)
+    assert solved['status'] == 'done'
+    count_jobs = 'SELECT COUNT(*) FROM optimization_jobs WHERE trip_id = ?'
+    before = db.execute(count_jobs, (trip_id,)).fetchone()[0]
+
+    hit = jobs.submit(trip_id)
+    assert hit['job_id'] is None and hit['cached'] and hit['result'] == solved['result']
+    assert db.execute(count_jobs, (trip_id,)).fetchone()[0] == before
+
+    with app.test_request_context(f'/api/trips/{trip_id}/ai/optimize/jobs', method='POST'):
+        response = AIController.submit_optimization(trip_id)
+        assert response.status_code == 200 and 'Location' not in response.headers
+    with app.test_request_context(f'/api/trips/{trip_id}/ai/optimize'):
+        assert AIController.optimize_itinerary(trip_id).get_json() == solved['result']
+
+
+def test_pending_jobs_are_counted_from_the_status_index(db):
+    plan = db.execute(
+        "EXPLAIN QUERY PLAN SELECT COUNT(*) FROM optimization_jobs WHERE status IN ('queued', 'running')"
+    ).fetchall()
+    assert any('idx_optimization_jobs_status' in row[-1] for row in plan)
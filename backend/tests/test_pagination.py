@@ -0,0 +1,35 @@
+"""
+Cursor decoding rejects anything that is not a list of scalar key values
+"""
+import pytest
+from src.utils.pagination import InvalidCursor, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(['2026-01-01 10:00:00', 42]), 2) == ['2026-01-01 10:00:00', 42]
+
+
+@pytest.mark.parametrize('values', [['x', {}], ['x', [1]], ['x', None], ['x', True], ['x']])
+def test_cursor_with_invalid_values(values):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(encode_cursor(values), 2)
+
+
+def test_trips_listing_rejects_nested_cursor(app):
+    response = app.test_client().get('/api/trips?cursor=WyJ4Iix7fV0')
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('keyset', ['', 'WHERE (cp.created_at, cp.id) < (?, ?)'])
+def test_community_pages_are_read_in_index_order(db, keyset):
+    plan = db.execute(f'''
+        EXPLAIN QUERY PLAN
+        SELECT cp.*, u.username, t.title FROM community_posts cp
+        JOIN users u ON cp.user_id = u.id
+        LEFT JOIN trips t ON cp.trip_id = t.id
+        {keyset}
+        ORDER BY cp.created_at DESC, cp.id DESC LIMIT 21
+    ''', ('2030-01-01', 1) if keyset else ()).fetchall()
+    details = ' | '.join(row[-1] for row in plan)
+    assert 'idx_community_posts_created_id' in details
+    assert 'TEMP B-TREE' not in details
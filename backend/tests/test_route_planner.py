@@ -0,0 +1,18 @@
+"""
+Distance matrices are cached only for routes small enough to keep around
+"""
+from src.services import route_planner
+from src.services.route_planner import cached_distance_matrix, distance_matrix, route_matrix
+
+
+def points(count):
+    return tuple((10.0 + i * 0.1, 20.0 - i * 0.1) for i in range(count))
+
+
+def test_large_routes_bypass_the_matrix_cache():
+    cached_distance_matrix.cache_clear()
+    small, large = points(route_planner.MATRIX_CACHE_MAX_STOPS), points(route_planner.MATRIX_CACHE_MAX_STOPS + 1)
+
+    assert route_matrix(small) is route_matrix(small)
+    assert route_matrix(large) == distance_matrix(large)
+    assert cached_distance_matrix.cache_info().currsize == 1
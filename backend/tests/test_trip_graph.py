@@ -0,0 +1,36 @@
+"""
+TripGraphLoader / Trip.get_complete issue a fixed number of queries
+"""
+from src.config.database import get_db
+from src.models.trip import Trip
+
+
+def traced(app, fn, *args):
+    """Run fn inside one request session, returning (result, executed statements)"""
+    statements = []
+    with app.test_request_context():
+        conn = get_db()
+        conn.set_trace_callback(statements.append)
+        try:
+            result = fn(*args)
+        finally:
+            conn.set_trace_callback(None)
+    return result, statements
+
+
+def test_get_complete_query_count_does_not_depend_on_sections(app, create_trip):
+    small = create_trip(sections=1, activities=2, expenses=2)
+    large = create_trip(sections=50, activities=200, expenses=20)
+
+    small_trip, small_statements = traced(app, Trip.get_complete, small)
+    large_trip, large_statements = traced(app, Trip.get_complete, large)
+
+    assert len(small_trip['sections']) == 1
+    assert len(large_trip['sections']) == 50
+    assert sum(len(s['activities']) for s in large_trip['sections']) == 200
+    assert len(small_statements) == len(large_statements)
+
+
+def test_get_complete_unknown_trip(app):
+    trip, _ = traced(app, Trip.get_complete, 10 ** 9)
+    assert trip is None
@@ -0,0 +1,109 @@
+-- GlobeTrotter Migration 0002
+-- Denormalized section/activity counters and planned cost on trips,
+-- maintained by triggers so trip listings need no join or GROUP BY
+
+ALTER TABLE trips ADD COLUMN section_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE trips ADD COLUMN activity_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE trips ADD COLUMN planned_cost REAL NOT NULL DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS idx_trips_created ON trips(created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_trips_user_created ON trips(user_id, created_at DESC);
+
+-- Counter updates must not bump updated_at, so only user-editable
+-- columns touch the timestamp
+DROP TRIGGER IF EXISTS update_trips_timestamp;
+CREATE TRIGGER IF NOT EXISTS update_trips_timestamp
+    AFTER UPDATE OF user_id, title, destination, start_date, end_date, status,
+        total_budget, description, cover_image_url, is_public ON trips
+    BEGIN
+        UPDATE trips SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+    END;
+
+-- ============================================
+-- Itinerary Section Counters
+-- ============================================
+CREATE TRIGGER IF NOT EXISTS trip_counters_section_insert
+    AFTER INSERT ON itinerary_sections
+    BEGIN
+        UPDATE trips SET section_count = section_count + 1 WHERE id = NEW.trip_id;
+    END;
+
+-- BEFORE DELETE: cascaded activity deletes run after the section row is
+-- gone, so the section's activities are subtracted here while they exist
+CREATE TRIGGER IF NOT EXISTS trip_counters_section_delete
+    BEFORE DELETE ON itinerary_sections
+    BEGIN
+        UPDATE trips SET
+            section_count = section_count - 1,
+            activity_count = activity_count - (SELECT COUNT(*) FROM activities WHERE itinerary_section_id = OLD.id),
+            planned_cost = planned_cost - (SELECT COALESCE(SUM(cost), 0) FROM activities WHERE itinerary_section_id = OLD.id)
+        WHERE id = OLD.trip_id;
+    END;
+
+CREATE TRIGGER IF NOT EXISTS trip_counters_section_move
+    AFTER UPDATE OF trip_id ON itinerary_sections
+    WHEN OLD.trip_id IS NOT NEW.trip_id
+    BEGIN
+        UPDATE trips SET
+            section_count = section_count - 1,
+            activity_count = activity_count - (SELECT COUNT(*) FROM activities WHERE itinerary_section_id = OLD.id),
+            planned_cost = planned_cost - (SELECT COALESCE(SUM(cost), 0) FROM activities WHERE itinerary_section_id = OLD.id)
+        WHERE id = OLD.trip_id;
+        UPDATE trips SET
+            section_count = section_count + 1,
+            activity_count = activity_count + (SELECT COUNT(*) FROM activities WHERE itinerary_section_id = NEW.id),
+            planned_cost = planned_cost + (SELECT COALESCE(SUM(cost), 0) FROM activities WHERE itinerary_section_id = NEW.id)
+        WHERE id = NEW.trip_id;
+    END;
+
+-- ============================================
+-- Activity Counters
+-- ============================================
+CREATE TRIGGER IF NOT EXISTS trip_counters_activity_insert
+    AFTER INSERT ON activities
+    BEGIN
+        UPDATE trips SET
+            activity_count = activity_count + 1,
+            planned_cost = planned_cost + COALESCE(NEW.cost, 0)
+        WHERE id = (SELECT trip_id FROM itinerary_sections WHERE id = NEW.itinerary_section_id);
+    END;
+
+-- No-op for cascaded deletes (the section row is already gone and the
+-- section delete trigger has accounted for its activities)
+CREATE TRIGGER IF NOT EXISTS trip_counters_activity_delete
+    AFTER DELETE ON activities
+    BEGIN
+        UPDATE trips SET
+            activity_count = activity_count - 1,
+            planned_cost = planned_cost - COALESCE(OLD.cost, 0)
+        WHERE id = (SELECT trip_id FROM itinerary_sections WHERE id = OLD.itinerary_section_id);
+    END;
+
+CREATE TRIGGER IF NOT EXISTS trip_counters_activity_update
+    AFTER UPDATE OF itinerary_section_id, cost ON activities
+    BEGIN
+        UPDATE trips SET
+            activity_count = activity_count - 1,
+            planned_cost = planned_cost - COALESCE(OLD.cost, 0)
+        WHERE id = (SELECT trip_id FROM itinerary_sections WHERE id = OLD.itinerary_section_id);
+        UPDATE trips SET
+            activity_count = activity_count + 1,
+            planned_cost = planned_cost + COALESCE(NEW.cost, 0)
+        WHERE id = (SELECT trip_id FROM itinerary_sections WHERE id = NEW.itinerary_section_id);
+    END;
+
+-- ============================================
+-- Backfill
+-- ============================================
+UPDATE trips SET
+    section_count = (SELECT COUNT(*) FROM itinerary_sections WHERE trip_id = trips.id),
+    activity_count = (
+        SELECT COUNT(*) FROM activities a
+        JOIN itinerary_sections isec ON a.itinerary_section_id = isec.id
+        WHERE isec.trip_id = trips.id
+    ),
+    planned_cost = (
+        SELECT COALESCE(SUM(a.cost), 0) FROM activities a
+        JOIN itinerary_sections isec ON a.itinerary_section_id = isec.id
+        WHERE isec.trip_id = trips.id
+    );
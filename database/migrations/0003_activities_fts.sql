@@ -0,0 +1,54 @@
+-- GlobeTrotter Migration 0003
+-- FTS5 full-text index over activity name, description and city,
+-- kept current by triggers (rowid = activities.id)
+
+CREATE VIRTUAL TABLE IF NOT EXISTS activities_fts USING fts5(
+    name,
+    description,
+    city_name,
+    country,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS activities_fts_insert
+    AFTER INSERT ON activities
+    BEGIN
+        INSERT INTO activities_fts (rowid, name, description, city_name, country)
+        SELECT NEW.id, NEW.name, NEW.description, c.name, c.country
+        FROM (SELECT 1) LEFT JOIN cities c ON c.id = NEW.city_id;
+    END;
+
+CREATE TRIGGER IF NOT EXISTS activities_fts_delete
+    AFTER DELETE ON activities
+    BEGIN
+        DELETE FROM activities_fts WHERE rowid = OLD.id;
+    END;
+
+CREATE TRIGGER IF NOT EXISTS activities_fts_update
+    AFTER UPDATE OF name, description, city_id ON activities
+    BEGIN
+        DELETE FROM activities_fts WHERE rowid = OLD.id;
+        INSERT INTO activities_fts (rowid, name, description, city_name, country)
+        SELECT NEW.id, NEW.name, NEW.description, c.name, c.country
+        FROM (SELECT 1) LEFT JOIN cities c ON c.id = NEW.city_id;
+    END;
+
+-- Renaming a city re-indexes the activities in it
+CREATE TRIGGER IF NOT EXISTS activities_fts_city_update
+    AFTER UPDATE OF name, country ON cities
+    BEGIN
+        DELETE FROM activities_fts WHERE rowid IN (SELECT id FROM activities WHERE city_id = NEW.id);
+        INSERT INTO activities_fts (rowid, name, description, city_name, country)
+        SELECT a.id, a.name, a.description, NEW.name, NEW.country
+        FROM activities a WHERE a.city_id = NEW.id;
+    END;
+
+-- ============================================
+-- Backfill
+-- ============================================
+DELETE FROM activities_fts;
+INSERT INTO activities_fts (rowid, name, description, city_name, country)
+SELECT a.id, a.name, a.description, c.name, c.country
+FROM activities a
+LEFT JOIN cities c ON a.city_id = c.id;
@@ -0,0 +1,68 @@
+-- GlobeTrotter Migration 0004
+-- Index-driven city search: NOCASE indexes for short prefixes, a trigram
+-- FTS5 index for substring matches, and a maintained per-city trip counter
+
+ALTER TABLE cities ADD COLUMN trip_count INTEGER NOT NULL DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS idx_cities_name_nocase ON cities(name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_cities_country_nocase ON cities(country COLLATE NOCASE);
+
+-- ============================================
+-- Trigram Full-Text Index (external content = cities)
+-- ============================================
+CREATE VIRTUAL TABLE IF NOT EXISTS cities_fts USING fts5(
+    name,
+    country,
+    content = 'cities',
+    content_rowid = 'id',
+    tokenize = 'trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS cities_fts_insert
+    AFTER INSERT ON cities
+    BEGIN
+        INSERT INTO cities_fts (rowid, name, country) VALUES (NEW.id, NEW.name, NEW.country);
+    END;
+
+CREATE TRIGGER IF NOT EXISTS cities_fts_delete
+    AFTER DELETE ON cities
+    BEGIN
+        INSERT INTO cities_fts (cities_fts, rowid, name, country) VALUES ('delete', OLD.id, OLD.name, OLD.country);
+    END;
+
+CREATE TRIGGER IF NOT EXISTS cities_fts_update
+    AFTER UPDATE OF name, country ON cities
+    BEGIN
+        INSERT INTO cities_fts (cities_fts, rowid, name, country) VALUES ('delete', OLD.id, OLD.name, OLD.country);
+        INSERT INTO cities_fts (rowid, name, country) VALUES (NEW.id, NEW.name, NEW.country);
+    END;
+
+-- ============================================
+-- Trip Counter
+-- ============================================
+CREATE TRIGGER IF NOT EXISTS city_trip_count_insert
+    AFTER INSERT ON trip_cities
+    BEGIN
+        UPDATE cities SET trip_count = trip_count + 1 WHERE id = NEW.city_id;
+    END;
+
+CREATE TRIGGER IF NOT EXISTS city_trip_count_delete
+    AFTER DELETE ON trip_cities
+    BEGIN
+        UPDATE cities SET trip_count = trip_count - 1 WHERE id = OLD.city_id;
+    END;
+
+CREATE TRIGGER IF NOT EXISTS city_trip_count_update
+    AFTER UPDATE OF city_id ON trip_cities
+    WHEN OLD.city_id IS NOT NEW.city_id
+    BEGIN
+        UPDATE cities SET trip_count = trip_count - 1 WHERE id = OLD.city_id;
+        UPDATE cities SET trip_count = trip_count + 1 WHERE id = NEW.city_id;
+    END;
+
+-- ============================================
+-- Backfill
+-- ============================================
+INSERT INTO cities_fts (cities_fts) VALUES ('rebuild');
+
+UPDATE cities SET trip_count = (SELECT COUNT(*) FROM trip_cities WHERE city_id = cities.id);
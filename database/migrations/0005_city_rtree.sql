@@ -0,0 +1,40 @@
+-- GlobeTrotter Migration 0005
+-- R*-tree over city coordinates for radius and nearest-city queries
+
+CREATE VIRTUAL TABLE IF NOT EXISTS cities_rtree USING rtree(
+    id,
+    min_lat, max_lat,
+    min_lon, max_lon
+);
+
+-- Cities without coordinates are left out of the tree
+CREATE TRIGGER IF NOT EXISTS cities_rtree_insert
+    AFTER INSERT ON cities
+    WHEN NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL
+    BEGIN
+        INSERT INTO cities_rtree (id, min_lat, max_lat, min_lon, max_lon)
+        VALUES (NEW.id, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude);
+    END;
+
+CREATE TRIGGER IF NOT EXISTS cities_rtree_delete
+    AFTER DELETE ON cities
+    BEGIN
+        DELETE FROM cities_rtree WHERE id = OLD.id;
+    END;
+
+CREATE TRIGGER IF NOT EXISTS cities_rtree_update
+    AFTER UPDATE OF latitude, longitude ON cities
+    BEGIN
+        DELETE FROM cities_rtree WHERE id = OLD.id;
+        INSERT INTO cities_rtree (id, min_lat, max_lat, min_lon, max_lon)
+        SELECT NEW.id, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude
+        WHERE NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL;
+    END;
+
+-- ============================================
+-- Backfill
+-- ============================================
+INSERT INTO cities_rtree (id, min_lat, max_lat, min_lon, max_lon)
+SELECT id, latitude, latitude, longitude, longitude
+FROM cities
+WHERE latitude IS NOT NULL AND longitude IS NOT NULL;
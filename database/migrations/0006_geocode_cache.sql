@@ -0,0 +1,11 @@
+-- GlobeTrotter Migration 0006
+-- Persistent cache of external geocoding (Geoapify) autocomplete results
+
+CREATE TABLE IF NOT EXISTS geocode_cache (
+    query_key TEXT PRIMARY KEY,
+    results TEXT NOT NULL,
+    created_at INTEGER NOT NULL,
+    expires_at INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_geocode_cache_expires ON geocode_cache(expires_at);
@@ -0,0 +1,32 @@
+-- GlobeTrotter Migration 0007
+-- Change log for the in-process city catalog: the latest change sequence
+-- number per city (including trip_count updates and deletions), so a
+-- catalog at version N reloads only cities with seq > N
+
+CREATE TABLE IF NOT EXISTS city_changes (
+    city_id INTEGER PRIMARY KEY,
+    seq INTEGER NOT NULL
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_city_changes_seq ON city_changes(seq);
+
+CREATE TRIGGER IF NOT EXISTS city_changes_insert
+    AFTER INSERT ON cities
+    BEGIN
+        INSERT OR REPLACE INTO city_changes (city_id, seq)
+        VALUES (NEW.id, (SELECT COALESCE(MAX(seq), 0) + 1 FROM city_changes));
+    END;
+
+CREATE TRIGGER IF NOT EXISTS city_changes_update
+    AFTER UPDATE ON cities
+    BEGIN
+        INSERT OR REPLACE INTO city_changes (city_id, seq)
+        VALUES (NEW.id, (SELECT COALESCE(MAX(seq), 0) + 1 FROM city_changes));
+    END;
+
+CREATE TRIGGER IF NOT EXISTS city_changes_delete
+    AFTER DELETE ON cities
+    BEGIN
+        INSERT OR REPLACE INTO city_changes (city_id, seq)
+        VALUES (OLD.id, (SELECT COALESCE(MAX(seq), 0) + 1 FROM city_changes));
+    END;
@@ -0,0 +1,8 @@
+-- GlobeTrotter Migration 0008
+-- Trip listings page on (created_at DESC, id DESC); index the full key so
+-- each keyset page is an index range scan instead of a sort
+
+CREATE INDEX IF NOT EXISTS idx_trips_created_id ON trips(created_at DESC, id DESC);
+
+-- Superseded by idx_trips_created_id (same leading column)
+DROP INDEX IF EXISTS idx_trips_created;
@@ -0,0 +1,32 @@
+-- GlobeTrotter Migration 0009
+-- Itinerary optimization jobs and their memoized results, shared by every
+-- web worker so a job can be polled from any of them
+
+CREATE TABLE IF NOT EXISTS optimization_jobs (
+    job_id TEXT PRIMARY KEY,
+    trip_id INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL,
+    status TEXT NOT NULL CHECK(status IN ('queued', 'running', 'done', 'failed')),
+    cached INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    submitted_at REAL NOT NULL,
+    finished_at REAL,
+    FOREIGN KEY (trip_id) REFERENCES trips(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_optimization_jobs_trip ON optimization_jobs(trip_id, submitted_at);
+CREATE INDEX IF NOT EXISTS idx_optimization_jobs_fingerprint ON optimization_jobs(fingerprint, status);
+CREATE INDEX IF NOT EXISTS idx_optimization_jobs_finished ON optimization_jobs(finished_at);
+
+-- One result per itinerary content hash; least recently used rows are pruned
+CREATE TABLE IF NOT EXISTS optimization_results (
+    fingerprint TEXT PRIMARY KEY,
+    trip_id INTEGER NOT NULL,
+    result TEXT NOT NULL,
+    used_at REAL NOT NULL,
+    FOREIGN KEY (trip_id) REFERENCES trips(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_optimization_results_trip ON optimization_results(trip_id);
+CREATE INDEX IF NOT EXISTS idx_optimization_results_used ON optimization_results(used_at);
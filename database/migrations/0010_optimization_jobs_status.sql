@@ -0,0 +1,5 @@
+-- GlobeTrotter Migration 0010
+-- Pending-job counts and the timeout sweep filter optimization jobs on
+-- status and submitted_at; index them so neither scans the table
+
+CREATE INDEX IF NOT EXISTS idx_optimization_jobs_status ON optimization_jobs(status, submitted_at);
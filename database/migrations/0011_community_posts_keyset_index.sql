@@ -0,0 +1,8 @@
+-- GlobeTrotter Migration 0011
+-- Community posts page on (created_at DESC, id DESC); index the full key so
+-- each keyset page is an index range scan instead of a sort
+
+CREATE INDEX IF NOT EXISTS idx_community_posts_created_id ON community_posts(created_at DESC, id DESC);
+
+-- Superseded by idx_community_posts_created_id (same leading column)
+DROP INDEX IF EXISTS idx_community_posts_created;